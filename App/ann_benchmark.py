@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+IVF vs exact search benchmark
+
+Measures recall@k and per-query latency of the IVF index against the exact NumPy scan
+for a range of nprobe values. Vectors come from the knowledge base (embedded through
+the on-disk embedding cache) and/or synthetic clustered vectors to simulate a larger
+corpus. Queries are held-out perturbations of stored vectors.
+
+Usage:
+    python ann_benchmark.py [--synthetic N] [--no-corpus] [--queries Q] [--k K] [--nlist NLIST]
+"""
+
+import argparse
+import time
+import statistics
+import numpy as np
+from ann_index import IVFIndex
+from numpy_vectorstore import NumpyVectorStore
+
+def load_corpus_vectors() -> np.ndarray:
+    """Embed the knowledge base chunks (cached vectors are reused)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from document_loader import DocumentLoader
+    from embedding_cache import CachedEmbeddings
+    from config import EMBEDDING_MODEL
+
+    doc_splits = DocumentLoader().load_and_split_documents()
+    embeddings = CachedEmbeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL)
+    return np.asarray(embeddings.embed_documents([doc.page_content for doc in doc_splits]), dtype=np.float32)
+
+def synthetic_vectors(count: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Gaussian blobs around random directions, roughly like topic clusters of text embeddings."""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+
+def exact_search(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+def time_queries(search, queries):
+    """Run search on each query; return (results, per-query latencies in ms)."""
+    results, latencies = [], []
+    for query in queries:
+        start_time = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return results, latencies
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF recall@k and latency against exact search")
+    parser.add_argument("--synthetic", type=int, default=0, help="Add N synthetic vectors to the corpus")
+    parser.add_argument("--no-corpus", action="store_true", help="Skip the knowledge base (synthetic only)")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic-only vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF clusters (default ~4 * sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    parts = []
+    if not args.no_corpus:
+        parts.append(load_corpus_vectors())
+    if args.synthetic:
+        dim = parts[0].shape[1] if parts else args.dim
+        parts.append(synthetic_vectors(args.synthetic, dim, max(8, args.synthetic // 2000), rng))
+    if not parts:
+        parser.error("nothing to benchmark: use --synthetic N with --no-corpus")
+    matrix = NumpyVectorStore._normalize(np.concatenate(parts))
+    k = min(args.k, len(matrix))
+
+    # Held-out queries: stored vectors with noise, so the exact neighbours are non-trivial
+    picks = rng.choice(len(matrix), min(args.queries, len(matrix)), replace=False)
+    queries = NumpyVectorStore._normalize(matrix[picks] + 0.3 * rng.standard_normal(matrix[picks].shape)
+                                          / np.sqrt(matrix.shape[1]))
+
+    print(f"📊 {len(matrix)} vectors x {matrix.shape[1]} dims, {len(queries)} queries, k={k}")
+    truth, exact_latencies = time_queries(lambda query: exact_search(matrix, query, k), queries)
+    print(f"Exact scan: median {statistics.median(exact_latencies):.3f} ms, "
+          f"p95 {percentile(exact_latencies, 0.95):.3f} ms")
+
+    index = IVFIndex(args.nlist or max(1, int(4 * np.sqrt(len(matrix)))))
+    index.train(matrix)
+
+    print(f"\n{'nprobe':>7} {'recall@' + str(k):>10} {'median ms':>10} {'p95 ms':>8} {'speedup':>8}")
+    for nprobe in args.nprobe:
+        if nprobe > index.nlist:
+            continue
+        results, latencies = time_queries(
+            lambda query: index.search(matrix, query[None, :], k, nprobe=nprobe)[0][0], queries)
+        recall = statistics.mean(len(set(found) & set(expected)) / k
+                                 for found, expected in zip(results, truth))
+        median = statistics.median(latencies)
+        print(f"{nprobe:>7} {recall:>10.3f} {median:>10.3f} {percentile(latencies, 0.95):>8.3f} "
+              f"{statistics.median(exact_latencies) / median:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import gradio as gr
-from document_loader import DocumentLoader, VectorStore
+from document_loader import DocumentLoader, VectorStore, IngestionManifest
 from rag_agent import RAGAgent
 from code_optimizer import CodeOptimizer
 from gpu_mentor import GPUMentor
@@ -7,12 +7,22 @@ from data_analyzer import DataAnalyzer
 from langchain.tools.retriever import create_retriever_tool
 from benchmark import run_benchmark  # Using the updated benchmark implementation
 from samples import SAMPLE_CODES
+from warm_worker import get_warm_pool
+from config import (USE_PERSISTENT_VECTORSTORE, REFRESH_KNOWLEDGE_ON_STARTUP, STREAM_RESPONSES, ASYNC_HANDLERS,
+                    GRADIO_CONCURRENCY_LIMIT, WARM_UP_MODELS, QUERY_ROUTER_EMBEDDINGS, WARM_WORKER_ENABLED)
 
 class GPUMentorApp:
     """Main application class for the GPU Mentor."""
     
-    def __init__(self):
+    def __init__(self, rebuild_index: bool = False, refresh_knowledge: bool = False, warm_up_models: bool = WARM_UP_MODELS,
+                 warm_workers: bool = WARM_WORKER_ENABLED):
         self.gpu_mentor = None
+        self.rag_agent = None
+        self.warm_pool = None
+        self.warm_up_models = warm_up_models
+        self.warm_workers = warm_workers
+        self.rebuild_index = rebuild_index
+        self.refresh_knowledge = refresh_knowledge or REFRESH_KNOWLEDGE_ON_STARTUP
         self.initialize_system()
     
     def initialize_system(self):
@@ -20,16 +30,14 @@ class GPUMentorApp:
         print("🚀 Initializing GPU Mentor System...")
         
         try:
-            # Load and process documents
-            print("📚 Loading documents...")
-            doc_loader = DocumentLoader()
-            docs = doc_loader.load_documents()
-            doc_splits = doc_loader.split_documents(docs)
+            # Initialize RAG agent first so the models load while the knowledge base does
+            print("🤖 Initializing RAG agent...")
+            rag_agent = RAGAgent()
+            self.rag_agent = rag_agent
+            if self.warm_up_models:
+                rag_agent.warm_up_models()
             
-            # Create vector store
-            print("🔍 Creating vector store...")
-            vector_store = VectorStore()
-            retriever = vector_store.create_vectorstore(doc_splits)
+            retriever = self._load_knowledge_base()
             
             # Create retriever tool
             retriever_tool = create_retriever_tool(
@@ -37,10 +45,6 @@ class GPUMentorApp:
                 "retrieve_python_gpu_acceleration",
                 "Search and return information about accelerating Python code using GPU with RAPIDS and CuPy."
             )
-            
-            # Initialize RAG agent
-            print("🤖 Initializing RAG agent...")
-            rag_agent = RAGAgent()
             rag_agent.set_retriever_tool(retriever_tool)
             
             # Initialize code optimizer
@@ -50,6 +54,8 @@ class GPUMentorApp:
             # Initialize GPU mentor
             print("🎓 Initializing GPU mentor...")
             self.gpu_mentor = GPUMentor(rag_agent, code_optimizer)
+            if self.warm_workers:
+                self._start_warm_workers()
             
             # Initialize data analyzer
             print("📊 Initializing data analyzer...")
@@ -62,6 +68,67 @@ class GPUMentorApp:
             self.gpu_mentor = None
             self.data_analyzer = None
     
+    def is_ready(self) -> bool:
+        """True once the system is initialized and the models are loaded in Ollama."""
+        return bool(self.gpu_mentor and self.rag_agent and self.rag_agent.models_ready())
+    
+    def get_model_status(self) -> str:
+        """Markdown status line for the UI: model readiness and how long each model took to load."""
+        if not self.rag_agent:
+            return "⚠️ **Models**: not initialized"
+        status = self.rag_agent.get_warm_up_status()
+        loads = ", ".join(f"{name} in {seconds:.1f}s" for name, seconds in status["load_seconds"].items())
+        if self.is_ready():
+            return f"✅ **Models ready** (loaded {loads})" if loads else "✅ **Models ready**"
+        if status["state"] == "loading":
+            return "⏳ **Loading models** - the first answers may take a little longer"
+        if status["state"] == "failed":
+            errors = "; ".join(f"{name}: {error}" for name, error in status["errors"].items())
+            return f"⚠️ **Model warm-up failed** ({errors}) - models load on the first request"
+        return "💤 **Models load on the first request**"
+    
+    def _start_warm_workers(self):
+        """Queue the warm worker allocation now so it is serving by the first benchmark."""
+        try:
+            self.warm_pool = get_warm_pool()
+            self.warm_pool.start()
+            self.gpu_mentor.warm_pool = self.warm_pool
+        except Exception as e:
+            print(f"⚠️ Warm workers unavailable, benchmarks will submit their own jobs: {e}")
+
+    def _load_knowledge_base(self):
+        """Open the persisted vector store, loading documents only on a miss or rebuild."""
+        vector_store = VectorStore()
+        if QUERY_ROUTER_EMBEDDINGS:
+            # The query router's exemplar classifier reuses the retrieval embedding model
+            self.rag_agent.router.set_embedder(vector_store.embedding_model.embed_query)
+        
+        # Fast path: a current persistent store needs no fetching, splitting or embedding
+        store_current = not self.rebuild_index and vector_store.is_current()
+        if store_current and not self.refresh_knowledge:
+            print("⚡ Persistent vector store is current, skipping document loading")
+            return vector_store.load_vectorstore()
+        
+        # Only a persistent store can be updated incrementally; the manifest, the version
+        # stamp and the store must agree, otherwise ingest everything from scratch
+        manifest = None
+        if USE_PERSISTENT_VECTORSTORE:
+            manifest = IngestionManifest()
+            if not store_current or not manifest.sources:
+                vector_store.reset()
+                manifest.clear()
+        
+        # Load and process new or changed documents
+        print("📚 Loading documents...")
+        doc_loader = DocumentLoader(manifest=manifest)
+        doc_splits = doc_loader.load_and_split_documents()
+        
+        # Create or update vector store
+        print("🔍 Creating vector store...")
+        retriever = vector_store.create_vectorstore(doc_splits, doc_loader.get_stale_chunk_ids())
+        doc_loader.commit_manifest()
+        return retriever
+    
     def create_interface(self):
         """Create the Gradio interface."""
         if not self.gpu_mentor or not hasattr(self, 'data_analyzer'):
@@ -214,6 +281,15 @@ class GPUMentorApp:
             AI-powered assistance, optimization, benchmarking, data analysis, tutorials, and educational guidance.
             """)
             
+            # Model readiness, refreshed until warm-up has finished
+            model_status = gr.Markdown(self.get_model_status())
+            status_timer = gr.Timer(5)
+            status_timer.tick(
+                lambda: (self.get_model_status(),
+                         gr.Timer(active=self.rag_agent.get_warm_up_status()["state"] == "loading")),
+                outputs=[model_status, status_timer]
+            )
+            
             with gr.Tab("💬 GPU Gossip"):
                 with gr.Row():
                     with gr.Column(scale=2):
@@ -328,15 +404,16 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
 
                 def benchmark_handler(cpu_code, gpu_code):
                     if not cpu_code.strip() or not gpu_code.strip():
-                        return "No code provided for benchmarking.", "No code provided for benchmarking."
+                        yield "No code provided for benchmarking.", "No code provided for benchmarking."
+                        return
                     
                     try:
-                        # Run the benchmark and get formatted markdown outputs
-                        original_md, optimized_md = self.gpu_mentor.run_code_comparison(cpu_code, gpu_code)
-                        return original_md, optimized_md
+                        # Both jobs run at once; each result is shown as soon as its job finishes
+                        for original_md, optimized_md in self.gpu_mentor.run_code_comparison_stream(cpu_code, gpu_code):
+                            yield original_md, optimized_md
                     except Exception as e:
                         error_msg = f"Error running benchmark: {str(e)}"
-                        return error_msg, error_msg
+                        yield error_msg, error_msg
 
                 # Benchmark button click handler
                 benchmark_btn.click(
@@ -437,10 +514,10 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
                 # Generate the actual tutorial content
                 return self.gpu_mentor.get_tutorial_content(topic)
             
-            def clear_chat():
-                # Clear conversation memory in the RAG agent
+            def clear_chat(request: gr.Request):
+                # Clear this session's conversation memory in the RAG agent
                 if self.gpu_mentor:
-                    self.gpu_mentor.clear_conversation_memory()
+                    self.gpu_mentor.clear_conversation_memory(request.session_hash)
                 # Return a clean slate with a fresh welcome message
                 return [{
                     "role": "assistant", 
@@ -467,18 +544,28 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
                 optimized_msg = "**GPU-Optimized Code Execution Results**\n\nClick '⚡ Benchmark on Sol' to execute the GPU-optimized code and compare performance."
                 return original_msg, optimized_msg
             
+            # Generator handlers stream tokens into the views as they arrive; async handlers
+            # wait on Ollama on the event loop instead of occupying a worker thread
+            mentor = self.gpu_mentor
+            if ASYNC_HANDLERS:
+                chat_handler = mentor.achat_interface_stream if STREAM_RESPONSES else mentor.achat_interface
+                analyze_handler = mentor.aanalyze_code_only_stream if STREAM_RESPONSES else mentor.aanalyze_code_only
+            else:
+                chat_handler = mentor.chat_interface_stream if STREAM_RESPONSES else mentor.chat_interface
+                analyze_handler = mentor.analyze_code_only_stream if STREAM_RESPONSES else mentor.analyze_code_only
+            
             # Wire up the chat interface
             sample_dropdown.change(load_sample_code, inputs=[sample_dropdown], outputs=[code_input])
             load_sample_btn.click(load_sample_code, inputs=[sample_dropdown], outputs=[code_input])
             
             submit_btn.click(
-                self.gpu_mentor.chat_interface,
+                chat_handler,
                 inputs=[message_input, code_input, chatbot],
                 outputs=[message_input, code_input, chatbot]
             )
             
             message_input.submit(
-                self.gpu_mentor.chat_interface,
+                chat_handler,
                 inputs=[message_input, code_input, chatbot],
                 outputs=[message_input, code_input, chatbot]
             )
@@ -492,7 +579,7 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
             clear_code_btn.click(clear_execution_results, outputs=[original_execution_output, optimized_execution_output])
             
             analyze_btn.click(
-                self.gpu_mentor.analyze_code_only,
+                analyze_handler,
                 inputs=[analyze_code],
                 outputs=[analysis_results, optimized_code]
             )
@@ -509,6 +596,14 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
                 inputs=[tutorial_topic],
                 outputs=[tutorial_content]
             )
+            
+            # Drop a session's conversation when its browser tab closes; idle and least
+            # recently used sessions are also evicted by the session store
+            def end_session(request: gr.Request):
+                self.rag_agent.clear_conversation_memory(request.session_hash)
+            
+            if hasattr(interface, "unload"):
+                interface.unload(end_session)
         
         return interface
     
@@ -529,6 +624,9 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
         # Override with any user-provided parameters
         launch_params.update(kwargs)
         
+        # Gradio runs one request per handler at a time unless told otherwise
+        interface.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT)
+        
         try:
             interface.launch(**launch_params)
         except KeyboardInterrupt:
@@ -543,7 +641,8 @@ Feel free to ask questions about GPU acceleration or paste code for analysis!"""
     def close(self):
         """Close the application gracefully."""
         print("🔄 Closing GPU Mentor application...")
-        # Add any cleanup code here if needed
+        if self.warm_pool:
+            self.warm_pool.stop()
 
 if __name__ == "__main__":
     app = GPUMentorApp()
@@ -0,0 +1,130 @@
+"""
+Benchmark statistics
+
+Timing harness and summary statistics for the CPU and GPU benchmark jobs. The wrapped
+benchmark scripts import this module inside the job, so it only uses the standard
+library. measure() does warm-up runs, then timed runs until the bootstrap confidence
+interval of the median is narrow enough; speedup() gives a bootstrap interval for the
+ratio of two medians. Results travel from the job to the app as one JSON line.
+"""
+
+import json
+import math
+import time
+import random
+import statistics
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+RESULT_PREFIX = "BENCHMARK_RESULT_JSON: "  # Start of the machine-readable result line in a job's output
+
+def percentile(samples: List[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation between closest ranks."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "p95": percentile(samples, 95),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+def bootstrap_ci(samples: List[float], statistic: Callable = statistics.median, confidence: float = 0.95,
+                 resamples: int = 2000, rng: random.Random = None) -> Tuple[float, float]:
+    """Percentile bootstrap interval of statistic(samples)."""
+    rng = rng or random.Random(0)
+    estimates = sorted(statistic(rng.choices(samples, k=len(samples))) for _ in range(resamples))
+    tail = (1 - confidence) / 2 * 100
+    return percentile(estimates, tail), percentile(estimates, 100 - tail)
+
+def relative_ci_width(samples: List[float], confidence: float = 0.95, resamples: int = 500,
+                      rng: random.Random = None) -> float:
+    """Width of the median's confidence interval as a fraction of the median."""
+    low, high = bootstrap_ci(samples, confidence=confidence, resamples=resamples, rng=rng)
+    median = statistics.median(samples)
+    return (high - low) / median if median > 0 else 0.0
+
+def measure(run: Callable[[], Any], sync: Optional[Callable[[], Any]] = None, warmup: int = 2,
+            min_iterations: int = 5, max_iterations: int = 50, target_relative_ci: float = 0.05,
+            time_budget: float = 60, confidence: float = 0.95, resamples: int = 2000,
+            timer: Callable[[], float] = time.perf_counter, seed: int = 0) -> Dict[str, Any]:
+    """Time run() adaptively.
+
+    sync (e.g. a GPU device synchronize) is called before the clock stops. After `warmup`
+    untimed runs, timed runs continue until the median's confidence interval is narrower
+    than target_relative_ci of the median (checked from min_iterations on), max_iterations
+    is reached or time_budget seconds have passed.
+    """
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        run()
+        if sync:
+            sync()
+
+    samples = []
+    started = timer()
+    stop_reason = "max_iterations"
+    width = None
+    while len(samples) < max_iterations:
+        start_time = timer()
+        run()
+        if sync:
+            sync()
+        samples.append(timer() - start_time)
+        if len(samples) >= min_iterations:
+            width = relative_ci_width(samples, confidence, rng=rng)
+            if width <= target_relative_ci:
+                stop_reason = "converged"
+                break
+        if timer() - started >= time_budget and len(samples) >= 2:
+            stop_reason = "time_budget"
+            break
+
+    if width is None:
+        width = relative_ci_width(samples, confidence, rng=rng) if len(samples) > 1 else 0.0
+    return {
+        "samples": samples,
+        "warmup_runs": warmup,
+        "stop_reason": stop_reason,
+        "relative_ci_width": width,
+        "confidence": confidence,
+        "summary": summarize(samples),
+        "median_ci": list(bootstrap_ci(samples, confidence=confidence, resamples=resamples, rng=rng)),
+    }
+
+def speedup(baseline: List[float], candidate: List[float], confidence: float = 0.95,
+            resamples: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """Ratio of median times (baseline / candidate) with a bootstrap interval.
+
+    Both sample sets are resampled independently, since the runs are not paired.
+    """
+    rng = random.Random(seed)
+    ratios = sorted(statistics.median(rng.choices(baseline, k=len(baseline))) /
+                    statistics.median(rng.choices(candidate, k=len(candidate))) for _ in range(resamples))
+    tail = (1 - confidence) / 2 * 100
+    return {
+        "speedup": statistics.median(baseline) / statistics.median(candidate),
+        "ci": [percentile(ratios, tail), percentile(ratios, 100 - tail)],
+        "confidence": confidence,
+    }
+
+def emit_result(result: Dict[str, Any]):
+    """Print the machine-readable result line the app parses from the job output."""
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+def parse_result(output: str) -> Optional[Dict[str, Any]]:
+    """The last result line in a job's output, or None if there is none."""
+    for line in reversed(output.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            try:
+                return json.loads(line[len(RESULT_PREFIX):])
+            except ValueError:
+                return None
+    return None
@@ -1,225 +1,119 @@
 import os
 import time
-import subprocess
 import re
 from pathlib import Path
+from executors import get_executor
+from bench_stats import parse_result, speedup as speedup_ci
+from config import (SLURM_JOB_TIMEOUT, BENCH_WARMUP_RUNS, BENCH_MIN_ITERATIONS, BENCH_MAX_ITERATIONS,
+                    BENCH_TARGET_RELATIVE_CI, BENCH_TIME_BUDGET, BENCH_CONFIDENCE, BENCH_BOOTSTRAP_RESAMPLES)
+
+APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))  # Put on the job's sys.path so wrapped scripts can import bench_stats
 
 def wrap_cpu_code(code):
     """
-    Wrap CPU code with timing functionality.
-    This preserves the original code structure while adding timing measurements.
+    Wrap CPU code with the benchmark harness.
     """
-    wrapped_code = f"""import time
-import warnings
-import io
-import sys
-warnings.filterwarnings("ignore")
-
-# ===== CPU BENCHMARK =====
-print("="*50)
-print("CPU BENCHMARK EXECUTION")
-print("="*50)
-
-# Variables for timing
-iterations = 5  # Run multiple times for reliable timing
-iterations_completed = 0
-total_time = 0
-print(f"Start time: {{time.strftime('%Y-%m-%d %H:%M:%S')}}")
-
-try:
-    # Capture original program output
-    original_stdout = sys.stdout
-    program_output = io.StringIO()
-    sys.stdout = program_output
-    
-    # Original code starts here (first run to capture output)
-{indent_code(code, 4)}
-    # Original code ends here
-    
-    # Restore stdout for benchmark information
-    sys.stdout = original_stdout
-    print("\\n----- PROGRAM OUTPUT -----")
-    print(program_output.getvalue())
-    print("----- END PROGRAM OUTPUT -----\\n")
-    
-    # Reset program_output for clean performance measurement
-    program_output = io.StringIO()
-    
-    # Main timing loop (without capturing output to avoid overhead)
-    for i in range(iterations):
-        start_time = time.perf_counter()
-        
-        # Run computation again (output discarded for timing purposes)
-{indent_code(code, 8)}
-        
-        end_time = time.perf_counter()
-        elapsed_time = end_time - start_time
-        total_time += elapsed_time
-        iterations_completed += 1
-        print(f"Iteration {{i+1}}: {{elapsed_time:.6f}} seconds")
-    
-    # Calculate average
-    avg_time = total_time / iterations_completed
-    print(f"End time: {{time.strftime('%Y-%m-%d %H:%M:%S')}}")
-    print(f"TOTAL CPU EXECUTION TIME: {{avg_time:.6f}} seconds (averaged over {{iterations_completed}} runs)")
-    print("✅ CPU benchmark completed successfully!")
-except Exception as e:
-    # Restore stdout in case of exception
-    if 'original_stdout' in locals():
-        sys.stdout = original_stdout
-    iterations_completed = max(1, iterations_completed)
-    if iterations_completed > 0:
-        avg_time = total_time / iterations_completed
-        print(f"TOTAL CPU EXECUTION TIME: {{avg_time:.6f}} seconds (partial completion, {{iterations_completed}} runs)")
-    else:
-        print(f"CPU benchmark failed, no successful iterations")
-    print(f"❌ Error: {{str(e)}}")
-"""
-    return wrapped_code
+    return wrap_benchmark_code(code, "CPU")
 
 def wrap_gpu_code(code):
     """
-    Wrap GPU code with timing functionality plus GPU-specific features.
-    This preserves the original code structure while adding timing measurements.
+    Wrap GPU code with the benchmark harness plus GPU warmup and synchronization.
     """
-    wrapped_code = f"""import time
-import warnings
-import cupy as cp
-import io
-import sys
-warnings.filterwarnings("ignore")
-
-# ===== GPU BENCHMARK =====
-print("="*50)
-print("GPU BENCHMARK EXECUTION")
-print("="*50)
+    return wrap_benchmark_code(code, "GPU", imports="import cupy as cp", setup=GPU_SETUP, sync=GPU_SYNC)
 
-# Force some computation to ensure GPU is initialized
+GPU_SETUP = """# Force some computation to ensure GPU is initialized
 print("Warming up GPU...")
 try:
     warmup_a = cp.random.rand(1000, 1000).astype(cp.float32)
     warmup_b = cp.random.rand(1000, 1000).astype(cp.float32)
     for _ in range(3):
         _ = cp.matmul(warmup_a, warmup_b)
-    cp.cuda.stream.get_current_stream().synchronize()
+    cp.cuda.Device().synchronize()
     print("GPU warmup completed")
 except Exception as gpu_err:
-    print(f"GPU warmup skipped: {{gpu_err}}")
+    print(f"GPU warmup skipped: {gpu_err}")
+"""
+
+GPU_SYNC = """# Kernels run asynchronously, so wait for the device before the clock stops
+    cp.cuda.Device().synchronize()"""
+
+def wrap_benchmark_code(code, label, imports="", setup="", sync="pass"):
+    """
+    Wrap code with the benchmark harness from bench_stats.
+    
+    The code is compiled once and run in a fresh namespace each time. The first run
+    captures the program output; it and BENCH_WARMUP_RUNS further runs are not timed.
+    Timed runs continue until the median's confidence interval is narrow enough, and
+    the statistics are printed both for people and as a JSON result line.
+    """
+    return f"""import io
+import sys
+import time
+import warnings
+import contextlib
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {APP_DIRECTORY!r})
+from bench_stats import measure, emit_result
+{imports}
+
+# ===== {label} BENCHMARK =====
+print("="*50)
+print("{label} BENCHMARK EXECUTION")
+print("="*50)
+
+{setup}
+USER_CODE = compile({code!r}, "<benchmark>", "exec")
+
+def run_program():
+    exec(USER_CODE, {{"__name__": "__main__"}})
+
+def run_silently():
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_program()
+
+def synchronize():
+    {sync}
 
-# Variables for timing
-iterations = 5  # Run multiple times for reliable timing
-iterations_completed = 0
-total_time = 0
 print(f"Start time: {{time.strftime('%Y-%m-%d %H:%M:%S')}}")
 
 try:
-    # Capture original program output
-    original_stdout = sys.stdout
+    # First run shows the program output
     program_output = io.StringIO()
-    sys.stdout = program_output
-    
-    # Original code starts here (first run to capture output)
-{indent_code(code, 4)}
-    # Original code ends here
-    
-    # Restore stdout for benchmark information
-    sys.stdout = original_stdout
+    with contextlib.redirect_stdout(program_output):
+        run_program()
+    synchronize()
     print("\\n----- PROGRAM OUTPUT -----")
     print(program_output.getvalue())
     print("----- END PROGRAM OUTPUT -----\\n")
     
-    # Reset program_output for clean performance measurement
-    program_output = io.StringIO()
-    
-    # Make sure all GPU operations have completed
-    cp.cuda.stream.get_current_stream().synchronize()
+    result = measure(run_silently, sync=synchronize, warmup={BENCH_WARMUP_RUNS},
+                     min_iterations={BENCH_MIN_ITERATIONS}, max_iterations={BENCH_MAX_ITERATIONS},
+                     target_relative_ci={BENCH_TARGET_RELATIVE_CI}, time_budget={BENCH_TIME_BUDGET},
+                     confidence={BENCH_CONFIDENCE}, resamples={BENCH_BOOTSTRAP_RESAMPLES})
+    for i, seconds in enumerate(result["samples"]):
+        print(f"Iteration {{i+1}}: {{seconds:.6f}} seconds")
     
-    # Main timing loop
-    for i in range(iterations):
-        start_time = time.perf_counter()
-        
-        # Run computation again
-{indent_code(code, 8)}
-        
-        # Synchronize before stopping the timer
-        cp.cuda.stream.get_current_stream().synchronize()
-        
-        end_time = time.perf_counter()
-        elapsed_time = end_time - start_time
-        total_time += elapsed_time
-        iterations_completed += 1
-        print(f"Iteration {{i+1}}: {{elapsed_time:.6f}} seconds")
-    
-    # Calculate average
-    avg_time = total_time / iterations_completed
+    stats = result["summary"]
+    low, high = result["median_ci"]
     print(f"End time: {{time.strftime('%Y-%m-%d %H:%M:%S')}}")
-    print(f"TOTAL GPU EXECUTION TIME: {{avg_time:.6f}} seconds (averaged over {{iterations_completed}} runs)")
-    print("✅ GPU benchmark completed successfully!")
+    print(f"Runs: {{result['warmup_runs'] + 1}} warm-up, {{stats['n']}} timed (stopped on {{result['stop_reason']}})")
+    print(f"MEDIAN {label} EXECUTION TIME: {{stats['median']:.6f}} seconds "
+          f"({{result['confidence']:.0%}} CI {{low:.6f}}-{{high:.6f}}, p95 {{stats['p95']:.6f}}, stdev {{stats['stdev']:.6f}})")
+    emit_result(dict(result, device="{label.lower()}"))
+    print("✅ {label} benchmark completed successfully!")
 except Exception as e:
-    # Restore stdout in case of exception
-    if 'original_stdout' in locals():
-        sys.stdout = original_stdout
-    iterations_completed = max(1, iterations_completed)
-    if iterations_completed > 0:
-        avg_time = total_time / iterations_completed
-        print(f"TOTAL GPU EXECUTION TIME: {{avg_time:.6f}} seconds (partial completion, {{iterations_completed}} runs)")
-    else:
-        print(f"GPU benchmark failed, no successful iterations")
     print(f"❌ Error: {{str(e)}}")
 """
-    return wrapped_code
-
-def indent_code(code, spaces=4):
-    """
-    Properly indent code while preserving its original indentation structure.
-    """
-    lines = code.split('\n')
-    indented_lines = []
-    
-    for line in lines:
-        if line.strip():  # If the line has content
-            # Preserve original indentation and add specified spaces
-            indented_lines.append(' ' * spaces + line)
-        else:
-            # Keep empty lines
-            indented_lines.append('')
-    
-    return '\n'.join(indented_lines)
-
-def submit_slurm_job(script_path):
-    """
-    Submit a job to SLURM and return the job ID.
-    """
-    result = subprocess.run(["sbatch", script_path], capture_output=True, text=True)
-    if result.returncode == 0:
-        for line in result.stdout.splitlines():
-            if "Submitted batch job" in line:
-                return line.split()[-1]
-        return result.stdout.strip().split()[-1]
-    else:
-        raise RuntimeError(f"sbatch failed: {result.stderr}")
-
-def wait_for_job(job_id, timeout=300):
-    """
-    Wait for a SLURM job to complete, up to the specified timeout.
-    """
-    start = time.time()
-    while time.time() - start < timeout:
-        status = subprocess.run([
-            "squeue", "-j", job_id, "--noheader"
-        ], capture_output=True, text=True)
-        if not status.stdout.strip():
-            return True
-        time.sleep(3)
-    return False
 
 def extract_execution_time(output):
     """
-    Extract execution time from the benchmark output.
+    Extract the median execution time from the benchmark output.
     """
-    # Look for the TOTAL EXECUTION TIME line in the output
-    pattern = r"TOTAL (CPU|GPU) EXECUTION TIME: (\d+\.\d+) seconds"
-    match = re.search(pattern, output)
+    stats = parse_result(output)
+    if stats:
+        return stats["summary"]["median"]
+    # Output of a job that did not write the result line (e.g. an older script)
+    match = re.search(r"(?:TOTAL|MEDIAN) (CPU|GPU) EXECUTION TIME: (\d+\.\d+) seconds", output)
     if match:
         return float(match.group(2))
     return None
@@ -231,9 +125,45 @@ def check_job_success(output):
     # Look for success marker
     return "✅" in output and "completed successfully" in output
 
-def run_benchmark(cpu_code, gpu_code, output_dir):
+def read_job_result(out_path, err_path, label):
     """
-    Run CPU and GPU benchmarks using SLURM and return the results.
+    Build the result of one benchmark job from its output files.
+    """
+    out_text = out_path.read_text() if out_path.exists() else ""
+    
+    # Log errors but don't include in the result
+    if err_path.exists() and err_path.read_text().strip():
+        print(f"{label} Error log: {err_path}")
+    
+    # Extract timing information and check job success
+    stats = parse_result(out_text)
+    exec_time = extract_execution_time(out_text)
+    success = check_job_success(out_text)
+    
+    if exec_time is not None:
+        out_text += f"\nExecution time: {exec_time:.6f} seconds"
+    else:
+        out_text += "\nFailed to extract execution time"
+    
+    return {
+        "stdout": out_text,
+        "stderr": "",
+        "success": success,
+        "time": exec_time,
+        "stats": stats  # bench_stats.measure() result, None if the job wrote none
+    }
+
+def run_benchmark_iter(cpu_code, gpu_code, output_dir, executor=None, pool=None):
+    """
+    Run CPU and GPU benchmarks, yielding the results as each job finishes.
+    
+    Both jobs are waited on together, so the total wait is the slower job rather than
+    the sum. The first result has only the finished side filled in (the other is None);
+    the last one has both.
+    
+    The jobs run on executor, by default the EXECUTION_BACKEND one (SLURM or local
+    subprocesses). When a warm worker pool is given and one of its workers is serving,
+    both scripts run on it instead.
     """
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
@@ -244,8 +174,6 @@ def run_benchmark(cpu_code, gpu_code, output_dir):
     # Define file paths
     cpu_py = Path(output_dir) / f"cpu_{timestamp}.py"
     gpu_py = Path(output_dir) / f"gpu_{timestamp}.py"
-    cpu_sh = Path(output_dir) / f"cpu_{timestamp}.sh"
-    gpu_sh = Path(output_dir) / f"gpu_{timestamp}.sh"
     cpu_out = Path(output_dir) / f"cpu_{timestamp}.out"
     cpu_err = Path(output_dir) / f"cpu_{timestamp}.err"
     gpu_out = Path(output_dir) / f"gpu_{timestamp}.out"
@@ -259,119 +187,69 @@ def run_benchmark(cpu_code, gpu_code, output_dir):
     cpu_py.write_text(cpu_code_with_timing)
     gpu_py.write_text(gpu_code_with_timing)
 
-    # Create SLURM job scripts
-    cpu_sh.write_text(f'''#!/bin/bash
-#SBATCH -N 1
-#SBATCH -c 4
-#SBATCH -t 0-00:05:00
-#SBATCH -p general
-#SBATCH -q public
-#SBATCH -o {cpu_out}
-#SBATCH -e {cpu_err}
-#SBATCH --export=NONE
-
-module load mamba/latest
-source activate scicomp24.11
-cd {output_dir}
-python {cpu_py.name}
-''')
-
-    gpu_sh.write_text(f'''#!/bin/bash
-#SBATCH -N 1
-#SBATCH -c 4
-#SBATCH -t 0-00:05:00
-#SBATCH -p general
-#SBATCH -q public
-#SBATCH -G 1
-#SBATCH -o {gpu_out}
-#SBATCH -e {gpu_err}
-#SBATCH --export=NONE
-
-module load mamba/latest
-CUDA_MODULES=$(module avail cuda 2>&1 | grep -E "cuda-[0-9]+\\.[0-9]+\\.[0-9]+-gcc" | grep -v "ont-guppy" | sort -V)
-if [ -z "$CUDA_MODULES" ]; then echo "No CUDA modules found!"; exit 1; fi
-LATEST_CUDA=$(echo "$CUDA_MODULES" | tail -1 | awk '{{print $1}}')
-module load $LATEST_CUDA
-source activate rapids25.02
-cd {output_dir}
-python {gpu_py.name}
-''')
-
-    # Make shell scripts executable
-    os.chmod(cpu_sh, 0o755)
-    os.chmod(gpu_sh, 0o755)
-    
-    # Submit jobs
+    jobs = {}  # job id -> "cpu" / "gpu"
+    outputs = {"cpu": (cpu_out, cpu_err, "CPU"), "gpu": (gpu_out, gpu_err, "GPU")}
+    result = {"cpu": None, "gpu": None}
+    
+    if pool is not None:
+        # Queue a worker allocation for the next benchmark if none is queued or running;
+        # best-effort, so a failed worker submission does not stop this benchmark
+        try:
+            pool.start()
+            if pool.is_ready():
+                executor = pool
+        except Exception as e:
+            print(f"⚠️ Could not start warm worker, running this benchmark without it: {e}")
+
+    # Submit jobs; a failed submission of one side does not stop the other
     try:
-        cpu_jobid = submit_slurm_job(str(cpu_sh))
-        print(f"Submitted CPU job with ID: {cpu_jobid}")
-        
-        gpu_jobid = submit_slurm_job(str(gpu_sh))
-        print(f"Submitted GPU job with ID: {gpu_jobid}")
-        
-        # Wait for jobs to complete
-        print("Waiting for CPU job to complete...")
-        cpu_done = wait_for_job(cpu_jobid)
-        print(f"CPU job {'completed' if cpu_done else 'timed out'}")
-        
-        print("Waiting for GPU job to complete...")
-        gpu_done = wait_for_job(gpu_jobid)
-        print(f"GPU job {'completed' if gpu_done else 'timed out'}")
-        
+        executor = executor or get_executor()
+        for side, script in (("cpu", cpu_py), ("gpu", gpu_py)):
+            out_path, err_path, label = outputs[side]
+            try:
+                job_id = executor.submit(script, out_path, err_path, kind=side, timeout=SLURM_JOB_TIMEOUT)
+            except Exception as e:
+                print(f"Error submitting {label} job: {e}")
+                continue
+            print(f"Submitted {label} job with ID: {job_id} ({executor.name})")
+            jobs[job_id] = side
     except Exception as e:
-        print(f"Error submitting or waiting for jobs: {e}")
-    
-    # Read outputs
-    cpu_out_text = cpu_out.read_text() if cpu_out.exists() else ""
-    gpu_out_text = gpu_out.read_text() if gpu_out.exists() else ""
-    
-    # Log errors but don't include in the result
-    if cpu_err.exists() and cpu_err.read_text().strip():
-        print(f"CPU Error log: {cpu_err}")
-    
-    if gpu_err.exists() and gpu_err.read_text().strip():
-        print(f"GPU Error log: {gpu_err}")
-    
-    # Extract timing information
-    cpu_time = extract_execution_time(cpu_out_text)
-    gpu_time = extract_execution_time(gpu_out_text)
-    
-    # Check job success
-    cpu_success = check_job_success(cpu_out_text)
-    gpu_success = check_job_success(gpu_out_text)
-    
-    # Format the results
-    if cpu_time is not None:
-        cpu_out_text += f"\nExecution time: {cpu_time:.6f} seconds"
-    else:
-        cpu_out_text += "\nFailed to extract execution time"
-    
-    if gpu_time is not None:
-        gpu_out_text += f"\nExecution time: {gpu_time:.6f} seconds"
-    else:
-        gpu_out_text += "\nFailed to extract execution time"
-    
-    return {
-        "cpu": {
-            "stdout": cpu_out_text, 
-            "stderr": "",
-            "success": cpu_success,
-            "time": cpu_time
-        },
-        "gpu": {
-            "stdout": gpu_out_text, 
-            "stderr": "",
-            "success": gpu_success,
-            "time": gpu_time
-        }
-    }
+        print(f"Error setting up the execution backend: {e}")
+    
+    # Wait on whatever was submitted, reporting each job as soon as it lands
+    if jobs:
+        try:
+            print(f"Waiting for {' and '.join(side.upper() for side in jobs.values())} jobs to complete...")
+            for job in executor.as_completed(jobs, SLURM_JOB_TIMEOUT):
+                side = jobs[job["job_id"]]
+                print(f"{side.upper()} job {'completed' if job['done'] else 'timed out'} after {job['seconds']:.1f}s")
+                result[side] = read_job_result(*outputs[side])
+                if None in result.values():
+                    yield dict(result)
+        except Exception as e:
+            print(f"Error waiting for jobs: {e}")
+    
+    # Whatever did not finish (e.g. a failed submission) is read as it stands
+    for side, paths in outputs.items():
+        if result[side] is None:
+            result[side] = read_job_result(*paths)
+    yield result
+
+def run_benchmark(cpu_code, gpu_code, output_dir):
+    """
+    Run CPU and GPU benchmarks on the configured execution backend and return the results.
+    """
+    for result in run_benchmark_iter(cpu_code, gpu_code, output_dir):
+        pass
+    return result
 
 def format_execution_result(result):
     """
     Format the execution results for display in the UI.
     """
-    cpu_result = result.get("cpu", {})
-    gpu_result = result.get("gpu", {})
+    # A side is None while its job is still running
+    cpu_result = result.get("cpu") or {}
+    gpu_result = result.get("gpu") or {}
     
     cpu_success = cpu_result.get("success", False)
     gpu_success = gpu_result.get("success", False)
@@ -387,23 +265,32 @@ def format_execution_result(result):
     gpu_status = "Success" if gpu_success else "Failed"
     gpu_output = gpu_result.get("stdout", "")
     
-    # Calculate speedup if both runs were successful
+    # Calculate speedup if both runs were successful, with a bootstrap interval when both have samples
     speedup = None
-    if cpu_time is not None and gpu_time is not None and cpu_time > 0 and gpu_success and cpu_success:
+    speedup_interval = None
+    if cpu_time is not None and gpu_time is not None and gpu_time > 0 and gpu_success and cpu_success:
         speedup = cpu_time / gpu_time
+        cpu_stats = cpu_result.get("stats")
+        gpu_stats = gpu_result.get("stats")
+        if cpu_stats and gpu_stats and min(gpu_stats["samples"]) > 0:
+            speedup_interval = speedup_ci(cpu_stats["samples"], gpu_stats["samples"],
+                                          confidence=BENCH_CONFIDENCE, resamples=BENCH_BOOTSTRAP_RESAMPLES)
     
     formatted_result = {
         "cpu": {
             "status": cpu_status,
             "output": cpu_output,
-            "execution_time": cpu_time
+            "execution_time": cpu_time,
+            "stats": cpu_result.get("stats")
         },
         "gpu": {
             "status": gpu_status,
             "output": gpu_output,
-            "execution_time": gpu_time
+            "execution_time": gpu_time,
+            "stats": gpu_result.get("stats")
         },
-        "speedup": speedup
+        "speedup": speedup,
+        "speedup_ci": speedup_interval  # {"speedup", "ci": [low, high], "confidence"} or None
     }
     
     return formatted_result
@@ -447,3 +334,6 @@ print(f"Result shape: {C_gpu.shape}")
     
     if formatted["speedup"] is not None:
         print(f"\nGPU Speedup: {formatted['speedup']:.2f}x")
+    if formatted["speedup_ci"] is not None:
+        low, high = formatted["speedup_ci"]["ci"]
+        print(f"{formatted['speedup_ci']['confidence']:.0%} CI: {low:.2f}x - {high:.2f}x")
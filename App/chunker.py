@@ -0,0 +1,158 @@
+import re
+import statistics
+from typing import List, Tuple, Callable, Dict, Any
+from langchain_text_splitters import TextSplitter, RecursiveCharacterTextSplitter
+
+# Notebook cells as rendered by NotebookLoader: "'code' cell: '[...]'\n with output: '...'\n\n"
+CELL_MARKER = re.compile(r"(?='(?:code|markdown|raw)' cell: )")
+HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+HEADING_CELL = re.compile(r"'markdown' cell: '\[?'?#{1,6}\s")
+CODE_FENCE = re.compile(r"^```.*?^```[ \t]*$", re.MULTILINE | re.DOTALL)
+
+def get_token_counter() -> Callable[[str], int]:
+    """Count tokens with tiktoken (same encoding as the recursive splitter), else estimate."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("gpt2")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: max(1, len(text) // 4)
+
+class StructureAwareSplitter(TextSplitter):
+    """Token-aware splitter that cuts on notebook cell and markdown heading boundaries.
+
+    Whole cells, paragraphs and fenced code blocks are packed greedily into chunks of up
+    to chunk_size tokens. A heading always starts a new chunk, code blocks are never cut
+    unless they exceed max_code_block_tokens, and up to chunk_overlap tokens of trailing
+    prose are repeated at the start of the next chunk.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, max_code_block_tokens: int = None,
+                 length_function: Callable[[str], int] = None, **kwargs):
+        length_function = length_function or get_token_counter()
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                         length_function=length_function, **kwargs)
+        self.max_code_block_tokens = max_code_block_tokens or chunk_size
+        self._fallback = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=0, length_function=length_function,
+            separators=["\n\n", "\n", "', '", ". ", " ", ""]
+        )
+
+    def _blocks(self, text: str) -> List[Tuple[str, str]]:
+        """Break text into (kind, block) pairs; kind is "heading", "code" or "prose"."""
+        blocks = []
+        for segment in CELL_MARKER.split(text):
+            segment = segment.strip()
+            if not segment:
+                continue
+            if segment.startswith("'code' cell:"):
+                blocks.append(("code", segment))
+            elif HEADING_CELL.match(segment):
+                blocks.append(("heading", segment))
+            elif segment.startswith("'"):
+                blocks.append(("prose", segment))
+            else:
+                blocks.extend(self._markdown_blocks(segment))
+        return blocks
+
+    def _markdown_blocks(self, text: str) -> List[Tuple[str, str]]:
+        blocks = []
+        position = 0
+        for fence in CODE_FENCE.finditer(text):
+            blocks.extend(self._prose_blocks(text[position:fence.start()]))
+            blocks.append(("code", fence.group(0)))
+            position = fence.end()
+        blocks.extend(self._prose_blocks(text[position:]))
+        return blocks
+
+    def _prose_blocks(self, text: str) -> List[Tuple[str, str]]:
+        blocks = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if HEADING.match(paragraph):
+                # Keep the heading attached to the text that directly follows it
+                blocks.append(("heading", paragraph))
+            else:
+                blocks.append(("prose", paragraph))
+        return blocks
+
+    def split_text(self, text: str) -> List[str]:
+        chunks = []
+        current = []  # (kind, block, tokens)
+
+        def flush(keep_overlap: bool):
+            nonlocal current
+            if not current:
+                return
+            chunks.append("\n\n".join(block for _, block, _ in current))
+            carried, carried_tokens = [], 0
+            if keep_overlap and self._chunk_overlap > 0:
+                # Repeat trailing prose (never code) so context flows into the next chunk
+                for kind, block, tokens in reversed(current):
+                    if kind == "code" or carried_tokens + tokens > self._chunk_overlap:
+                        break
+                    carried.insert(0, (kind, block, tokens))
+                    carried_tokens += tokens
+            current = carried
+
+        for kind, block in self._blocks(text):
+            tokens = self._length_function(block)
+            if kind == "heading":
+                flush(keep_overlap=False)
+
+            limit = self.max_code_block_tokens if kind == "code" else self._chunk_size
+            if tokens > self._chunk_size:
+                flush(keep_overlap=False)
+                if tokens <= limit:
+                    chunks.append(block)
+                else:
+                    chunks.extend(self._fallback.split_text(block))
+                continue
+
+            if sum(item[2] for item in current) + tokens > self._chunk_size:
+                flush(keep_overlap=True)
+                # Drop the carried overlap if it would push this block over the limit
+                if sum(item[2] for item in current) + tokens > self._chunk_size:
+                    current = []
+            current.append((kind, block, tokens))
+
+        flush(keep_overlap=False)
+        return chunks
+
+def chunk_size_report(token_counts: List[int]) -> Dict[str, Any]:
+    """Summarize the chunk size distribution (in tokens)."""
+    if not token_counts:
+        return {"chunks": 0, "total_tokens": 0}
+    ordered = sorted(token_counts)
+    report = {
+        "chunks": len(ordered),
+        "total_tokens": sum(ordered),
+        "min": ordered[0],
+        "mean": statistics.mean(ordered),
+        "median": statistics.median(ordered),
+        "p90": ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))],
+        "max": ordered[-1],
+    }
+    # Power-of-two buckets, e.g. "64-127": number of chunks in that token range
+    histogram = {}
+    for count in ordered:
+        low = 1 << max(0, count.bit_length() - 1)
+        label = f"{low}-{2 * low - 1}"
+        histogram[label] = histogram.get(label, 0) + 1
+    report["histogram"] = histogram
+    return report
+
+def format_chunk_report(report: Dict[str, Any]) -> str:
+    """Format a chunk_size_report for the console."""
+    if not report.get("chunks"):
+        return "📐 Chunk sizes: no chunks"
+    lines = [
+        f"📐 Chunk sizes ({report['chunks']} chunks, {report['total_tokens']} tokens): "
+        f"min {report['min']}, median {report['median']:.0f}, mean {report['mean']:.1f}, "
+        f"p90 {report['p90']}, max {report['max']}"
+    ]
+    for label, count in report["histogram"].items():
+        lines.append(f"  • {label:>11} tokens: {count}")
+    return "\n".join(lines)
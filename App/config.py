@@ -3,30 +3,144 @@
 # LLM Configuration
 OLLAMA_PORT = 11434  # Configurable Ollama port - change this to match your Ollama server port
 OLLAMA_BASE_URL = f"http://localhost:{OLLAMA_PORT}/"  # Updated to use configurable port
+OLLAMA_ENDPOINTS = []  # Ollama servers to spread requests over, e.g. ["http://gpu-node-1:11434/", "http://gpu-node-2:11434/"]; empty uses this node's server
+OLLAMA_LOAD_BALANCING = "least_busy"  # "least_busy" (fewest in-flight requests) or "round_robin"
+OLLAMA_MAX_CONNECTIONS = 16  # Keep-alive HTTP connections per Ollama server, shared by all models on it
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps a model in memory after each request (-1 = until the server stops)
+WARM_UP_MODELS = True  # Load the chat and code models in the background at startup
 
 # Model Configuration - Using different models for different tasks
 CHAT_MODEL = "qwen2.5-coder:14b"  # General chat and RAG responses
 CODE_MODEL = "qwen2.5-coder:14b"  # Code analysis and optimization
 LLM_TEMPERATURE = 0
+SINGLE_PASS_CODE_ANALYSIS = True  # One structured generation returns analysis and optimized code for a code submission
+CONVERSATION_TOKEN_BUDGET = 1500  # Maximum tokens of conversation history added to a prompt
+CONVERSATION_SUMMARY_TOKENS = 300  # Part of the budget for the rolling summary of turns that no longer fit
+CONVERSATION_MAX_TURNS = 10  # Most recent exchanges kept verbatim when they fit in the budget
+SESSION_MAX_COUNT = 500  # Chat sessions whose conversation is kept; least recently used are dropped beyond this
+SESSION_IDLE_TIMEOUT = 3600  # Seconds without a message before a session's conversation is dropped
+SESSION_STORE_MAX_TOKENS = 2000000  # Total conversation tokens kept across all sessions
+STREAM_RESPONSES = True  # Stream LLM tokens into the chat and code analysis views as they are generated
+
+# LLM Response Cache
+LLM_CACHE_ENABLED = True  # Reuse responses for identical prompts (model, endpoint, temperature, prompt)
+LLM_CACHE_PATH = "./output/llm_cache.sqlite3"  # SQLite file holding cached responses
+LLM_CACHE_MAX_ENTRIES = 2000  # Least recently used responses are evicted beyond this
+
+# Model Health Monitoring
+MODEL_HEALTH_CHECKS = True  # Probe Ollama's /api/tags in the background instead of test prompts before requests
+MODEL_HEALTH_INTERVAL = 15  # Seconds between background probes
+MODEL_HEALTH_TIMEOUT = 2  # Seconds before a probe counts as failed
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive connection failures that open the circuit (requests then fail fast)
+CIRCUIT_RESET_TIMEOUT = 30  # Seconds an open circuit waits before letting a trial request through
 
 # Embedding Model
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64  # Chunks embedded per batch on a cache miss
+EMBEDDING_CACHE_DIRECTORY = "./output/embedding_cache"  # Vectors keyed by (model, chunk text hash)
 
 # Application Settings
 DEFAULT_PORT = 7860
 DEFAULT_HOST = "0.0.0.0"
+ASYNC_HANDLERS = True  # Run chat and analysis handlers as coroutines so waiting on Ollama holds no worker thread
+GRADIO_CONCURRENCY_LIMIT = 32  # Concurrent requests per event handler
 
 # Code Execution Settings
 MAX_EXECUTION_TIME = 30  # seconds
 MAX_OUTPUT_LENGTH = 10000  # characters
 
+# SLURM Job Monitoring
+SLURM_POLL_INTERVAL = 2  # Seconds before the first batched sacct/squeue query; reset when a job is added or finishes
+SLURM_POLL_MAX_INTERVAL = 30  # Longest gap between scheduler queries while no job finishes
+SLURM_POLL_BACKOFF = 1.5  # Factor the query gap grows by after each query that finds nothing finished
+SLURM_OUTPUT_CHECK_INTERVAL = 1  # Seconds between size checks of job .out files (inotify wakes earlier on local disks)
+SLURM_USE_INOTIFY = True  # Watch job output directories with Linux inotify when available
+SLURM_JOB_TIMEOUT = 300  # Seconds to wait for a benchmark job before giving up on it
+
+# Benchmark Statistics
+BENCH_WARMUP_RUNS = 2  # Untimed runs after the first (output-capturing) run, so caches, imports and GPU kernels are warm
+BENCH_MIN_ITERATIONS = 5  # Timed runs before the stopping rule is first checked
+BENCH_MAX_ITERATIONS = 50  # Most timed runs per benchmark
+BENCH_TARGET_RELATIVE_CI = 0.05  # Stop once the median's confidence interval is narrower than this fraction of the median
+BENCH_TIME_BUDGET = 60  # Seconds of timed runs after which a benchmark stops even if the interval is still wide
+BENCH_CONFIDENCE = 0.95  # Confidence level of reported intervals
+BENCH_BOOTSTRAP_RESAMPLES = 2000  # Bootstrap resamples for reported intervals (stopping checks use fewer)
+
+# Execution Backend
+EXECUTION_BACKEND = "slurm"  # "slurm" (sbatch jobs on Sol), "local" (subprocesses on this host) or "auto" (local when sbatch is missing)
+BENCHMARK_CPUS = 4  # Cores of a benchmark job (sbatch -c; warm worker tasks are pinned to this many)
+BENCHMARK_OUTPUT_DIR = "./output"  # Benchmark scripts and job output; must be on a filesystem shared with the compute nodes for SLURM
+SLURM_PARTITION = "general"  # sbatch -p
+SLURM_QOS = "public"  # sbatch -q
+SLURM_CPU_SETUP = [  # Shell lines run before a CPU job's script
+    "module load mamba/latest",
+    "source activate scicomp24.11",
+]
+SLURM_GPU_SETUP = [  # Shell lines run before a GPU job's script: newest CUDA toolkit module and the RAPIDS environment
+    "module load mamba/latest",
+    r'CUDA_MODULES=$(module avail cuda 2>&1 | grep -E "cuda-[0-9]+\.[0-9]+\.[0-9]+-gcc" | grep -v "ont-guppy" | sort -V)',
+    'if [ -z "$CUDA_MODULES" ]; then echo "No CUDA modules found!"; exit 1; fi',
+    "LATEST_CUDA=$(echo \"$CUDA_MODULES\" | tail -1 | awk '{print $1}')",
+    "module load $LATEST_CUDA",
+    "source activate rapids25.02",
+]
+LOCAL_MAX_CONCURRENT_JOBS = 2  # Local job processes run at once; further jobs wait for a free slot
+LOCAL_CPUS_PER_JOB = 4  # Cores each local job is pinned to, so concurrent benchmarks do not share cores
+LOCAL_MEMORY_LIMIT_MB = 8192  # Address-space limit of local CPU jobs (0 = unlimited; not applied to GPU jobs)
+LOCAL_PYTHON = None  # Interpreter for local jobs; None uses the one running the app
+
+# Warm Benchmark Workers
+WARM_WORKER_ENABLED = False  # Run benchmarks on a long-lived GPU job instead of submitting one sbatch job per benchmark
+WARM_WORKER_QUEUE_DIR = "./output/warm_worker"  # Task queue directory; must be on a filesystem shared with the compute nodes
+WARM_WORKER_COUNT = 1  # Worker jobs kept queued or running
+WARM_WORKER_SLOTS = 1  # Tasks a worker runs at once; 1 runs a benchmark's CPU and GPU halves one after another so neither skews the other's timing
+WARM_WORKER_TIME_LIMIT = "0-04:00:00"  # SLURM time limit of a worker job
+WARM_WORKER_IDLE_TIMEOUT = 1800  # Seconds without tasks before a worker exits and releases its allocation
+WARM_WORKER_POLL_INTERVAL = 0.25  # Seconds between queue scans by the worker and result checks by the app
+WARM_WORKER_HEARTBEAT_TIMEOUT = 30  # A worker whose heartbeat is older than this is treated as gone
+WARM_WORKER_PRELOAD = ["numpy", "pandas", "cupy"]  # Imported once by the worker's fork server; missing modules are skipped
+
 # Document Processing
-CHUNK_SIZE = 100
-CHUNK_OVERLAP = 50
+CHUNKING_MODE = "structure"  # "structure" (cell/heading/code-block aware) or "recursive" (plain token splitter)
+CHUNK_SIZE = 256  # tokens per chunk
+CHUNK_OVERLAP = 32  # tokens of trailing prose repeated in the next chunk
+MAX_CODE_BLOCK_TOKENS = 768  # code blocks up to this size are kept whole in one chunk
+
+# Web Source Fetching
+WEB_FETCH_MAX_WORKERS = 16  # Concurrent downloads of knowledge URLs
+WEB_FETCH_PER_HOST_LIMIT = 4  # Concurrent requests to any single host
+WEB_FETCH_TIMEOUT = 15  # seconds
+WEB_CACHE_DIRECTORY = "./output/web_cache"  # On-disk HTTP cache revalidated with ETag / Last-Modified
+
+# Notebook Parsing
+NOTEBOOK_PARSE_WORKERS = 4  # Processes used to parse notebooks in parallel (1 parses in-process)
+NOTEBOOK_PARSE_CACHE_DIRECTORY = "./output/notebook_cache"  # Parsed notebooks keyed on file hash
 
 # Vector Store Configuration
 USE_PERSISTENT_VECTORSTORE = True  # Set to False to use in-memory
 VECTORSTORE_PERSIST_DIRECTORY = "./output/vectorstore_data"  # Directory for persistent vector storage
+VECTORSTORE_BACKEND = "chroma"  # Persistent backend: "chroma" or "numpy" (memory-mapped NumPy index)
+INGESTION_MANIFEST_FILE = "ingestion_manifest.json"  # Per-source content hashes, kept inside the persist directory
+INDEX_VERSION_FILE = "index_version.json"  # Embedding model / chunking stamp the index was built with
+REFRESH_KNOWLEDGE_ON_STARTUP = False  # Re-check knowledge sources even when the persistent store is current
+ANN_INDEX = "none"  # "ivf" adds an approximate nearest-neighbour index to the NumPy store
+ANN_MIN_VECTORS = 50000  # Below this many chunks the exact NumPy scan is used
+IVF_NLIST = None  # Number of IVF clusters; None picks about 4 * sqrt(chunks)
+IVF_NPROBE = 16  # Clusters scanned per query; higher gives better recall and slower queries
+LEXICAL_INDEX_FILE = "lexical_index.json"  # BM25 inverted index, kept inside the persist directory
+
+# Retrieval Configuration
+USE_HYBRID_RETRIEVAL = True  # Fuse BM25 (exact API names) and embedding rankings
+RETRIEVER_K = 3  # Chunks passed to the LLM per retrieval
+HYBRID_CANDIDATES = 20  # Candidates taken from each ranking before fusion
+RRF_K = 60  # Reciprocal rank fusion constant; larger values flatten rank differences
+QUERY_CACHE_SIZE = 256  # Cached retrieval results for repeated queries (0 disables the cache)
+QUERY_CACHE_TTL = 3600  # Seconds before a cached retrieval result expires
+QUERY_CACHE_SEMANTIC_THRESHOLD = None  # e.g. 0.95: reuse results of near-duplicate queries (None disables)
+
+# Query Routing
+QUERY_ROUTER_EMBEDDINGS = False  # Route questions no rule matches by embedding similarity to labeled exemplars
+QUERY_ROUTER_EMBEDDING_THRESHOLD = 0.5  # Minimum cosine similarity to the nearest route's exemplars
 
 # External URLs for GPU acceleration knowledge
 KNOWLEDGE_URLS = [
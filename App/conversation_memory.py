@@ -0,0 +1,290 @@
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable
+from chunker import get_token_counter
+from config import (CONVERSATION_TOKEN_BUDGET, CONVERSATION_SUMMARY_TOKENS,
+                    CONVERSATION_MAX_TURNS, SESSION_MAX_COUNT, SESSION_IDLE_TIMEOUT,
+                    SESSION_STORE_MAX_TOKENS)
+
+class ConversationMemory:
+    """Token-budgeted conversation history: recent turns verbatim, older turns summarized.
+
+    The prompt context never exceeds token_budget tokens. Exchanges are kept verbatim,
+    newest first, in whatever the rolling summary (capped at summary_tokens) leaves free.
+    Exchanges that no longer fit are handed to summarize(previous_summary, exchanges) on a
+    background thread, so the request that evicts them never waits for the LLM; until the
+    new summary arrives their questions stand in for it.
+    """
+
+    def __init__(self, summarize: Callable[[str, List[Dict[str, str]]], str] = None,
+                 token_budget: int = CONVERSATION_TOKEN_BUDGET,
+                 summary_tokens: int = CONVERSATION_SUMMARY_TOKENS,
+                 max_turns: int = CONVERSATION_MAX_TURNS,
+                 token_counter: Callable[[str], int] = None, executor: ThreadPoolExecutor = None):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.max_turns = max_turns
+        self.count_tokens = token_counter or get_token_counter()
+        self.exchanges = []  # Verbatim exchanges, oldest first, each with its token count
+        self.summary = ""
+        self.summary_token_count = 0
+        self.pending = []  # Evicted exchanges waiting for the summarizer
+        self.last_context_tokens = 0  # Tokens in the context most recently returned by context()
+        self.last_request_usage = None  # LLM calls and tokens of the session's latest request, filled in by the RAG agent
+        self._generation = 0  # Bumped by clear() so a late summary of old turns is dropped
+        self._lock = threading.Lock()
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+        self._summarizing = None  # Future of the running summarizer, None when idle
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.exchanges) + len(self.pending) + (1 if self.summary else 0)
+
+    def clear(self):
+        with self._lock:
+            self.exchanges = []
+            self.pending = []
+            self._set_summary("")
+            self.last_context_tokens = 0
+            self._generation += 1
+
+    def add(self, user_message: str, assistant_response: str):
+        """Remember an exchange; evict the oldest ones to the summarizer once over budget."""
+        exchange = {
+            "user": user_message,
+            "assistant": assistant_response,
+            "timestamp": datetime.now().isoformat(),
+            "tokens": self.count_tokens(self._format_exchange(user_message, assistant_response)),
+        }
+        with self._lock:
+            self.exchanges.append(exchange)
+            verbatim_budget = self.token_budget - self.summary_tokens
+            evicted = []
+            # The newest exchange always stays; context() truncates it if it alone is too long
+            while len(self.exchanges) > 1 and (
+                    len(self.exchanges) > self.max_turns
+                    or sum(item["tokens"] for item in self.exchanges) > verbatim_budget):
+                evicted.append(self.exchanges.pop(0))
+            self.pending.extend(evicted)
+        if evicted:
+            self._schedule_summary()
+
+    def _schedule_summary(self):
+        with self._lock:
+            if not self.summarize:
+                self._set_summary(self._fallback_summary(self.summary, self.pending))
+                self.pending = []
+                return
+            if self._summarizing:
+                return  # The running summarizer picks up the new pending exchanges before it exits
+            self._summarizing = self._executor.submit(self._summarize_pending)
+
+    def _summarize_pending(self):
+        while True:
+            with self._lock:
+                if not self.pending:
+                    self._summarizing = None
+                    return
+                batch, summary, generation = list(self.pending), self.summary, self._generation
+            try:
+                new_summary = self.summarize(summary, batch).strip()
+            except Exception as e:
+                print(f"⚠️ Conversation summary failed, keeping earlier questions only: {e}")
+                new_summary = self._fallback_summary(summary, batch)
+            with self._lock:
+                if generation != self._generation:
+                    continue  # clear() dropped these exchanges; summarize whatever came after
+                self._set_summary(self._truncate(new_summary, self.summary_tokens))
+                self.pending = self.pending[len(batch):]
+
+    def _set_summary(self, summary: str):
+        self.summary = summary
+        self.summary_token_count = self.count_tokens(summary) if summary else 0
+
+    def _fallback_summary(self, summary: str, exchanges: List[Dict[str, str]]) -> str:
+        """Stand-in summary from the earlier questions, used without an LLM summary.
+
+        The oldest lines are dropped first to keep it within summary_tokens.
+        """
+        lines = summary.splitlines() if summary else []
+        lines += [f"The user asked: {exchange['user'].strip().splitlines()[0][:200]}"
+                  for exchange in exchanges if exchange["user"].strip()]
+        while len(lines) > 1 and self.count_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def wait_for_summary(self, timeout: float = None):
+        """Block until pending exchanges are summarized (for tests and benchmarks)."""
+        summarizing = self._summarizing
+        if summarizing:
+            summarizing.result(timeout=timeout)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens tokens, keeping its beginning."""
+        if max_tokens <= 0:
+            return ""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:middle] + " ...") <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + " ..."
+
+    @staticmethod
+    def _format_exchange(user_message: str, assistant_response: str) -> str:
+        return f"User: {user_message}\nAssistant: {assistant_response}"
+
+    def context(self) -> str:
+        """Formatted history for the next prompt, at most token_budget tokens."""
+        with self._lock:
+            exchanges = list(self.exchanges)
+            summary = self.summary
+            if self.pending:
+                summary = self._fallback_summary(summary, self.pending)
+        if not exchanges and not summary:
+            self.last_context_tokens = 0
+            return ""
+
+        header = "Previous conversation:"
+        remaining = self.token_budget - self.count_tokens(header)
+        summary_part = ""
+        if summary:
+            summary_part = f"Summary of earlier conversation: {self._truncate(summary, self.summary_tokens)}"
+            remaining -= self.count_tokens(summary_part) + 1
+
+        recent = []
+        for exchange in reversed(exchanges):
+            text = self._format_exchange(exchange["user"], exchange["assistant"])
+            tokens = exchange["tokens"] + 1  # Plus the "---" separator
+            if tokens > remaining:
+                if not recent:
+                    recent.append(self._truncate(text, remaining - 1))
+                break
+            recent.append(text)
+            remaining -= tokens
+
+        recent.reverse()
+        while True:
+            body = "\n---\n".join(([summary_part] if summary_part else []) + recent)
+            context = f"{header}\n{body}"
+            tokens = self.count_tokens(context)
+            # Token counts of the pieces are not exactly additive; drop turns until the whole fits
+            if tokens <= self.token_budget or len(recent) <= 1:
+                break
+            recent.pop(0)
+        self.last_context_tokens = tokens
+        return context
+
+    def stored_tokens(self) -> int:
+        """Tokens held by this memory: verbatim and pending exchanges plus the summary."""
+        with self._lock:
+            return sum(exchange["tokens"] for exchange in self.exchanges + self.pending) + self.summary_token_count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "verbatim_turns": len(self.exchanges),
+                "pending_summary_turns": len(self.pending),
+                "summary_tokens": self.summary_token_count,
+                "last_context_tokens": self.last_context_tokens,
+                "token_budget": self.token_budget,
+                "last_request": dict(self.last_request_usage) if self.last_request_usage else None,
+            }
+
+class SessionMemoryStore:
+    """One ConversationMemory per chat session, safe to use from concurrent handlers.
+
+    Sessions are kept in least recently used order. A session idle for idle_timeout seconds
+    is dropped, and the least recently used sessions are dropped while there are more than
+    max_sessions or together they hold more than max_tokens. All sessions share one
+    tokenizer and one background summarizer thread pool.
+    """
+
+    DEFAULT_SESSION = "default"  # Used when no session id is given (scripts, benchmarks)
+
+    def __init__(self, summarize: Callable[[str, List[Dict[str, str]]], str] = None,
+                 max_sessions: int = SESSION_MAX_COUNT, idle_timeout: float = SESSION_IDLE_TIMEOUT,
+                 max_tokens: int = SESSION_STORE_MAX_TOKENS, summary_workers: int = 2, **memory_options):
+        self.summarize = summarize
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_tokens = max_tokens
+        memory_options.setdefault("token_counter", get_token_counter())
+        self.memory_options = memory_options
+        self.evictions = 0
+        self._sessions = OrderedDict()  # session id -> (ConversationMemory, last used time), oldest first
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=summary_workers, thread_name_prefix="conversation-summary")
+
+    def get(self, session_id: str = None) -> ConversationMemory:
+        """The session's memory, created on first use; marks the session as recently used."""
+        session_id = session_id or self.DEFAULT_SESSION
+        with self._lock:
+            now = time.time()
+            if session_id in self._sessions:
+                memory = self._sessions[session_id][0]
+                self._sessions.move_to_end(session_id)
+            else:
+                memory = ConversationMemory(summarize=self.summarize, executor=self._executor,
+                                            **self.memory_options)
+            self._sessions[session_id] = (memory, now)
+            self._evict(now, keep=session_id)
+        return memory
+
+    def add(self, session_id: str, user_message: str, assistant_response: str):
+        """Remember an exchange in a session, then enforce the store's limits."""
+        session_id = session_id or self.DEFAULT_SESSION
+        self.get(session_id).add(user_message, assistant_response)
+        with self._lock:
+            self._evict(time.time(), keep=session_id)
+
+    def _evict(self, now: float, keep: str):
+        """Drop idle sessions, then least recently used ones beyond the limits (lock held)."""
+        evicted = []
+        while self._sessions:
+            oldest_id, (memory, last_used) = next(iter(self._sessions.items()))
+            if oldest_id == keep or now - last_used < self.idle_timeout:
+                break
+            evicted.append(self._sessions.pop(oldest_id)[0])
+        if len(self._sessions) > self.max_sessions or self.max_tokens:
+            stored = {session_id: memory.stored_tokens() for session_id, (memory, _) in self._sessions.items()}
+            total = sum(stored.values())
+            for session_id in list(self._sessions):
+                if session_id == keep:
+                    continue
+                if len(self._sessions) <= self.max_sessions and (not self.max_tokens or total <= self.max_tokens):
+                    break
+                total -= stored[session_id]
+                evicted.append(self._sessions.pop(session_id)[0])
+        for memory in evicted:
+            memory.clear()  # Also discards a summary still being generated for it
+        self.evictions += len(evicted)
+
+    def clear(self, session_id: str = None):
+        """Forget a session's conversation."""
+        with self._lock:
+            entry = self._sessions.pop(session_id or self.DEFAULT_SESSION, None)
+        if entry:
+            entry[0].clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            memories = [memory for memory, _ in self._sessions.values()]
+        return {
+            "sessions": len(memories),
+            "stored_tokens": sum(memory.stored_tokens() for memory in memories),
+            "evictions": self.evictions,
+            "max_sessions": self.max_sessions,
+        }
@@ -89,7 +89,7 @@ Provide ONLY a numbered list of 5 simple analysis tasks that could be performed
                 # Try to use the chat model directly for more reliable responses
                 if hasattr(self.rag_agent, 'chat_llm_model') and self.rag_agent.chat_llm_model:
                     from langchain_core.messages import HumanMessage
-                    response = self.rag_agent.chat_llm_model.invoke([HumanMessage(content=prompt)])
+                    response = self.rag_agent.invoke_llm([HumanMessage(content=prompt)])
                     response = response.content if hasattr(response, 'content') else str(response)
                 else:
                     response = self.rag_agent.query(prompt)
@@ -146,7 +146,7 @@ SOL ENVIRONMENT SPECIFICATIONS:
 - GPU memory pool available but must be managed properly
 
 IMPORTANT INSTRUCTIONS:
-- The script will run in the directory: /home/vpatel69/R1/App/output/
+- The script will run in the directory: {os.path.abspath('./output')}/
 - Load the dataset using: df = pd.read_csv('../datasets/{self.dataset_info['name']}')
 - Import ALL necessary libraries at the top (pandas, cudf, cuml, cupy, matplotlib, numpy, sklearn, etc.)
 - Write a complete analysis script with proper data loading, analysis, and visualization
@@ -1,40 +1,170 @@
 import os
 import glob
-from typing import List, Dict, Any, Tuple
-from langchain_community.document_loaders import WebBaseLoader, NotebookLoader
+import json
+import hashlib
+import shutil
+import time
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bs4 import BeautifulSoup
+from langchain_community.document_loaders import NotebookLoader
 from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.vectorstores import InMemoryVectorStore
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
-from config import (EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, 
-                   USE_PERSISTENT_VECTORSTORE, VECTORSTORE_PERSIST_DIRECTORY)
+from web_fetcher import WebFetcher
+from embedding_cache import CachedEmbeddings
+from numpy_vectorstore import NumpyVectorStore
+from hybrid_search import BM25Index, HybridRetriever
+from query_cache import QueryCache, CachedRetriever
+from chunker import StructureAwareSplitter, get_token_counter, chunk_size_report, format_chunk_report
+from config import (EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, CHUNKING_MODE, MAX_CODE_BLOCK_TOKENS,
+                   USE_PERSISTENT_VECTORSTORE, VECTORSTORE_PERSIST_DIRECTORY, VECTORSTORE_BACKEND,
+                   ANN_INDEX, ANN_MIN_VECTORS, IVF_NLIST, IVF_NPROBE,
+                   USE_HYBRID_RETRIEVAL, RETRIEVER_K, HYBRID_CANDIDATES, RRF_K, LEXICAL_INDEX_FILE,
+                   QUERY_CACHE_SIZE, QUERY_CACHE_TTL, QUERY_CACHE_SEMANTIC_THRESHOLD,
+                   INGESTION_MANIFEST_FILE, INDEX_VERSION_FILE,
+                   NOTEBOOK_PARSE_WORKERS, NOTEBOOK_PARSE_CACHE_DIRECTORY)
+
+# NotebookLoader settings; part of the parse cache key so changing them invalidates it
+NOTEBOOK_LOADER_SETTINGS = {"include_outputs": True, "max_output_length": 1000, "remove_newline": True}
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_file(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class IngestionManifest:
+    """Content-hash manifest of every knowledge source already in the vector store.
+    
+    Each entry maps a source (URL, notebook path or curated block name) to the hash
+    of the content that was embedded and the chunk ids it produced, so unchanged
+    sources can be skipped and stale chunks can be deleted when a source changes.
+    """
+    
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(VECTORSTORE_PERSIST_DIRECTORY, INGESTION_MANIFEST_FILE)
+        self.sources = {}
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f).get("sources", {})
+        except Exception as e:
+            print(f"⚠️ Could not read ingestion manifest, starting fresh: {e}")
+            self.sources = {}
+    
+    def save(self):
+        """Atomically write the manifest to disk."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"sources": self.sources}, f, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def clear(self):
+        self.sources = {}
+    
+    def get(self, source: str) -> Dict[str, Any]:
+        return self.sources.get(source, {})
+    
+    def is_current(self, source: str, content_hash: str) -> bool:
+        """Check whether a source was already ingested with this exact content."""
+        return self.get(source).get("hash") == content_hash
+    
+    def update(self, source: str, content_hash: str, chunk_ids: List[str], **extra):
+        self.sources[source] = {"hash": content_hash, "chunk_ids": chunk_ids, **extra}
+    
+    def remove(self, source: str):
+        self.sources.pop(source, None)
+
+def parse_notebook(nb_path: str) -> Tuple[List[Dict[str, Any]], float]:
+    """Parse one notebook into picklable document dicts; runs in a worker process."""
+    start_time = time.perf_counter()
+    nb_docs = NotebookLoader(nb_path, **NOTEBOOK_LOADER_SETTINGS).load()
+    parsed = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in nb_docs]
+    return parsed, time.perf_counter() - start_time
+
+class NotebookParseCache:
+    """On-disk cache of parsed notebooks keyed on the notebook file hash."""
+    
+    def __init__(self, cache_dir: str = NOTEBOOK_PARSE_CACHE_DIRECTORY):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._settings_hash = hash_text(json.dumps(NOTEBOOK_LOADER_SETTINGS, sort_keys=True))[:12]
+    
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}-{self._settings_hash}.json")
+    
+    def get(self, content_hash: str):
+        try:
+            with open(self._path(content_hash), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, content_hash: str, parsed: List[Dict[str, Any]]):
+        path = self._path(content_hash)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(parsed, f)
+        os.replace(tmp_path, path)
 
 class KnowledgeBaseStats:
     """Track statistics about the knowledge base."""
     def __init__(self):
         self.web_sources = 0
         self.web_sources_failed = 0
+        self.web_sources_not_modified = 0
+        self.web_fetch_time = 0.0
         self.notebooks = 0
         self.notebooks_failed = 0
+        self.notebooks_cached = 0
+        self.notebook_parse_times = {}  # notebook name -> parse seconds
         self.curated_content = 0
+        self.unchanged_sources = 0
+        self.removed_sources = 0
         self.total_documents = 0
         self.total_chunks = 0
+        self.chunk_token_counts = []
         self.failed_sources = []
         
     def add_failed_source(self, source: str, error: str):
         self.failed_sources.append({"source": source, "error": error})
         
+    def get_chunk_report(self) -> Dict[str, Any]:
+        """Chunk count and token size distribution, for tuning chunk size and overlap."""
+        return chunk_size_report(self.chunk_token_counts)
+        
     def get_summary(self) -> str:
         """Get a formatted summary of the knowledge base."""
         summary = f"""
 📊 Knowledge Base Summary:
-• Web Sources: {self.web_sources} loaded, {self.web_sources_failed} failed
-• Notebooks: {self.notebooks} loaded, {self.notebooks_failed} failed  
+• Web Sources: {self.web_sources} loaded ({self.web_sources_not_modified} not modified), {self.web_sources_failed} failed in {self.web_fetch_time:.1f}s
+• Notebooks: {self.notebooks} loaded ({self.notebooks_cached} from parse cache), {self.notebooks_failed} failed  
 • Curated Content: {self.curated_content} pieces
+• Unchanged (skipped): {self.unchanged_sources}, Removed: {self.removed_sources}
 • Total Documents: {self.total_documents}
 • Total Chunks: {self.total_chunks}
 """
+        if self.chunk_token_counts:
+            summary += format_chunk_report(self.get_chunk_report()) + "\n"
+        if self.notebook_parse_times:
+            slowest = sorted(self.notebook_parse_times.items(), key=lambda item: item[1], reverse=True)
+            summary += f"⏱️ Notebook parse times ({sum(self.notebook_parse_times.values()):.2f}s total):\n"
+            for name, seconds in slowest[:5]:
+                summary += f"  • {name}: {seconds:.2f}s\n"
         if self.failed_sources:
             summary += f"\n⚠️ Failed Sources ({len(self.failed_sources)}):\n"
             for fail in self.failed_sources[:3]:  # Show first 3 failures
@@ -44,33 +174,70 @@ class KnowledgeBaseStats:
         return summary
 
 class DocumentLoader:
-    """Enhanced document loader that uses centralized knowledge directory."""
+    """Enhanced document loader that uses centralized knowledge directory.
+    
+    When given an IngestionManifest, only sources whose content hash differs from
+    the manifest are returned, so unchanged sources are never split or embedded again.
+    """
     
-    def __init__(self, knowledge_dir: str = "./knowledge"):
+    def __init__(self, knowledge_dir: str = "./knowledge", manifest: IngestionManifest = None):
         self.knowledge_dir = knowledge_dir
+        self.manifest = manifest
         self.docs = []
         self.doc_splits = []
         self.stats = KnowledgeBaseStats()
+        # Incremental ingestion bookkeeping
+        self.seen_sources = set()
+        self.changed_sources = {}  # source -> {"hash": ..., extra manifest fields}
+        self.removed_sources = []
+        self.source_chunk_ids = {}
         
-    def load_documents(self) -> List[Document]:
-        """Load documents from centralized knowledge directory."""
+    def iter_documents(self) -> Iterator[Document]:
+        """Yield new or changed documents from the knowledge directory as they are loaded."""
         print(f"📚 Loading documents from knowledge directory: {self.knowledge_dir}")
-        docs = []
-        
-        # Load from sources.txt URLs
-        docs.extend(self._load_web_sources())
         
-        # Load notebooks from knowledge/python_notebooks
-        docs.extend(self._load_notebooks())
+        # Load from sources.txt URLs, then notebooks, then curated content
+        for doc in self._load_web_sources():
+            self.stats.total_documents += 1
+            yield doc
+        for doc in self._iter_notebooks():
+            self.stats.total_documents += 1
+            yield doc
+        for doc in self._load_curated_content():
+            self.stats.total_documents += 1
+            yield doc
         
-        # Add curated content
-        docs.extend(self._load_curated_content())
+        # Sources in the manifest that no longer exist must be dropped from the index
+        if self.manifest:
+            self.removed_sources = [s for s in self.manifest.sources if s not in self.seen_sources]
+            self.stats.removed_sources = len(self.removed_sources)
+    
+    def load_documents(self) -> List[Document]:
+        """Load new or changed documents from centralized knowledge directory."""
+        self.docs = list(self.iter_documents())
+        print(self.stats.get_summary())
+        return self.docs
+    
+    def load_and_split_documents(self) -> List[Document]:
+        """Stream documents into the splitter as they are loaded, without collecting them first."""
+        doc_splits = self.split_documents(self.iter_documents())
+        print(self.stats.get_summary())
+        return doc_splits
         
-        # Update stats
-        self.stats.total_documents = len(docs)
-        self.docs = docs
+    def _track_source(self, source: str, content_hash: str, docs: List[Document], **extra) -> List[Document]:
+        """Record a source's content hash and return its docs only if they need ingesting."""
+        self.seen_sources.add(source)
+        if self.manifest and self.manifest.is_current(source, content_hash):
+            self.stats.unchanged_sources += 1
+            if extra:
+                # Refresh cheap change markers (e.g. mtime) without re-ingesting
+                self.manifest.sources[source].update(extra)
+            return []
         
-        print(self.stats.get_summary())
+        for doc in docs:
+            doc.metadata["content_hash"] = content_hash
+            doc.metadata["ingest_source"] = source
+        self.changed_sources[source] = {"hash": content_hash, **extra}
         return docs
         
     def _load_web_sources(self) -> List[Document]:
@@ -85,19 +252,59 @@ class DocumentLoader:
         print(f"🌐 Loading web sources from {sources_file}")
         urls = self._parse_sources_file(sources_file)
         
-        for url in urls:
+        fetcher = WebFetcher()
+        start_time = time.perf_counter()
+        try:
+            results = fetcher.fetch_all(urls)
+        finally:
+            fetcher.close()
+        self.stats.web_fetch_time = time.perf_counter() - start_time
+        
+        for result in results:
+            url = result["url"]
+            # Keep the previously indexed chunks of a source that is temporarily unreachable,
+            # but let a page that answers 404 / 410 be pruned like a removed source
+            if not WebFetcher.is_gone(result["status"]):
+                self.seen_sources.add(url)
+            if not result["body"]:
+                error_msg = result["error"][:100] or f"HTTP {result['status']}"
+                self.stats.web_sources_failed += 1
+                self.stats.add_failed_source(url, error_msg)
+                print(f"⚠️ Could not load {url}: {error_msg}")
+                continue
+            
             try:
-                loaded_docs = WebBaseLoader(url).load()
-                docs.extend(loaded_docs)
+                loaded_docs = [self._html_to_document(url, result["body"], result["encoding"])]
+                content_hash = hash_text("\n".join(doc.page_content for doc in loaded_docs))
+                docs.extend(self._track_source(url, content_hash, loaded_docs))
                 self.stats.web_sources += 1
-                print(f"✅ Loaded web content from {url}")
+                if result["status"] == 304:
+                    self.stats.web_sources_not_modified += 1
+                    print(f"✅ Web content unchanged (304) for {url}")
+                elif result["error"]:
+                    print(f"⚠️ Using cached copy of {url}: {result['error'][:100]}")
+                else:
+                    print(f"✅ Loaded web content from {url}")
             except Exception as e:
                 error_msg = str(e)[:100]
                 self.stats.web_sources_failed += 1
                 self.stats.add_failed_source(url, error_msg)
-                print(f"⚠️ Could not load {url}: {error_msg}")
+                print(f"⚠️ Could not parse {url}: {error_msg}")
                 
         return docs
+    
+    def _html_to_document(self, url: str, body: bytes, encoding: str = None) -> Document:
+        """Convert a fetched HTML page into a Document (same fields as WebBaseLoader)."""
+        soup = BeautifulSoup(body, "html.parser", from_encoding=encoding)
+        metadata = {"source": url}
+        if soup.find("title"):
+            metadata["title"] = soup.find("title").get_text()
+        description = soup.find("meta", attrs={"name": "description"})
+        if description:
+            metadata["description"] = description.get("content", "No description found.")
+        if soup.find("html"):
+            metadata["language"] = soup.find("html").get("lang", "No language found.")
+        return Document(page_content=soup.get_text(), metadata=metadata)
         
     def _parse_sources_file(self, sources_file: str) -> List[str]:
         """Parse the sources.txt file to extract URLs."""
@@ -117,41 +324,94 @@ class DocumentLoader:
             
         return urls
         
-    def _load_notebooks(self) -> List[Document]:
-        """Load all notebooks from the knowledge/python_notebooks directory."""
+    def _iter_notebooks(self) -> Iterator[Document]:
+        """Yield documents from new or changed notebooks in knowledge/python_notebooks.
+        
+        Notebooks are parsed in a process pool and their documents are yielded as each
+        one finishes; parsed results are cached on disk keyed on the file hash.
+        """
         notebooks_dir = os.path.join(self.knowledge_dir, "python_notebooks")
-        docs = []
         
         if not os.path.exists(notebooks_dir):
             print(f"⚠️ Notebooks directory not found: {notebooks_dir}")
-            return docs
+            return
             
         print(f"📓 Loading notebooks from {notebooks_dir}")
         
         # Find all .ipynb files
         notebook_pattern = os.path.join(notebooks_dir, "*.ipynb")
-        notebook_files = glob.glob(notebook_pattern)
+        notebook_files = sorted(glob.glob(notebook_pattern))
+        parse_cache = NotebookParseCache()
+        to_parse = []
         
         for nb_path in notebook_files:
             try:
-                nb_loader = NotebookLoader(
-                    nb_path, 
-                    include_outputs=True, 
-                    max_output_length=1000,
-                    remove_newline=True
-                )
-                nb_docs = nb_loader.load()
-                docs.extend(nb_docs)
-                self.stats.notebooks += 1
-                nb_name = os.path.basename(nb_path)
-                print(f"✅ Loaded notebook: {nb_name}")
-            except Exception as e:
-                error_msg = str(e)[:100]
-                self.stats.notebooks_failed += 1
-                self.stats.add_failed_source(nb_path, error_msg)
-                print(f"⚠️ Could not load {os.path.basename(nb_path)}: {error_msg}")
+                # Cheap check first: identical mtime and size means the file was not touched
+                file_stat = os.stat(nb_path)
+                markers = {"mtime": file_stat.st_mtime, "size": file_stat.st_size}
+                entry = self.manifest.get(nb_path) if self.manifest else {}
+                if entry and entry.get("mtime") == markers["mtime"] and entry.get("size") == markers["size"]:
+                    self.seen_sources.add(nb_path)
+                    self.stats.unchanged_sources += 1
+                    continue
                 
-        return docs
+                content_hash = hash_file(nb_path)
+                if self.manifest and self.manifest.is_current(nb_path, content_hash):
+                    self._track_source(nb_path, content_hash, [], **markers)
+                    continue
+                
+                cached = parse_cache.get(content_hash)
+                if cached is not None:
+                    self.stats.notebooks_cached += 1
+                    yield from self._finish_notebook(nb_path, content_hash, markers, cached)
+                else:
+                    to_parse.append((nb_path, content_hash, markers))
+            except Exception as e:
+                self._notebook_failed(nb_path, e)
+        
+        if len(to_parse) > 1 and NOTEBOOK_PARSE_WORKERS > 1:
+            with ProcessPoolExecutor(max_workers=min(NOTEBOOK_PARSE_WORKERS, len(to_parse))) as executor:
+                futures = {executor.submit(parse_notebook, item[0]): item for item in to_parse}
+                for future in as_completed(futures):
+                    nb_path, content_hash, markers = futures[future]
+                    try:
+                        parsed, elapsed = future.result()
+                    except Exception as e:
+                        self._notebook_failed(nb_path, e)
+                        continue
+                    yield from self._record_parse(parse_cache, nb_path, content_hash, markers, parsed, elapsed)
+        else:
+            for nb_path, content_hash, markers in to_parse:
+                try:
+                    parsed, elapsed = parse_notebook(nb_path)
+                except Exception as e:
+                    self._notebook_failed(nb_path, e)
+                    continue
+                yield from self._record_parse(parse_cache, nb_path, content_hash, markers, parsed, elapsed)
+    
+    def _record_parse(self, parse_cache: NotebookParseCache, nb_path: str, content_hash: str,
+                      markers: Dict[str, Any], parsed: List[Dict[str, Any]], elapsed: float) -> List[Document]:
+        """Cache a freshly parsed notebook and record its parse time."""
+        self.stats.notebook_parse_times[os.path.basename(nb_path)] = elapsed
+        try:
+            parse_cache.put(content_hash, parsed)
+        except OSError as e:
+            print(f"⚠️ Could not cache parsed notebook {os.path.basename(nb_path)}: {e}")
+        return self._finish_notebook(nb_path, content_hash, markers, parsed)
+    
+    def _finish_notebook(self, nb_path: str, content_hash: str, markers: Dict[str, Any],
+                         parsed: List[Dict[str, Any]]) -> List[Document]:
+        nb_docs = [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in parsed]
+        self.stats.notebooks += 1
+        print(f"✅ Loaded notebook: {os.path.basename(nb_path)}")
+        return self._track_source(nb_path, content_hash, nb_docs, **markers)
+    
+    def _notebook_failed(self, nb_path: str, error: Exception):
+        error_msg = str(error)[:100]
+        self.seen_sources.add(nb_path)
+        self.stats.notebooks_failed += 1
+        self.stats.add_failed_source(nb_path, error_msg)
+        print(f"⚠️ Could not load {os.path.basename(nb_path)}: {error_msg}")
         
     def _load_curated_content(self) -> List[Document]:
         """Load curated GPU acceleration content."""
@@ -196,33 +456,96 @@ class DocumentLoader:
 - Operations dominated by I/O
 """
 
-        docs.append(Document(page_content=gpu_acceleration_content, metadata={"source": "curated_gpu_guide"}))
+        curated_doc = Document(page_content=gpu_acceleration_content, metadata={"source": "curated_gpu_guide"})
+        docs.extend(self._track_source("curated_gpu_guide", hash_text(gpu_acceleration_content), [curated_doc]))
         self.stats.curated_content += 1
         
         print(f"📖 Added {len(docs)} curated content piece")
         return docs
     
-    def split_documents(self, docs: List[Document]) -> List[Document]:
-        """Split documents into smaller chunks for better retrieval."""
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
-        )
-        self.doc_splits = text_splitter.split_documents(docs)
+    def split_documents(self, docs: Iterable[Document]) -> List[Document]:
+        """Split documents into smaller chunks for better retrieval.
+        
+        Accepts any iterable, so documents can be split as they are produced.
+        """
+        token_counter = get_token_counter()
+        if CHUNKING_MODE == "structure":
+            text_splitter = StructureAwareSplitter(
+                chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                max_code_block_tokens=MAX_CODE_BLOCK_TOKENS, length_function=token_counter
+            )
+        else:
+            text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+            )
+        self.doc_splits = []
+        for doc in docs:
+            self.doc_splits.extend(text_splitter.split_documents([doc]))
+        self._assign_chunk_ids(self.doc_splits)
         self.stats.total_chunks = len(self.doc_splits)
+        self.stats.chunk_token_counts = [token_counter(split.page_content) for split in self.doc_splits]
         return self.doc_splits
+    
+    def _assign_chunk_ids(self, splits: List[Document]):
+        """Give every chunk a deterministic id derived from its source and content hash."""
+        for split in splits:
+            source = split.metadata.get("ingest_source", split.metadata.get("source", ""))
+            content_hash = split.metadata.get("content_hash", "")
+            chunk_ids = self.source_chunk_ids.setdefault(source, [])
+            chunk_id = f"{hash_text(str(source))[:12]}-{content_hash[:12]}-{len(chunk_ids)}"
+            split.metadata["chunk_id"] = chunk_id
+            chunk_ids.append(chunk_id)
+    
+    def get_chunk_ids(self, splits: List[Document]) -> List[str]:
+        """Return the chunk ids of a list of splits, in order."""
+        return [split.metadata["chunk_id"] for split in splits]
+    
+    def get_stale_chunk_ids(self) -> List[str]:
+        """Chunk ids already in the index that belong to changed or removed sources."""
+        if not self.manifest:
+            return []
+        stale_ids = []
+        for source in list(self.changed_sources) + self.removed_sources:
+            stale_ids.extend(self.manifest.get(source).get("chunk_ids", []))
+        return stale_ids
+    
+    def commit_manifest(self):
+        """Record the ingested sources in the manifest once the vector store is updated."""
+        if not self.manifest:
+            return
+        for source, entry in self.changed_sources.items():
+            extra = {key: value for key, value in entry.items() if key != "hash"}
+            self.manifest.update(source, entry["hash"], self.source_chunk_ids.get(source, []), **extra)
+        for source in self.removed_sources:
+            self.manifest.remove(source)
+        self.manifest.save()
+        print(f"📝 Ingestion manifest updated: {len(self.changed_sources)} changed, "
+              f"{len(self.removed_sources)} removed, {len(self.manifest.sources)} tracked")
 
 class VectorStore:
     """Handle vector store operations for document retrieval."""
     
-    def __init__(self):
-        self.embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    def __init__(self, embedding_model: Embeddings = None):
+        # Document vectors are cached on disk, so rebuilds only embed new or changed chunks
+        self.embedding_model = embedding_model or CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL)
         self.vectorstore = None
         self.retriever = None
+        # BM25 index over the same chunks, kept in step with the vector store
+        self.lexical_index = BM25Index()
+        # Retrieval results for repeated queries; cleared whenever the index changes
+        self.query_cache = QueryCache(max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL,
+                                      semantic_threshold=QUERY_CACHE_SEMANTIC_THRESHOLD,
+                                      embed_query=self.embedding_model.embed_query)
         # Track which type of vector store is being used
         self.using_persistent = False
     
-    def create_vectorstore(self, doc_splits: List[Document]):
-        """Create vector store from document splits."""
+    def create_vectorstore(self, doc_splits: List[Document], stale_ids: List[str] = None):
+        """Create vector store from document splits.
+        
+        If a persistent store already exists, it is updated in place: chunks listed in
+        stale_ids are deleted and doc_splits (only new or changed sources) are added.
+        """
         if USE_PERSISTENT_VECTORSTORE:
             # Ensure directory exists
             os.makedirs(VECTORSTORE_PERSIST_DIRECTORY, exist_ok=True)
@@ -230,36 +553,189 @@ class VectorStore:
             # Check if we already have a stored database
             if self._check_existing_vectorstore():
                 print("🔄 Found existing vector store, loading...")
-                return self.load_vectorstore()
+                retriever = self.load_vectorstore()
+                self._apply_incremental_update(doc_splits, stale_ids or [])
+                return retriever
             
             # Create new persistent vector store
-            self.vectorstore = Chroma.from_documents(
-                documents=doc_splits,
-                embedding=self.embedding_model,
-                persist_directory=VECTORSTORE_PERSIST_DIRECTORY
-            )
+            if VECTORSTORE_BACKEND == "numpy":
+                self.vectorstore = NumpyVectorStore.from_documents(
+                    documents=doc_splits,
+                    embedding=self.embedding_model,
+                    ids=self._get_ids(doc_splits),
+                    persist_directory=VECTORSTORE_PERSIST_DIRECTORY
+                )
+            else:
+                self.vectorstore = Chroma.from_documents(
+                    documents=doc_splits,
+                    embedding=self.embedding_model,
+                    ids=self._get_ids(doc_splits),
+                    persist_directory=VECTORSTORE_PERSIST_DIRECTORY
+                )
+            self._update_ann_index()
+            self.lexical_index.add_documents(doc_splits)
             
             # Save to disk
             self.vectorstore.persist()
+            self._save_lexical_index()
+            self.write_version_stamp()
             self.using_persistent = True
-            print(f"✅ Created persistent ChromaDB vector store at {VECTORSTORE_PERSIST_DIRECTORY}")
+            print(f"✅ Created persistent {VECTORSTORE_BACKEND} vector store at {VECTORSTORE_PERSIST_DIRECTORY}")
         else:
-            # Use in-memory vector store (original implementation)
-            self.vectorstore = InMemoryVectorStore.from_documents(
-                documents=doc_splits, 
-                embedding=self.embedding_model
+            # Use the in-memory NumPy index; unlike InMemoryVectorStore it supports adds and counts
+            self.vectorstore = NumpyVectorStore.from_documents(
+                documents=doc_splits,
+                embedding=self.embedding_model,
+                ids=self._get_ids(doc_splits)
             )
+            self._update_ann_index()
+            self.lexical_index.add_documents(doc_splits)
             self.using_persistent = False
             print("✅ Created in-memory vector store")
         
         # Create retriever (same interface for both implementations)
-        self.retriever = self.vectorstore.as_retriever()
+        self.retriever = self._make_retriever()
         return self.retriever
     
+    def _get_ids(self, doc_splits: List[Document]):
+        """Use the loader's deterministic chunk ids when every split has one."""
+        if doc_splits and all("chunk_id" in split.metadata for split in doc_splits):
+            return [split.metadata["chunk_id"] for split in doc_splits]
+        return None
+    
+    def _make_retriever(self):
+        """Fuse embedding and BM25 rankings when hybrid retrieval is enabled, behind the query cache."""
+        self.query_cache.invalidate()
+        if USE_HYBRID_RETRIEVAL and len(self.lexical_index):
+            retriever = HybridRetriever(vectorstore=self.vectorstore, lexical_index=self.lexical_index,
+                                        k=RETRIEVER_K, candidates=HYBRID_CANDIDATES, rrf_k=RRF_K)
+        else:
+            retriever = self.vectorstore.as_retriever(search_kwargs={"k": RETRIEVER_K})
+        if QUERY_CACHE_SIZE > 0:
+            return CachedRetriever(retriever=retriever, cache=self.query_cache)
+        return retriever
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the retrieval query cache."""
+        return self.query_cache.stats()
+    
+    def _lexical_index_path(self) -> str:
+        return os.path.join(VECTORSTORE_PERSIST_DIRECTORY, LEXICAL_INDEX_FILE)
+    
+    def _save_lexical_index(self):
+        if self.using_persistent or USE_PERSISTENT_VECTORSTORE:
+            self.lexical_index.save(self._lexical_index_path())
+    
+    def _load_lexical_index(self):
+        """Load the persisted BM25 index, rebuilding it from the stored chunks if missing."""
+        try:
+            self.lexical_index = BM25Index.load(self._lexical_index_path())
+            return
+        except (OSError, ValueError, KeyError) as e:
+            if not USE_HYBRID_RETRIEVAL:
+                return
+            print(f"⚠️ Could not load lexical index ({e}), rebuilding from the vector store")
+        if isinstance(self.vectorstore, NumpyVectorStore):
+            documents = self.vectorstore.get_by_ids(list(self.vectorstore.ids))
+        else:
+            data = self.vectorstore.get(include=["documents", "metadatas"])
+            documents = [Document(page_content=text, metadata=metadata or {})
+                         for text, metadata in zip(data["documents"], data["metadatas"])]
+        self.lexical_index = BM25Index()
+        self.lexical_index.add_documents(documents)
+        self._save_lexical_index()
+    
+    def _apply_incremental_update(self, doc_splits: List[Document], stale_ids: List[str]):
+        """Delete chunks of changed/removed sources and add the new chunks."""
+        if stale_ids:
+            self.vectorstore.delete(ids=stale_ids)
+            self.lexical_index.delete(stale_ids)
+            print(f"🗑️ Removed {len(stale_ids)} stale chunks from vector store")
+        if doc_splits:
+            self.vectorstore.add_documents(doc_splits, ids=self._get_ids(doc_splits))
+            self.lexical_index.add_documents(doc_splits)
+            print(f"✅ Embedded {len(doc_splits)} new or changed chunks")
+        if stale_ids or doc_splits:
+            self.query_cache.invalidate()
+            self._update_ann_index()
+            self.vectorstore.persist()
+            self._save_lexical_index()
+        else:
+            print("✅ Vector store is up to date, nothing to embed")
+    
+    def _update_ann_index(self) -> bool:
+        """Build, rebuild or drop the NumPy store's IVF index to match config; True if it changed."""
+        store = self.vectorstore
+        if not isinstance(store, NumpyVectorStore):
+            if ANN_INDEX != "none":
+                print(f"⚠️ ANN_INDEX only applies to the numpy backend; {VECTORSTORE_BACKEND} uses its own index")
+            return False
+        if ANN_INDEX != "ivf" or len(store) < ANN_MIN_VECTORS:
+            changed = store.ann_index is not None
+            store.ann_index = None
+            return changed
+        # Retrain once the store has doubled since the clusters were fitted
+        if (store.ann_index is None or len(store) > 2 * store.ann_index.trained_size
+                or (IVF_NLIST and store.ann_index.nlist != IVF_NLIST)):
+            store.build_ann_index(nlist=IVF_NLIST, nprobe=IVF_NPROBE)
+            return True
+        store.ann_index.nprobe = IVF_NPROBE
+        return False
+    
     def _check_existing_vectorstore(self) -> bool:
         """Check if a persistent vector store already exists."""
-        return (os.path.exists(VECTORSTORE_PERSIST_DIRECTORY) and 
-                len(os.listdir(VECTORSTORE_PERSIST_DIRECTORY)) > 0)
+        if not os.path.exists(VECTORSTORE_PERSIST_DIRECTORY):
+            return False
+        # Our own bookkeeping files do not count as a stored database
+        entries = [name for name in os.listdir(VECTORSTORE_PERSIST_DIRECTORY)
+                   if name not in (INGESTION_MANIFEST_FILE, INDEX_VERSION_FILE, LEXICAL_INDEX_FILE)]
+        return len(entries) > 0
+    
+    def get_index_stamp(self) -> Dict[str, Any]:
+        """Settings that determine the index contents; any change requires a rebuild."""
+        return {
+            "embedding_model": EMBEDDING_MODEL,
+            "vectorstore_backend": VECTORSTORE_BACKEND,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunking_mode": CHUNKING_MODE,
+            "max_code_block_tokens": MAX_CODE_BLOCK_TOKENS,
+        }
+    
+    def _version_stamp_path(self) -> str:
+        return os.path.join(VECTORSTORE_PERSIST_DIRECTORY, INDEX_VERSION_FILE)
+    
+    def read_version_stamp(self) -> Dict[str, Any]:
+        """Read the stamp stored next to the index, or {} if there is none."""
+        try:
+            with open(self._version_stamp_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def write_version_stamp(self):
+        with open(self._version_stamp_path(), 'w', encoding='utf-8') as f:
+            json.dump(self.get_index_stamp(), f, indent=2)
+    
+    def is_current(self) -> bool:
+        """Check if a persistent store exists and was built with the current settings."""
+        if not USE_PERSISTENT_VECTORSTORE or not self._check_existing_vectorstore():
+            return False
+        stamp = self.read_version_stamp()
+        if stamp != self.get_index_stamp():
+            print(f"⚠️ Vector store was built with different settings: {stamp or 'no version stamp'}")
+            return False
+        return True
+    
+    def reset(self):
+        """Delete the persistent vector store (and its manifest) so it is rebuilt from scratch."""
+        if os.path.exists(VECTORSTORE_PERSIST_DIRECTORY):
+            shutil.rmtree(VECTORSTORE_PERSIST_DIRECTORY)
+            print(f"🧹 Cleared persistent vector store at {VECTORSTORE_PERSIST_DIRECTORY}")
+        self.vectorstore = None
+        self.retriever = None
+        self.lexical_index = BM25Index()
+        self.query_cache.invalidate()
     
     def load_vectorstore(self):
         """Load an existing persistent vector store."""
@@ -267,15 +743,23 @@ class VectorStore:
             print("⚠️ No existing vector store found. Creating new one...")
             return None
             
-        # Load existing Chroma database
-        self.vectorstore = Chroma(
-            persist_directory=VECTORSTORE_PERSIST_DIRECTORY,
-            embedding_function=self.embedding_model
-        )
+        if VECTORSTORE_BACKEND == "numpy":
+            # Vectors are memory-mapped, so this is instant regardless of index size
+            self.vectorstore = NumpyVectorStore(self.embedding_model,
+                                                persist_directory=VECTORSTORE_PERSIST_DIRECTORY)
+            if self._update_ann_index():
+                self.vectorstore.persist()
+        else:
+            # Load existing Chroma database
+            self.vectorstore = Chroma(
+                persist_directory=VECTORSTORE_PERSIST_DIRECTORY,
+                embedding_function=self.embedding_model
+            )
         self.using_persistent = True
+        self._load_lexical_index()
         
         # Create retriever
-        self.retriever = self.vectorstore.as_retriever()
+        self.retriever = self._make_retriever()
         print(f"✅ Loaded existing vector store from {VECTORSTORE_PERSIST_DIRECTORY}")
         return self.retriever
     
@@ -289,26 +773,24 @@ class VectorStore:
             print("⚠️ Vector store not initialized. Call create_vectorstore first.")
             return
             
+        self.vectorstore.add_documents(documents, ids=self._get_ids(documents))
+        self.lexical_index.add_documents(documents)
+        self.query_cache.invalidate()
+        self._update_ann_index()
         if self.using_persistent:
-            # Add documents to persistent store
-            self.vectorstore.add_documents(documents)
             # Persist changes to disk
             self.vectorstore.persist()
+            self._save_lexical_index()
             print(f"✅ Added {len(documents)} documents to persistent vector store")
         else:
-            # For in-memory store, we need to recreate with combined documents
-            # This is a limitation of InMemoryVectorStore
-            print("⚠️ Cannot add documents to in-memory vector store. Use persistent store.")
+            print(f"✅ Added {len(documents)} documents to in-memory vector store")
             
     def get_document_count(self):
         """Get the number of documents in the vector store."""
         if not self.vectorstore:
             return 0
             
-        if self.using_persistent:
-            # For Chroma
-            return self.vectorstore._collection.count()
-        else:
-            # For InMemoryVectorStore
-            # Note: InMemoryVectorStore doesn't have a direct way to count documents
-            return len(self.vectorstore.embeddings) if hasattr(self.vectorstore, 'embeddings') else 0
+        if isinstance(self.vectorstore, NumpyVectorStore):
+            return len(self.vectorstore)
+        # For Chroma
+        return self.vectorstore._collection.count()
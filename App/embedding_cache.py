@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config import EMBEDDING_CACHE_DIRECTORY, EMBEDDING_BATCH_SIZE
+
+class EmbeddingCache:
+    """Append-only on-disk store of embedding vectors keyed by chunk text hash.
+
+    Vectors for one model live in a raw float32 file that is read through np.memmap;
+    index.json maps each text hash to its row in that file. add_many() appends vectors
+    right away, flush() writes the index; rows appended after the last flush are dropped
+    on the next load.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIRECTORY):
+        self.model_name = model_name
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.keys = []
+        self.rows = {}
+        self.dim = None
+        self._matrix = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.keys = index["keys"]
+            # A crash between appending vectors and saving the index leaves unindexed rows at
+            # the end of the file; cut them off so new rows land right after the indexed ones.
+            # Only trust rows that are both indexed and fully written.
+            rows_on_disk = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            self.keys = self.keys[:rows_on_disk]
+            if os.path.getsize(self.vectors_path) != len(self.keys) * self.dim * 4:
+                os.truncate(self.vectors_path, len(self.keys) * self.dim * 4)
+            self.rows = {key: row for row, key in enumerate(self.keys)}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Could not read embedding cache, starting fresh: {e}")
+            self.keys, self.rows, self.dim = [], {}, None
+            for path in (self.index_path, self.vectors_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _get_matrix(self) -> np.ndarray:
+        """Memory-map the vector file, remapping only when rows were appended."""
+        if self._matrix is None or self._matrix.shape[0] != len(self.keys):
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                     shape=(len(self.keys), self.dim))
+        return self._matrix
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for the keys that are present."""
+        with self._lock:
+            if not self.keys:
+                return {}
+            matrix = self._get_matrix()
+            return {key: np.array(matrix[self.rows[key]]) for key in keys if key in self.rows}
+
+    def add_many(self, keys: List[str], vectors: List[List[float]]):
+        """Append new vectors; they are readable at once and persisted by the next flush()."""
+        if not keys:
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = block.shape[1]
+            elif block.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension changed from {self.dim} to {block.shape[1]}")
+            positions = {}
+            for position, key in enumerate(keys):
+                if key not in self.rows:
+                    positions.setdefault(key, position)
+            if not positions:
+                return
+            new_keys = list(positions)
+            with open(self.vectors_path, 'ab') as f:
+                f.write(np.ascontiguousarray(block[list(positions.values())]).tobytes())
+            for key in new_keys:
+                self.rows[key] = len(self.keys)
+                self.keys.append(key)
+            self._dirty = True
+
+    def flush(self):
+        """Write the index if rows were added since the last flush."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model_name, "dim": self.dim, "keys": self.keys}, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that reuses cached document vectors and embeds misses in batches."""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache = None,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, query_cache_size: int = 256):
+        self.embeddings = embeddings
+        self.cache = cache if cache is not None else EmbeddingCache(model_name)  # an empty cache is falsy
+        self.batch_size = batch_size
+        # Small in-memory LRU so one query is embedded once for the query cache and the search
+        self.query_cache_size = query_cache_size
+        self._query_vectors = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once, in batches; the index is written once at the end
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        missing_keys = list(missing)
+        try:
+            for start in range(0, len(missing_keys), self.batch_size):
+                batch_keys = missing_keys[start:start + self.batch_size]
+                batch_vectors = self.embeddings.embed_documents([missing[key] for key in batch_keys])
+                self.cache.add_many(batch_keys, batch_vectors)
+                for key, vector in zip(batch_keys, batch_vectors):
+                    found[key] = np.asarray(vector, dtype=np.float32)
+        finally:
+            # Keep the batches that did finish when a later one fails
+            self.cache.flush()
+
+        self.hits += len(texts) - len(missing_keys)
+        self.misses += len(missing_keys)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._query_lock:
+            if text in self._query_vectors:
+                self._query_vectors.move_to_end(text)
+                return list(self._query_vectors[text])
+        vector = self.embeddings.embed_query(text)
+        with self._query_lock:
+            self._query_vectors[text] = vector
+            if len(self._query_vectors) > self.query_cache_size:
+                self._query_vectors.popitem(last=False)
+        return list(vector)
@@ -0,0 +1,223 @@
+import os
+import sys
+import time
+import shutil
+import signal
+import itertools
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Dict, Any, Iterable, Iterator, List
+from slurm_monitor import SlurmJobMonitor, get_job_monitor
+from config import (EXECUTION_BACKEND, BENCHMARK_CPUS, SLURM_PARTITION, SLURM_QOS, SLURM_CPU_SETUP, SLURM_GPU_SETUP,
+                    LOCAL_MAX_CONCURRENT_JOBS, LOCAL_CPUS_PER_JOB, LOCAL_MEMORY_LIMIT_MB, LOCAL_PYTHON,
+                    SLURM_JOB_TIMEOUT)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def submit_slurm_job(script_path):
+    """
+    Submit a job to SLURM and return the job ID.
+    """
+    result = subprocess.run(["sbatch", script_path], capture_output=True, text=True)
+    if result.returncode == 0:
+        for line in result.stdout.splitlines():
+            if "Submitted batch job" in line:
+                return line.split()[-1]
+        return result.stdout.strip().split()[-1]
+    else:
+        raise RuntimeError(f"sbatch failed: {result.stderr}")
+
+def slurm_time_limit(seconds: float) -> str:
+    """sbatch -t value (D-HH:MM:SS) for a number of seconds."""
+    seconds = int(seconds)
+    return f"{seconds // 86400}-{seconds % 86400 // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+class JobExecutor:
+    """Runs Python job scripts and reports them as they finish.
+
+    submit() starts a script with its stdout and stderr sent to the given files, like a
+    SLURM job's -o/-e, so callers read results the same way on every backend. kind is
+    "cpu" or "gpu". as_completed() yields {"job_id", "state", "exit_code", "done",
+    "seconds", "source"} for each job in the order they finish, with done=False for jobs
+    still running when the timeout passes.
+    """
+
+    name = "executor"
+
+    def submit(self, script_path, stdout_path, stderr_path, kind: str = "cpu",
+               timeout: float = SLURM_JOB_TIMEOUT) -> str:
+        raise NotImplementedError
+
+    def as_completed(self, job_ids: Iterable[str], timeout: float = SLURM_JOB_TIMEOUT) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def wait(self, job_id: str, timeout: float = SLURM_JOB_TIMEOUT) -> Dict[str, Any]:
+        return next(iter(self.as_completed([job_id], timeout)))
+
+    def is_ready(self) -> bool:
+        return True
+
+class SlurmExecutor(JobExecutor):
+    """Submits each script as a batch job and waits on it through the shared SlurmJobMonitor."""
+
+    name = "slurm"
+
+    def __init__(self, monitor: SlurmJobMonitor = None):
+        self.monitor = monitor
+        self._outputs = {}  # job id -> .out path, checked by the monitor for the completion marker
+
+    def submit(self, script_path, stdout_path, stderr_path, kind: str = "cpu",
+               timeout: float = SLURM_JOB_TIMEOUT) -> str:
+        script_path = Path(script_path).resolve()
+        job_script = self.write_job_script(script_path.with_suffix(".sh"), f"python {script_path.name}",
+                                           stdout_path, stderr_path, kind=kind, time_limit=slurm_time_limit(timeout),
+                                           workdir=script_path.parent)
+        job_id = submit_slurm_job(str(job_script))
+        self._outputs[job_id] = str(Path(stdout_path).resolve())
+        return job_id
+
+    @staticmethod
+    def write_job_script(path, command: str, stdout_path, stderr_path, kind: str = "cpu",
+                         time_limit: str = "0-00:05:00", cpus: int = BENCHMARK_CPUS, workdir=None) -> Path:
+        """Write a batch script that loads the CPU or GPU environment and runs command in workdir."""
+        gpu_request = "#SBATCH -G 1\n" if kind == "gpu" else ""
+        setup = "\n".join(SLURM_GPU_SETUP if kind == "gpu" else SLURM_CPU_SETUP)
+        path = Path(path)
+        path.write_text(f'''#!/bin/bash
+#SBATCH -N 1
+#SBATCH -c {cpus}
+#SBATCH -t {time_limit}
+#SBATCH -p {SLURM_PARTITION}
+#SBATCH -q {SLURM_QOS}
+{gpu_request}#SBATCH -o {Path(stdout_path).resolve()}
+#SBATCH -e {Path(stderr_path).resolve()}
+#SBATCH --export=NONE
+
+{setup}
+cd {Path(workdir or path.parent).resolve()}
+{command}
+''')
+        os.chmod(path, 0o755)
+        return path
+
+    def as_completed(self, job_ids: Iterable[str], timeout: float = SLURM_JOB_TIMEOUT) -> Iterator[Dict[str, Any]]:
+        job_ids = list(job_ids)
+        output_paths = {job_id: self._outputs.pop(job_id, None) for job_id in job_ids}
+        yield from (self.monitor or get_job_monitor()).as_completed(job_ids, timeout, output_paths)
+
+class LocalExecutor(JobExecutor):
+    """Runs scripts as subprocesses on this host, for machines without SLURM and CPU-only runs.
+
+    At most max_concurrent jobs run at once; the rest wait in submission order. Each
+    running job is pinned to its own cpus_per_job cores, and CPU jobs get an
+    address-space limit of memory_limit_mb. A job that runs past its timeout is killed
+    together with any processes it started.
+    """
+
+    name = "local"
+
+    def __init__(self, max_concurrent: int = LOCAL_MAX_CONCURRENT_JOBS, cpus_per_job: int = LOCAL_CPUS_PER_JOB,
+                 memory_limit_mb: int = LOCAL_MEMORY_LIMIT_MB, python: str = LOCAL_PYTHON):
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self.cpus_per_job = max(1, min(cpus_per_job, len(cores))) if cores else cpus_per_job
+        if cores:
+            # Never run more jobs than there are disjoint core sets
+            max_concurrent = min(max_concurrent, max(1, len(cores) // self.cpus_per_job))
+        self.max_concurrent = max(1, max_concurrent)
+        self.memory_limit_mb = memory_limit_mb
+        self.python = python or sys.executable
+        self._free_cores = cores
+        self._cores_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="local-job")
+        self._futures = {}  # job id -> Future of the job's result
+        self._ids = itertools.count(1)
+
+    def submit(self, script_path, stdout_path, stderr_path, kind: str = "cpu",
+               timeout: float = SLURM_JOB_TIMEOUT) -> str:
+        job_id = f"local-{next(self._ids)}"
+        self._futures[job_id] = self._pool.submit(self._run, job_id, Path(script_path).resolve(),
+                                                  stdout_path, stderr_path, kind, timeout)
+        return job_id
+
+    def _run(self, job_id: str, script_path: Path, stdout_path, stderr_path, kind: str, timeout: float) -> Dict[str, Any]:
+        cores = self._take_cores()
+        started = time.time()
+        try:
+            with open(stdout_path, "w") as out, open(stderr_path, "w") as err:
+                process = subprocess.Popen([self.python, script_path.name], cwd=script_path.parent,
+                                           stdin=subprocess.DEVNULL, stdout=out, stderr=err, start_new_session=True)
+                self._apply_limits(process.pid, cores, kind)
+                try:
+                    exit_code = process.wait(timeout=timeout)
+                    state = "COMPLETED" if exit_code == 0 else "FAILED"
+                except subprocess.TimeoutExpired:
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass  # Exited just as the timeout passed
+                    exit_code = process.wait()
+                    state = "TIMEOUT"
+        finally:
+            self._release_cores(cores)
+        return {"job_id": job_id, "state": state, "exit_code": exit_code, "done": state != "TIMEOUT",
+                "seconds": time.time() - started, "source": self.name}
+
+    def _apply_limits(self, pid: int, cores: List[int], kind: str):
+        # Applied right after start rather than in preexec_fn, which is unsafe with threads
+        try:
+            if cores:
+                os.sched_setaffinity(pid, cores)
+            if self.memory_limit_mb and kind != "gpu" and resource is not None and hasattr(resource, "prlimit"):
+                # CUDA reserves far more address space than it uses, so GPU jobs are not limited
+                limit = self.memory_limit_mb * 1024 * 1024
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        except ProcessLookupError:
+            pass  # Already exited
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not apply limits to local job: {e}")
+
+    def _take_cores(self) -> List[int]:
+        with self._cores_lock:
+            cores = self._free_cores[:self.cpus_per_job]
+            del self._free_cores[:self.cpus_per_job]
+            return cores
+
+    def _release_cores(self, cores: List[int]):
+        with self._cores_lock:
+            self._free_cores = sorted(self._free_cores + cores)
+
+    def as_completed(self, job_ids: Iterable[str], timeout: float = SLURM_JOB_TIMEOUT) -> Iterator[Dict[str, Any]]:
+        futures = {self._futures[job_id]: job_id for job_id in job_ids}
+        start_time = time.time()
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                self._futures.pop(futures[future], None)
+                yield future.result()
+        except TimeoutError:
+            for future, job_id in futures.items():
+                if not future.done():
+                    print(f"⚠️ Stopped waiting for local job {job_id} after {time.time() - start_time:.0f}s")
+                    yield {"job_id": job_id, "state": "RUNNING", "exit_code": None, "done": False,
+                           "seconds": time.time() - start_time, "source": "timeout"}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(backend: str = EXECUTION_BACKEND) -> JobExecutor:
+    """The shared executor for a backend: "slurm", "local" or "auto" (local when sbatch is not installed)."""
+    if backend == "auto":
+        backend = "slurm" if shutil.which("sbatch") else "local"
+    with _executors_lock:
+        if backend not in _executors:
+            if backend == "slurm":
+                _executors[backend] = SlurmExecutor()
+            elif backend == "local":
+                _executors[backend] = LocalExecutor()
+            else:
+                raise ValueError(f"Unknown execution backend: {backend}")
+        return _executors[backend]
@@ -1,9 +1,16 @@
 from typing import Dict, List, Any, Tuple
 import time
+import asyncio
 import re
 from datetime import datetime
-from langchain_core.messages import HumanMessage
-from benchmark import run_benchmark, format_execution_result  # Using the renamed benchmark.py
+from benchmark import run_benchmark_iter, format_execution_result  # Using the renamed benchmark.py
+from config import SINGLE_PASS_CODE_ANALYSIS, BENCHMARK_OUTPUT_DIR
+
+# Gradio passes the handler's gr.Request (and with it the session) to a parameter annotated with it
+try:
+    from gradio import Request
+except ImportError:
+    Request = Any
 
 class GPUMentor:
     """Main GPU Mentor class that coordinates RAG agent and code optimization."""
@@ -11,20 +18,45 @@ class GPUMentor:
     def __init__(self, rag_agent, code_optimizer):
         self.rag_agent = rag_agent
         self.code_optimizer = code_optimizer
-        self.conversation_history = []
         self.execution_results = []
+        self.single_pass_analysis = SINGLE_PASS_CODE_ANALYSIS
+        self.warm_pool = None  # WarmWorkerPool for benchmarks, set by the app when warm workers are enabled
     
-    def clear_conversation_memory(self):
-        """Clear conversation memory from the RAG agent."""
-        self.rag_agent.clear_conversation_memory()
+    def clear_conversation_memory(self, session_id: str = None):
+        """Clear a session's conversation memory from the RAG agent."""
+        self.rag_agent.clear_conversation_memory(session_id)
         print("🧹 Conversation memory cleared from GPU Mentor")
     
-    def process_user_input(self, question: str, code: str = "", use_conversation_context: bool = False) -> Dict[str, Any]:
+    def process_user_input(self, question: str, code: str = "", use_conversation_context: bool = False,
+                           session_id: str = None) -> Dict[str, Any]:
         """Process user input and provide comprehensive response."""
-        timestamp = datetime.now().isoformat()
+        response = self._new_response(question, code)
+        
+        try:
+            # Get RAG response
+            if code and self.single_pass_analysis:
+                # One structured generation returns the answer, analysis and optimized code
+                prompt = self._single_pass_prompt(question, code, use_conversation_context, session_id)
+                response["text_response"] = self.rag_agent.query_code_analysis(prompt, session_id=session_id)
+                self._record_single_pass(response, use_conversation_context, session_id)
+            elif question or code:
+                combined_query = self._build_combined_query(question, code)
+                
+                # Pass the conversation context parameter to the RAG agent
+                response["text_response"] = self.rag_agent.query(combined_query, use_conversation_context, session_id)
+            
+            # Analyze and optimize code if provided
+            if code:
+                self._add_code_analysis(response, question, code)
+            
+        except Exception as e:
+            response["text_response"] = f"Error processing request: {str(e)}"
         
-        response = {
-            "timestamp": timestamp,
+        return response
+    
+    def _new_response(self, question: str, code: str) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.now().isoformat(),
             "question": question,
             "code": code,
             "text_response": "",
@@ -34,13 +66,35 @@ class GPUMentor:
             "socratic_questions": [],
             "learning_objectives": []
         }
+    
+    async def aprocess_user_input(self, question: str, code: str = "", use_conversation_context: bool = False,
+                                  session_id: str = None) -> Dict[str, Any]:
+        """Async variant of process_user_input() for async Gradio handlers."""
+        response = self._new_response(question, code)
         
         try:
-            # Get RAG response
-            if question or code:
-                if code and question:
-                    # Both question and code provided
-                    combined_query = f"""Question: {question}
+            if code and self.single_pass_analysis:
+                prompt = self._single_pass_prompt(question, code, use_conversation_context, session_id)
+                response["text_response"] = await self.rag_agent.aquery_code_analysis(prompt, session_id=session_id)
+                self._record_single_pass(response, use_conversation_context, session_id)
+            elif question or code:
+                combined_query = self._build_combined_query(question, code)
+                response["text_response"] = await self.rag_agent.aquery(combined_query, use_conversation_context, session_id)
+            
+            if code:
+                # Static analysis and code execution block; keep them off the event loop
+                await asyncio.to_thread(self._add_code_analysis, response, question, code)
+            
+        except Exception as e:
+            response["text_response"] = f"Error processing request: {str(e)}"
+        
+        return response
+    
+    def _build_combined_query(self, question: str, code: str) -> str:
+        """Build the RAG query for a question, a piece of code, or both."""
+        if code and question:
+            # Both question and code provided
+            combined_query = f"""Question: {question}
 
 Code to analyze and optimize for GPU acceleration:
 ```python
@@ -54,9 +108,9 @@ Please analyze this code and provide:
 4. Code examples showing the optimized version
 
 Focus on practical GPU acceleration techniques using NVIDIA Rapids libraries."""
-                elif code and not question:
-                    # Only code provided
-                    combined_query = f"""Please analyze the following Python code for GPU acceleration opportunities:
+        elif code and not question:
+            # Only code provided
+            combined_query = f"""Please analyze the following Python code for GPU acceleration opportunities:
 
 ```python
 {code}
@@ -69,50 +123,61 @@ Provide:
 4. Best practices for GPU optimization
 
 Focus on practical GPU acceleration techniques."""
-                else:
-                    # Only question provided
-                    combined_query = question
-                
-                # Pass the conversation context parameter to the RAG agent
-                response["text_response"] = self.rag_agent.query(combined_query, use_conversation_context)
-            
-            # Analyze and optimize code if provided
-            if code:
-                response["code_analysis"] = self.code_optimizer.analyze_code(code)
-                response["optimized_code"] = self.code_optimizer.suggest_optimizations(code)
-                
-                # Execute original code
-                execution_result = self.code_optimizer.execute_code_safely(code)
-                response["code_output"] = execution_result
-                
-                # Generate learning content
-                response["socratic_questions"] = self._generate_socratic_questions(
-                    response["code_analysis"], question, code
-                )
-                response["learning_objectives"] = self._generate_learning_objectives(
-                    response["code_analysis"], code
-                )
-            
-            # Store in conversation history
-            self.conversation_history.append(response)
-            
-        except Exception as e:
-            response["text_response"] = f"Error processing request: {str(e)}"
+        else:
+            # Only question provided
+            combined_query = question
         
-        return response
+        return combined_query
+    
+    def _single_pass_prompt(self, question: str, code: str, use_conversation_context: bool,
+                            session_id: str = None) -> str:
+        """Structured analysis prompt carrying the user's question and, optionally, the session's conversation."""
+        prompt = self._build_analysis_prompt(code, question)
+        conversation_context = self.rag_agent.get_conversation_context(session_id) if use_conversation_context else ""
+        if conversation_context:
+            prompt = f"{conversation_context}\n\n{prompt}"
+        return prompt
+    
+    def _record_single_pass(self, response: Dict[str, Any], use_conversation_context: bool,
+                            session_id: str = None):
+        """Take the optimized code from a single-pass response and remember the exchange."""
+        llm_response = response["text_response"]
+        response["optimized_code"] = self._parse_llm_response(llm_response)[1]
+        if use_conversation_context and llm_response:
+            self.rag_agent.add_to_conversation_memory(
+                self._chat_user_content(response["question"], response["code"]), llm_response, session_id
+            )
     
-    def chat_interface(self, message: str, code: str, history: List) -> tuple:
+    def _add_code_analysis(self, response: Dict[str, Any], question: str, code: str):
+        """Fill in the code analysis, optimization, execution and learning fields of a response."""
+        response["code_analysis"] = self.code_optimizer.analyze_code(code)
+        if not response["optimized_code"]:
+            # Only needed when the single-pass generation did not already produce the code
+            response["optimized_code"] = self.code_optimizer.suggest_optimizations(code)
+        
+        # Execute original code
+        execution_result = self.code_optimizer.execute_code_safely(code)
+        response["code_output"] = execution_result
+        
+        # Generate learning content
+        response["socratic_questions"] = self._generate_socratic_questions(
+            response["code_analysis"], question, code
+        )
+        response["learning_objectives"] = self._generate_learning_objectives(
+            response["code_analysis"], code
+        )
+    
+    def chat_interface(self, message: str, code: str, history: List, request: Request = None) -> tuple:
         """Interface for chat functionality with conversation memory."""
         if not message.strip() and not code.strip():
             return "", "", history
         
         # Create a meaningful user message that includes both text and code
-        user_content = message if message.strip() else "Please analyze this code for GPU optimization opportunities."
-        if code.strip():
-            user_content += f"\n\nCode to analyze:\n```python\n{code}\n```"
+        user_content = self._chat_user_content(message, code)
         
         # Process the input with conversation context enabled
-        response = self.process_user_input(message, code, use_conversation_context=True)
+        response = self.process_user_input(message, code, use_conversation_context=True,
+                                           session_id=self._session_id(request))
         
         # Format response for chat
         chat_response = self._format_chat_response(response)
@@ -126,6 +191,118 @@ Focus on practical GPU acceleration techniques."""
         
         return "", "", history
     
+    def chat_interface_stream(self, message: str, code: str, history: List, request: Request = None):
+        """Streaming variant of chat_interface for Gradio generator handlers.
+        
+        The AI response is streamed into the last chat message; code analysis,
+        execution and learning content are added once the response is complete.
+        """
+        if not message.strip() and not code.strip():
+            yield "", "", history
+            return
+        
+        user_content = self._chat_user_content(message, code)
+        
+        assistant_message = {"role": "assistant", "content": "**🤖 AI Response:**\n"}
+        history.append({"role": "user", "content": user_content})
+        history.append(assistant_message)
+        yield "", "", history
+        
+        response = self._new_response(message, code)
+        session_id = self._session_id(request)
+        
+        try:
+            start_time = time.time()
+            first_chunk_time = None
+            if code and self.single_pass_analysis:
+                prompt = self._single_pass_prompt(message, code, True, session_id)
+                chunks = self.rag_agent.query_code_analysis_stream(prompt, session_id=session_id)
+            else:
+                chunks = self.rag_agent.query_stream(self._build_combined_query(message, code), True, session_id)
+            for chunk in chunks:
+                if first_chunk_time is None:
+                    first_chunk_time = time.time() - start_time
+                    print(f"⏱️ First chat chunk after {first_chunk_time:.2f}s")
+                response["text_response"] += chunk
+                assistant_message["content"] = f"**🤖 AI Response:**\n{response['text_response']}"
+                yield "", "", history
+            
+            if code and self.single_pass_analysis:
+                self._record_single_pass(response, True, session_id)
+            if code:
+                self._add_code_analysis(response, message, code)
+            
+        except Exception as e:
+            response["text_response"] = f"Error processing request: {str(e)}"
+        
+        assistant_message["content"] = self._format_chat_response(response)
+        yield "", "", history
+    
+    @staticmethod
+    def _session_id(request) -> str:
+        """The Gradio session a handler call belongs to (None outside the web UI)."""
+        return getattr(request, "session_hash", None)
+    
+    def _chat_user_content(self, message: str, code: str) -> str:
+        user_content = message if message.strip() else "Please analyze this code for GPU optimization opportunities."
+        if code.strip():
+            user_content += f"\n\nCode to analyze:\n```python\n{code}\n```"
+        return user_content
+    
+    async def achat_interface(self, message: str, code: str, history: List, request: Request = None) -> tuple:
+        """Async variant of chat_interface()."""
+        if not message.strip() and not code.strip():
+            return "", "", history
+        
+        response = await self.aprocess_user_input(message, code, use_conversation_context=True,
+                                                  session_id=self._session_id(request))
+        
+        history.append({"role": "user", "content": self._chat_user_content(message, code)})
+        history.append({"role": "assistant", "content": self._format_chat_response(response)})
+        
+        return "", "", history
+    
+    async def achat_interface_stream(self, message: str, code: str, history: List, request: Request = None):
+        """Async variant of chat_interface_stream()."""
+        if not message.strip() and not code.strip():
+            yield "", "", history
+            return
+        
+        assistant_message = {"role": "assistant", "content": "**🤖 AI Response:**\n"}
+        history.append({"role": "user", "content": self._chat_user_content(message, code)})
+        history.append(assistant_message)
+        yield "", "", history
+        
+        response = self._new_response(message, code)
+        session_id = self._session_id(request)
+        
+        try:
+            start_time = time.time()
+            first_chunk_time = None
+            if code and self.single_pass_analysis:
+                prompt = self._single_pass_prompt(message, code, True, session_id)
+                chunks = self.rag_agent.aquery_code_analysis_stream(prompt, session_id=session_id)
+            else:
+                chunks = self.rag_agent.aquery_stream(self._build_combined_query(message, code), True, session_id)
+            async for chunk in chunks:
+                if first_chunk_time is None:
+                    first_chunk_time = time.time() - start_time
+                    print(f"⏱️ First chat chunk after {first_chunk_time:.2f}s")
+                response["text_response"] += chunk
+                assistant_message["content"] = f"**🤖 AI Response:**\n{response['text_response']}"
+                yield "", "", history
+            
+            if code and self.single_pass_analysis:
+                self._record_single_pass(response, True, session_id)
+            if code:
+                await asyncio.to_thread(self._add_code_analysis, response, message, code)
+            
+        except Exception as e:
+            response["text_response"] = f"Error processing request: {str(e)}"
+        
+        assistant_message["content"] = self._format_chat_response(response)
+        yield "", "", history
+    
     def _format_chat_response(self, response: Dict[str, Any]) -> str:
         """Format response for chat interface."""
         formatted = []
@@ -157,7 +334,7 @@ Focus on practical GPU acceleration techniques."""
         
         return "\n".join(formatted)
     
-    def analyze_code_only(self, code: str) -> tuple:
+    def analyze_code_only(self, code: str, use_cache: bool = True) -> tuple:
         """Analyze code and return results for the analysis interface."""
         if not code.strip():
             return "No code provided for analysis.", ""
@@ -166,13 +343,46 @@ Focus on practical GPU acceleration techniques."""
             print(f"DEBUG: Starting code analysis for code length: {len(code)}")
             
             # Create structured prompt for LLM to provide both analysis and optimized code
-            llm_analysis_prompt = f"""You are GPU Mentor, an expert in NVIDIA Rapids GPU acceleration. Analyze the following Python code and provide GPU optimization recommendations.
+            llm_analysis_prompt = self._build_analysis_prompt(code)
+            
+            print(f"DEBUG: Sending prompt to RAG agent, prompt length: {len(llm_analysis_prompt)}")
+            
+            # Connection state comes from the background health monitor; no test prompt is sent
+            print(f"DEBUG: Code LLM available (cached status): {self.rag_agent.is_model_available('code')}")
+            
+            # Get LLM response using the dedicated code analysis method
+            llm_response = self.rag_agent.query_code_analysis(llm_analysis_prompt, use_cache)
+            
+            print(f"DEBUG: Received LLM response, length: {len(llm_response) if llm_response else 0}")
+            print(f"DEBUG: LLM response preview: {llm_response[:200] if llm_response else 'None'}...")
+            
+            if not llm_response or not llm_response.strip():
+                return "No response received from the AI model. Please check the model connection.", ""
+            
+            # Parse the response to separate analysis from optimized code
+            analysis_text, optimized_code = self._parse_llm_response(llm_response)
+            
+            print(f"DEBUG: Parsed analysis length: {len(analysis_text)}, code length: {len(optimized_code)}")
+            
+            return analysis_text, optimized_code
+            
+        except Exception as e:
+            print(f"ERROR in analyze_code_only: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            error_msg = f"Error analyzing code: {str(e)}"
+            return error_msg, ""
+    
+    def _build_analysis_prompt(self, code: str, question: str = "") -> str:
+        """Structured prompt asking the code LLM for analysis and an optimized version."""
+        question_block = f"\n**User Question:** {question}\nAnswer this question as part of your analysis.\n" if question.strip() else ""
+        return f"""You are GPU Mentor, an expert in NVIDIA Rapids GPU acceleration. Analyze the following Python code and provide GPU optimization recommendations.
 
 **Code to Analyze:**
 ```python
 {code}
 ```
-
+{question_block}
 **Instructions:**
 Please provide your response in exactly this format:
 
@@ -207,90 +417,141 @@ Please provide your response in exactly this format:
 - Additional tips for scaling]
 
 Focus on practical, working code that demonstrates clear GPU acceleration benefits."""
+    
+    def analyze_code_only_stream(self, code: str, use_cache: bool = True):
+        """Streaming variant of analyze_code_only for Gradio generator handlers.
+        
+        Yields (analysis_text, optimized_code) as tokens arrive.
+        """
+        if not code.strip():
+            yield "No code provided for analysis.", ""
+            return
+        
+        try:
+            print(f"DEBUG: Starting streaming code analysis for code length: {len(code)}")
+            llm_analysis_prompt = self._build_analysis_prompt(code)
             
-            print(f"DEBUG: Sending prompt to RAG agent, prompt length: {len(llm_analysis_prompt)}")
+            llm_response = ""
+            last_update = 0.0
+            for chunk in self.rag_agent.query_code_analysis_stream(llm_analysis_prompt, use_cache):
+                llm_response += chunk
+                # Re-parsing on every token is wasteful; refresh the view at most every 50 ms
+                if time.time() - last_update >= 0.05:
+                    last_update = time.time()
+                    yield self._parse_llm_response(llm_response)
             
-            # Try direct LLM call first to test connection
-            try:
-                print("DEBUG: Testing direct code LLM connection...")
-                if self.rag_agent.code_llm_model:
-                    test_response = self.rag_agent.code_llm_model.invoke([HumanMessage(content="Hello, are you working?")])
-                    print(f"DEBUG: Direct code LLM test successful: {test_response.content[:100]}...")
-                else:
-                    print("DEBUG: Code LLM model is None")
-            except Exception as e:
-                print(f"DEBUG: Direct code LLM test failed: {e}")
+            print(f"DEBUG: Received streamed LLM response, length: {len(llm_response)}")
             
-            # Get LLM response using the dedicated code analysis method
-            llm_response = self.rag_agent.query_code_analysis(llm_analysis_prompt)
+            if not llm_response.strip():
+                yield "No response received from the AI model. Please check the model connection.", ""
+                return
             
-            print(f"DEBUG: Received LLM response, length: {len(llm_response) if llm_response else 0}")
-            print(f"DEBUG: LLM response preview: {llm_response[:200] if llm_response else 'None'}...")
+            yield self._parse_llm_response(llm_response)
+            
+        except Exception as e:
+            print(f"ERROR in analyze_code_only_stream: {str(e)}")
+            yield f"Error analyzing code: {str(e)}", ""
+    
+    async def aanalyze_code_only(self, code: str, use_cache: bool = True) -> tuple:
+        """Async variant of analyze_code_only()."""
+        if not code.strip():
+            return "No code provided for analysis.", ""
+        
+        try:
+            llm_response = await self.rag_agent.aquery_code_analysis(self._build_analysis_prompt(code), use_cache)
             
             if not llm_response or not llm_response.strip():
                 return "No response received from the AI model. Please check the model connection.", ""
             
-            # Parse the response to separate analysis from optimized code
-            analysis_text, optimized_code = self._parse_llm_response(llm_response)
+            return self._parse_llm_response(llm_response)
             
-            print(f"DEBUG: Parsed analysis length: {len(analysis_text)}, code length: {len(optimized_code)}")
+        except Exception as e:
+            print(f"ERROR in aanalyze_code_only: {str(e)}")
+            return f"Error analyzing code: {str(e)}", ""
+    
+    async def aanalyze_code_only_stream(self, code: str, use_cache: bool = True):
+        """Async variant of analyze_code_only_stream()."""
+        if not code.strip():
+            yield "No code provided for analysis.", ""
+            return
+        
+        try:
+            llm_response = ""
+            last_update = 0.0
+            async for chunk in self.rag_agent.aquery_code_analysis_stream(self._build_analysis_prompt(code), use_cache):
+                llm_response += chunk
+                if time.time() - last_update >= 0.05:
+                    last_update = time.time()
+                    yield self._parse_llm_response(llm_response)
             
-            return analysis_text, optimized_code
+            if not llm_response.strip():
+                yield "No response received from the AI model. Please check the model connection.", ""
+                return
+            
+            yield self._parse_llm_response(llm_response)
             
         except Exception as e:
-            print(f"ERROR in analyze_code_only: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            error_msg = f"Error analyzing code: {str(e)}"
-            return error_msg, ""
+            print(f"ERROR in aanalyze_code_only_stream: {str(e)}")
+            yield f"Error analyzing code: {str(e)}", ""
     
     def run_code_comparison(self, original_code: str, optimized_code: str) -> Tuple[str, str]:
         """Run both original and optimized code on Sol supercomputer and return results."""
+        outputs = None
+        for outputs in self.run_code_comparison_stream(original_code, optimized_code):
+            pass
+        return outputs
+    
+    def run_code_comparison_stream(self, original_code: str, optimized_code: str):
+        """Streaming variant of run_code_comparison for Gradio generator handlers.
+        
+        Both jobs run at once; (original, optimized) results are yielded as each one
+        finishes, with a placeholder for the job still running.
+        """
         if not original_code.strip():
-            return "No original code provided for execution.", "No optimized code to execute."
+            yield "No original code provided for execution.", "No optimized code to execute."
+            return
         
         if not optimized_code.strip():
-            return "Original code ready for execution.", "No optimized code available. Please analyze the code first."
+            yield "Original code ready for execution.", "No optimized code available. Please analyze the code first."
+            return
         
         try:
             print("🚀 Starting code execution comparison on Sol supercomputer...")
             
             # Run both codes using the new benchmark implementation
-            results = run_benchmark(original_code, optimized_code, "/home/vpatel69/R1/App/output")
-            
-            # Use the formatted results directly from benchmark_new.py
-            formatted_results = format_execution_result(results)
-            
-            # Format CPU code results
-            cpu_success = formatted_results["cpu"]["status"] == "Success"
-            cpu_time = formatted_results["cpu"]["execution_time"]
-            original_result = {
-                "status": "completed" if cpu_success else "failed",
-                "stdout": results["cpu"]["stdout"],
-                "stderr": "",  # Removing stderr from output display
-                "execution_time": cpu_time if cpu_time else 0.001  # Ensure we have a non-zero time
-            }
-            original_output = self._format_execution_result(original_result, "Original CPU Code")
-            
-            # Format GPU code results
-            gpu_success = formatted_results["gpu"]["status"] == "Success"
-            gpu_time = formatted_results["gpu"]["execution_time"]
-            optimized_result = {
-                "status": "completed" if gpu_success else "failed",
-                "stdout": results["gpu"]["stdout"],
-                "stderr": "",  # Removing stderr from output display
-                "execution_time": gpu_time if gpu_time else 0.001  # Ensure we have a non-zero time
-            }
-            optimized_output = self._format_execution_result(optimized_result, "GPU-Optimized Code")
-            
-            return original_output, optimized_output
+            for results in run_benchmark_iter(original_code, optimized_code, BENCHMARK_OUTPUT_DIR,
+                                              pool=self.warm_pool):
+                yield self._format_comparison(results)
             
         except Exception as e:
             print(f"ERROR in run_code_comparison: {str(e)}")
             import traceback
             traceback.print_exc()
             error_msg = f"Error running code comparison: {str(e)}"
-            return error_msg, error_msg
+            yield error_msg, error_msg
+    
+    def _format_comparison(self, results: Dict[str, Any]) -> Tuple[str, str]:
+        """Markdown for the CPU and GPU benchmark results; a job without results is shown as running."""
+        # Use the formatted results directly from benchmark.py
+        formatted_results = format_execution_result(results)
+        outputs = []
+        for side, code_type in (("cpu", "Original CPU Code"), ("gpu", "GPU-Optimized Code")):
+            if results.get(side) is None:
+                outputs.append(f"**🏃‍♂️ {code_type} - Execution Results**\n\n⏳ **Status**: Running on Sol...")
+                continue
+            success = formatted_results[side]["status"] == "Success"
+            exec_time = formatted_results[side]["execution_time"]
+            outputs.append(self._format_execution_result({
+                "status": "completed" if success else "failed",
+                "stdout": results[side]["stdout"],
+                "stderr": "",  # Removing stderr from output display
+                "execution_time": exec_time if exec_time else 0.001,  # Ensure we have a non-zero time
+                "stats": formatted_results[side]["stats"],
+                # The speedup is shown with the GPU results once both jobs are done
+                "speedup": formatted_results["speedup"] if side == "gpu" else None,
+                "speedup_ci": formatted_results["speedup_ci"] if side == "gpu" else None
+            }, code_type))
+        return outputs[0], outputs[1]
             
     def _extract_execution_time(self, output: str) -> float:
         """Extract execution time from benchmark output."""
@@ -299,8 +560,8 @@ Focus on practical, working code that demonstrates clear GPU acceleration benefi
             
         import re
         # Look for the execution time in the output with our new extended format
-        # Format: TOTAL CPU/GPU EXECUTION TIME: X.XXXXXX seconds (averaged over N runs)
-        time_match = re.search(r"TOTAL (?:CPU|GPU) EXECUTION TIME: (\d+\.\d+)", output)
+        # Format: MEDIAN CPU/GPU EXECUTION TIME: X.XXXXXX seconds (95% CI ..., p95 ..., stdev ...)
+        time_match = re.search(r"(?:TOTAL|MEDIAN) (?:CPU|GPU) EXECUTION TIME: (\d+\.\d+)", output)
         if time_match:
             return float(time_match.group(1))
             
@@ -330,8 +591,22 @@ Focus on practical, working code that demonstrates clear GPU acceleration benefi
         # Status and timing
         if status == "completed":
             output_parts.append(f"✅ **Status**: Completed Successfully")
-            if execution_time is not None:
+            stats = result.get("stats")
+            if stats:
+                summary = stats["summary"]
+                low, high = stats["median_ci"]
+                output_parts.append(f"⏱️ **Execution Time**: {summary['median']:.4f} seconds median "
+                                    f"({stats['confidence']:.0%} CI {low:.4f}–{high:.4f}, p95 {summary['p95']:.4f}, "
+                                    f"{summary['n']} timed runs)")
+            elif execution_time is not None:
                 output_parts.append(f"⏱️ **Execution Time**: {execution_time:.4f} seconds")
+            speedup_interval = result.get("speedup_ci")
+            if speedup_interval:
+                low, high = speedup_interval["ci"]
+                output_parts.append(f"🚀 **Speedup**: {speedup_interval['speedup']:.2f}x "
+                                    f"({speedup_interval['confidence']:.0%} CI {low:.2f}x–{high:.2f}x)")
+            elif result.get("speedup"):
+                output_parts.append(f"🚀 **Speedup**: {result['speedup']:.2f}x")
         else:
             output_parts.append(f"⏳ **Status**: {status.title()}")
         
@@ -375,7 +650,7 @@ Focus on practical, working code that demonstrates clear GPU acceleration benefi
                 performance_lines.append(line)
             elif "Using" in line and "iterations" in line:
                 performance_lines.append(line)
-            elif "averaged over" in line:
+            elif "averaged over" in line or line.startswith("Runs:"):
                 performance_lines.append(line)
         
         if performance_lines:
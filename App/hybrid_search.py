@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import math
+import heapq
+import hashlib
+import threading
+from typing import List, Dict, Any, Tuple
+from pydantic import ConfigDict
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+# Identifiers with optional dotted attribute access, e.g. "cudf.read_parquet" or "cp.cuda.Stream"
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i if in into is it its of on or so that the "
+    "their then there these this to was we what when which why will with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens that keep API names whole.
+
+    "cudf.read_parquet" yields the full name plus "cudf", "read_parquet", "read" and
+    "parquet", so both exact API lookups and plain-language queries match.
+    """
+    tokens = []
+    for match in IDENTIFIER.finditer(text.lower()):
+        name = match.group(0)
+        parts = name.split(".")
+        if len(parts) > 1:
+            tokens.append(name)
+        for part in parts:
+            words = [word for word in part.split("_") if word]
+            if len(words) > 1:
+                tokens.append(part)
+            tokens.extend(word for word in words if word not in STOPWORDS and len(word) > 1)
+    return tokens
+
+def document_key(doc: Document) -> str:
+    """Stable id of a chunk: its chunk_id, else a hash of its text."""
+    return doc.metadata.get("chunk_id") or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+class BM25Index:
+    """Okapi BM25 inverted index over document chunks, built at ingestion time.
+
+    Term frequencies are persisted with each chunk, so loading only rebuilds the
+    postings dictionary and never re-tokenizes the corpus.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = {}  # doc id -> {"text", "metadata", "terms": {term: tf}, "length"}
+        self.postings = {}   # term -> {doc id: tf}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _index(self, doc_id: str, entry: Dict[str, Any]):
+        self.documents[doc_id] = entry
+        self.total_length += entry["length"]
+        for term, tf in entry["terms"].items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def _unindex(self, doc_id: str):
+        entry = self.documents.pop(doc_id, None)
+        if entry is None:
+            return
+        self.total_length -= entry["length"]
+        for term in entry["terms"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def add_documents(self, documents: List[Document]):
+        """Index chunks; a chunk whose id is already present is replaced."""
+        with self._lock:
+            for doc in documents:
+                terms = {}
+                tokens = tokenize(doc.page_content)
+                for token in tokens:
+                    terms[token] = terms.get(token, 0) + 1
+                doc_id = document_key(doc)
+                self._unindex(doc_id)
+                self._index(doc_id, {"text": doc.page_content, "metadata": dict(doc.metadata),
+                                     "terms": terms, "length": len(tokens)})
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for doc_id in ids:
+                self._unindex(doc_id)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Return the k best (document, BM25 score) pairs for the query."""
+        with self._lock:
+            if not self.documents:
+                return []
+            count = len(self.documents)
+            average_length = self.total_length / count or 1.0
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self.documents[doc_id]["length"]
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(Document(id=doc_id, page_content=self.documents[doc_id]["text"],
+                              metadata=dict(self.documents[doc_id]["metadata"])), score)
+                    for doc_id, score in best]
+
+    def save(self, path: str):
+        with self._lock:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"k1": self.k1, "b": self.b, "documents": self.documents}, f, default=str)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, entry in data["documents"].items():
+            index._index(doc_id, entry)
+        return index
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """Merge ranked lists: each document scores sum(1 / (rrf_k + rank)) over the lists."""
+    scores, documents = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+class HybridRetriever(BaseRetriever):
+    """Retriever that fuses embedding and BM25 rankings with reciprocal rank fusion."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Any
+    lexical_index: BM25Index
+    k: int = 4
+    candidates: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        semantic = self.vectorstore.similarity_search(query, k=self.candidates)
+        lexical = [doc for doc, _ in self.lexical_index.search(query, k=self.candidates)]
+        return reciprocal_rank_fusion([semantic, lexical], self.rrf_k)[:self.k]
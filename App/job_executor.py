@@ -1,8 +1,8 @@
 import os
 import time
-import subprocess
 import re
 from pathlib import Path
+from executors import get_executor
 
 def wrap_data_analysis_code(code, dataset_path):
     """
@@ -16,8 +16,8 @@ import os
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
 
-# Change to the output directory where the script runs
-os.chdir('/home/vpatel69/R1/App/output/')
+# Run from the output directory the script was written to, whichever backend starts it
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
 print("="*50)
 print("DATA ANALYSIS EXECUTION")
@@ -66,33 +66,6 @@ def indent_code(code, spaces):
     
     return '\\n'.join(indented_lines)
 
-def submit_slurm_job(script_path):
-    """
-    Submit a job to SLURM and return the job ID.
-    """
-    result = subprocess.run(["sbatch", script_path], capture_output=True, text=True)
-    if result.returncode == 0:
-        for line in result.stdout.splitlines():
-            if "Submitted batch job" in line:
-                return line.split()[-1]
-        return result.stdout.strip().split()[-1]
-    else:
-        raise RuntimeError(f"sbatch failed: {result.stderr}")
-
-def wait_for_job(job_id, timeout=300):
-    """
-    Wait for a SLURM job to complete, up to the specified timeout.
-    """
-    start = time.time()
-    while time.time() - start < timeout:
-        status = subprocess.run([
-            "squeue", "-j", job_id, "--noheader"
-        ], capture_output=True, text=True)
-        if not status.stdout.strip():
-            return True
-        time.sleep(3)
-    return False
-
 def extract_execution_time(output):
     """
     Extract execution time from the analysis output.
@@ -138,7 +111,7 @@ def check_job_success(output):
 
 def run_data_analysis(code, dataset_path, output_dir):
     """
-    Run data analysis code using SLURM and return the results.
+    Run data analysis code on the configured execution backend and return the results.
     """
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
@@ -148,7 +121,6 @@ def run_data_analysis(code, dataset_path, output_dir):
     
     # Define file paths
     py_file = Path(output_dir) / f"analysis_{timestamp}.py"
-    sh_file = Path(output_dir) / f"analysis_{timestamp}.sh"
     out_file = Path(output_dir) / f"analysis_{timestamp}.out"
     err_file = Path(output_dir) / f"analysis_{timestamp}.err"
     
@@ -159,41 +131,14 @@ def run_data_analysis(code, dataset_path, output_dir):
     with open(py_file, 'w') as f:
         f.write(wrapped_code)
     
-    # Create SLURM script
-    slurm_script = f"""#!/bin/bash
-#SBATCH -N 1
-#SBATCH -c 4
-#SBATCH -t 0-00:10:00
-#SBATCH -p general
-#SBATCH -q public
-#SBATCH -G 1
-#SBATCH -o {out_file}
-#SBATCH -e {err_file}
-#SBATCH --export=NONE
-
-module load mamba/latest
-CUDA_MODULES=$(module avail cuda 2>&1 | grep -E "cuda-[0-9]+\\.[0-9]+\\.[0-9]+-gcc" | grep -v "ont-guppy" | sort -V)
-if [ -z "$CUDA_MODULES" ]; then echo "No CUDA modules found!"; exit 1; fi
-LATEST_CUDA=$(echo "$CUDA_MODULES" | tail -1 | awk '{{print $1}}')
-module load $LATEST_CUDA
-source activate rapids25.02
-cd {output_dir}
-python {py_file.name}
-"""
-    
-    with open(sh_file, 'w') as f:
-        f.write(slurm_script)
-    
-    # Make shell script executable
-    os.chmod(sh_file, 0o755)
-    
     try:
         # Submit job
-        job_id = submit_slurm_job(str(sh_file))
-        print(f"Submitted job {job_id}")
+        executor = get_executor()
+        job_id = executor.submit(py_file, out_file, err_file, kind="gpu", timeout=600)  # 10 minute timeout
+        print(f"Submitted job {job_id} ({executor.name})")
         
         # Wait for completion
-        if wait_for_job(job_id, timeout=600):  # 10 minute timeout
+        if executor.wait(job_id, timeout=600)["done"]:
             # Read output
             if out_file.exists():
                 with open(out_file, 'r') as f:
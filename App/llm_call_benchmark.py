@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Single-pass vs two-pass code analysis benchmark
+
+Runs GPUMentor.process_user_input on the sample programs twice per repeat: once with the
+original two-call path (RAG answer, then CodeOptimizer.suggest_optimizations) and once with
+the single-pass structured generation. Reports LLM calls, prompt/generated tokens (as
+counted by Ollama) and wall-clock per request. Requires a running Ollama server; the LLM
+response cache is disabled so every request reaches the model.
+
+Usage:
+    python llm_call_benchmark.py [--samples NAME ...] [--repeats N] [--question TEXT]
+"""
+
+import argparse
+import time
+import statistics
+from langchain_core.messages import HumanMessage
+from rag_agent import RAGAgent
+from code_optimizer import CodeOptimizer
+from gpu_mentor import GPUMentor
+from samples import SAMPLE_CODES
+
+MODES = [("two-pass", False), ("single-pass", True)]
+
+def run_request(mentor: GPUMentor, question: str, code: str):
+    """Run one request; return (seconds, token usage)."""
+    mentor.rag_agent.reset_token_usage()
+    start_time = time.perf_counter()
+    mentor.process_user_input(question, code)
+    return time.perf_counter() - start_time, mentor.rag_agent.get_token_usage()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM calls, tokens and latency of two-pass and single-pass code analysis")
+    parser.add_argument("--samples", nargs="+", default=list(SAMPLE_CODES)[:3], help="Sample program names")
+    parser.add_argument("--repeats", type=int, default=2, help="Requests per sample and mode")
+    parser.add_argument("--question", default="How can I make this code faster on a GPU?")
+    args = parser.parse_args()
+
+    rag_agent = RAGAgent()
+    if not rag_agent.code_llm_model:
+        parser.error("the code LLM is not available; start Ollama first")
+    rag_agent.llm_cache = None
+    mentor = GPUMentor(rag_agent, CodeOptimizer(rag_agent))
+
+    # Load the model before timing anything
+    rag_agent.invoke_llm([HumanMessage(content="Reply with OK.")], "code", use_cache=False)
+
+    results = {name: [] for name, _ in MODES}
+    print(f"\n{'mode':<12} {'sample':<28} {'calls':>5} {'in tok':>7} {'out tok':>8} {'seconds':>8}")
+    for repeat in range(args.repeats):
+        for sample in args.samples:
+            # Alternate the order so model warmth and load drift hit both modes equally
+            for name, single_pass in (MODES if repeat % 2 == 0 else MODES[::-1]):
+                mentor.single_pass_analysis = single_pass
+                seconds, usage = run_request(mentor, args.question, SAMPLE_CODES[sample])
+                results[name].append((seconds, usage))
+                print(f"{name:<12} {sample[:28]:<28} {usage['calls']:>5} {usage['input_tokens']:>7} "
+                      f"{usage['output_tokens']:>8} {seconds:>8.2f}")
+
+    print(f"\n{'mode':<12} {'calls/req':>9} {'tokens/req':>10} {'median s':>9}")
+    summary = {}
+    for name, runs in results.items():
+        calls = statistics.mean(usage["calls"] for _, usage in runs)
+        tokens = statistics.mean(usage["input_tokens"] + usage["output_tokens"] for _, usage in runs)
+        median = statistics.median(seconds for seconds, _ in runs)
+        summary[name] = (tokens, median)
+        print(f"{name:<12} {calls:>9.1f} {tokens:>10.0f} {median:>9.2f}")
+
+    (before_tokens, before_seconds), (after_tokens, after_seconds) = summary["two-pass"], summary["single-pass"]
+    if after_tokens and after_seconds:
+        print(f"\nSingle pass: {before_tokens / after_tokens:.2f}x fewer tokens, "
+              f"{before_seconds / after_seconds:.2f}x faster per request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import time
+import threading
+from typing import Dict, Any
+import requests
+from config import (MODEL_HEALTH_INTERVAL, MODEL_HEALTH_TIMEOUT,
+                    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+# requests and Ollama client connection failures are OSErrors; httpx timeouts are not
+try:
+    import httpx
+    CONNECTION_ERRORS = (OSError, httpx.TransportError)
+except ImportError:
+    CONNECTION_ERRORS = (OSError,)
+
+class ModelUnavailableError(RuntimeError):
+    """Raised instead of calling a model that is known to be unreachable or not installed."""
+
+class ModelHealthMonitor:
+    """Cached health of one Ollama server, refreshed by background /api/tags probes.
+
+    Connection failures from probes and real requests feed a circuit breaker: after
+    failure_threshold consecutive failures the circuit opens and check() fails fast.
+    Once reset_timeout has passed a single trial request is let through (half-open);
+    its outcome, or the next successful probe, closes or re-opens the circuit.
+    """
+
+    def __init__(self, base_url: str, interval: float = MODEL_HEALTH_INTERVAL,
+                 timeout: float = MODEL_HEALTH_TIMEOUT,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.base_url = base_url
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed -> open -> half_open -> closed
+        self.models = None  # Model names from the last successful probe
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self.last_checked = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Probe now and then every interval seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def probe(self) -> bool:
+        """List the installed models; cheap compared with a generation."""
+        try:
+            response = requests.get(f"{self.base_url.rstrip('/')}/api/tags", timeout=self.timeout)
+            response.raise_for_status()
+            models = {model.get("name") for model in response.json().get("models", [])}
+        except Exception as e:
+            self._count_failure(str(e))
+            return False
+        with self._lock:
+            self.models = models
+            self.last_checked = time.time()
+        self.record_success()
+        return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"✅ Ollama at {self.base_url} is reachable again")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.last_error = None
+
+    def record_failure(self, error: Exception):
+        """Count a failed request; errors that are not connection problems leave the circuit alone."""
+        if isinstance(error, CONNECTION_ERRORS):
+            self._count_failure(str(error))
+
+    def _count_failure(self, message: str):
+        with self._lock:
+            self.last_checked = time.time()
+            self.last_error = message
+            self.consecutive_failures += 1
+            if self.state == "half_open" or (self.state == "closed"
+                                             and self.consecutive_failures >= self.failure_threshold):
+                if self.state == "closed":
+                    print(f"⚠️ Ollama at {self.base_url} unreachable, failing fast for {self.reset_timeout}s")
+                self.state = "open"
+                self.opened_at = time.time()
+
+    def allow_request(self) -> bool:
+        """False while the circuit is open; admits one trial request once it may have recovered."""
+        with self._lock:
+            now = time.time()
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.trial_started = now
+                return True
+            # A trial that never reported back (e.g. an abandoned stream) must not block forever
+            if self.state == "half_open" and now - self.trial_started >= self.reset_timeout:
+                self.trial_started = now
+                return True
+            return False
+
+    def has_model(self, model: str) -> bool:
+        """True unless a probe has shown that the model is not installed."""
+        models = self.models
+        if models is None or not model:
+            return True
+        return model in models or f"{model}:latest" in models
+
+    def check(self, model: str = None):
+        """Raise ModelUnavailableError instead of letting a request hang on a dead server."""
+        if not self.allow_request():
+            retry_in = max(0.0, self.reset_timeout - (time.time() - self.opened_at))
+            raise ModelUnavailableError(
+                f"Ollama at {self.base_url} is unreachable ({self.last_error}); retrying in {retry_in:.0f}s"
+            )
+        if not self.has_model(model):
+            raise ModelUnavailableError(f"Model {model} is not installed on {self.base_url}; run `ollama pull {model}`")
+
+    def is_available(self, model: str = None) -> bool:
+        with self._lock:
+            circuit_closed = self.state == "closed"
+        return circuit_closed and self.has_model(model)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "base_url": self.base_url,
+                "state": self.state,
+                "models": sorted(self.models) if self.models is not None else None,
+                "consecutive_failures": self.consecutive_failures,
+                "last_checked": self.last_checked,
+                "last_error": self.last_error,
+            }
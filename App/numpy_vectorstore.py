@@ -0,0 +1,252 @@
+import os
+import json
+import math
+import uuid
+import threading
+from typing import List, Dict, Any, Tuple, Iterable, Optional
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as BaseVectorStore
+from ann_index import IVFIndex
+
+class NumpyVectorStore(BaseVectorStore):
+    """Exact cosine-similarity vector index backed by a contiguous float32 NumPy matrix.
+
+    Vectors are normalized on insert, so a search is one matrix product followed by an
+    argpartition top-k. The matrix grows by doubling its capacity, deletes swap the last
+    row into the freed slot, and a saved index is reopened as a read-only memmap.
+    An optional IVF index (build_ann_index) replaces the exact scan for large stores.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    DOCSTORE_FILE = "docstore.json"
+    ANN_FILE = "ivf_index.npz"
+
+    def __init__(self, embedding: Embeddings, persist_directory: str = None):
+        self.embedding = embedding
+        self.persist_directory = persist_directory
+        self.dim = None
+        self._matrix = None  # rows [0, _size) are live, the rest is spare capacity
+        self._size = 0
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self._positions = {}
+        self.ann_index = None
+        self._lock = threading.RLock()
+        if persist_directory and os.path.exists(os.path.join(persist_directory, self.DOCSTORE_FILE)):
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, rows: int):
+        """Make room for `rows` more vectors, doubling capacity (and leaving any memmap)."""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._size + rows <= capacity and not isinstance(self._matrix, np.memmap):
+            return
+        new_capacity = max(self._size + rows, 2 * capacity, 64)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """Embed and add texts; an id that is already present is replaced."""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [i or str(uuid.uuid4()) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = self._normalize(self.embedding.embed_documents(texts))
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension changed from {self.dim} to {vectors.shape[1]}")
+            self._reserve(len(texts))
+            rows = []
+            for doc_id, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                row = self._positions.get(doc_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._positions[doc_id] = row
+                    self.ids.append(doc_id)
+                    self.texts.append(text)
+                    self.metadatas.append(dict(metadata))
+                else:
+                    self.texts[row] = text
+                    self.metadatas[row] = dict(metadata)
+                self._matrix[row] = vector
+                rows.append(row)
+            if self.ann_index is not None:
+                self.ann_index.set_rows(rows, vectors)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete vectors by id; unknown ids are ignored."""
+        with self._lock:
+            if not ids or not self._size:
+                return False
+            self._reserve(0)
+            for doc_id in ids:
+                row = self._positions.pop(doc_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    # Move the last row into the freed slot so the live rows stay contiguous
+                    self._matrix[row] = self._matrix[last]
+                    self.ids[row] = self.ids[last]
+                    self.texts[row] = self.texts[last]
+                    self.metadatas[row] = self.metadatas[last]
+                    self._positions[self.ids[row]] = row
+                if self.ann_index is not None:
+                    self.ann_index.remove_row(row, last)
+                self.ids.pop()
+                self.texts.pop()
+                self.metadatas.pop()
+                self._size -= 1
+        return True
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        with self._lock:
+            return [self._document(self._positions[doc_id]) for doc_id in ids if doc_id in self._positions]
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+
+    def _matches(self, row: int, filter: Dict[str, Any]) -> bool:
+        metadata = self.metadatas[row]
+        return all(metadata.get(key) == value for key, value in filter.items())
+
+    def build_ann_index(self, nlist: int = None, nprobe: int = 16):
+        """Train an IVF index over the current vectors; nlist defaults to ~4 * sqrt(n)."""
+        with self._lock:
+            if not self._size:
+                return
+            nlist = nlist or max(1, int(4 * math.sqrt(self._size)))
+            self.ann_index = IVFIndex(nlist, nprobe)
+            self.ann_index.train(self._matrix[:self._size])
+
+    def _top_k(self, queries: np.ndarray, k: int, filter: Dict[str, Any] = None) -> List[List[Tuple[int, float]]]:
+        """Return (row, score) pairs of the k best rows for each normalized query vector."""
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if self.ann_index is not None and not filter:
+            # Metadata filters fall back to the exact scan so filtered results stay complete
+            return [[(int(row), float(score)) for row, score in zip(rows, scores)]
+                    for rows, scores in self.ann_index.search(self._matrix[:self._size], queries, k)]
+        scores = queries @ self._matrix[:self._size].T  # (queries, rows)
+        if filter:
+            mask = np.array([self._matches(row, filter) for row in range(self._size)])
+            scores[:, ~mask] = -np.inf
+        k = min(k, self._size)
+        if k < self._size:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(self._size), scores.shape)
+        top_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        results = []
+        for rows, row_scores in zip(np.take_along_axis(candidates, order, axis=1),
+                                    np.take_along_axis(top_scores, order, axis=1)):
+            results.append([(int(row), float(score)) for row, score in zip(rows, row_scores)
+                            if score != -np.inf])
+        return results
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
+        with self._lock:
+            hits = self._top_k(self._normalize(embedding), k, filter)[0]
+            return [(self._document(row), score) for row, score in hits]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Dict[str, Any] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Dict[str, Any] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Dict[str, Any] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def batch_similarity_search(self, queries: List[str], k: int = 4,
+                                filter: Dict[str, Any] = None) -> List[List[Tuple[Document, float]]]:
+        """Search several queries with a single matrix product."""
+        if not queries:
+            return []
+        vectors = self._normalize([self.embedding.embed_query(query) for query in queries])
+        with self._lock:
+            return [[(self._document(row), score) for row, score in hits]
+                    for hits in self._top_k(vectors, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def persist(self):
+        """Save the vectors and documents to persist_directory (no-op when in memory)."""
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            vectors = self._matrix[:self._size] if self._size else np.empty((0, self.dim or 0), dtype=np.float32)
+            vectors_path = os.path.join(self.persist_directory, self.VECTORS_FILE)
+            docstore_path = os.path.join(self.persist_directory, self.DOCSTORE_FILE)
+            # Write to temporary files and swap them in, so an open memmap keeps its old file
+            np.save(f"{vectors_path}.tmp.npy", vectors)
+            os.replace(f"{vectors_path}.tmp.npy", vectors_path)
+            with open(f"{docstore_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump({"dim": self.dim, "ids": self.ids, "texts": self.texts,
+                           "metadatas": self.metadatas}, f, default=str)
+            os.replace(f"{docstore_path}.tmp", docstore_path)
+            ann_path = os.path.join(self.persist_directory, self.ANN_FILE)
+            if self.ann_index is not None:
+                self.ann_index.save(ann_path)
+            elif os.path.exists(ann_path):
+                os.remove(ann_path)
+
+    def _load(self):
+        with open(os.path.join(self.persist_directory, self.DOCSTORE_FILE), 'r', encoding='utf-8') as f:
+            docstore = json.load(f)
+        self.dim = docstore["dim"]
+        self.ids = docstore["ids"]
+        self.texts = docstore["texts"]
+        self.metadatas = docstore["metadatas"]
+        self._positions = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._size = len(self.ids)
+        if self._size:
+            # Queries page vectors in on demand; the first write copies them into memory
+            self._matrix = np.load(os.path.join(self.persist_directory, self.VECTORS_FILE), mmap_mode='r')
+        ann_path = os.path.join(self.persist_directory, self.ANN_FILE)
+        if os.path.exists(ann_path):
+            self.ann_index = IVFIndex.load(ann_path)
+            if len(self.ann_index.assignments) != self._size:
+                print("⚠️ IVF index does not match the stored vectors, ignoring it")
+                self.ann_index = None
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: str = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
@@ -0,0 +1,305 @@
+import time
+import socket
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Iterator, AsyncIterator
+import httpx
+import requests
+from ollama import Client
+from langchain_ollama import ChatOllama
+from model_health import ModelHealthMonitor, ModelUnavailableError
+from config import (OLLAMA_BASE_URL, OLLAMA_PORT, OLLAMA_ENDPOINTS, OLLAMA_LOAD_BALANCING,
+                    OLLAMA_MAX_CONNECTIONS, OLLAMA_KEEP_ALIVE, LLM_TEMPERATURE,
+                    MODEL_HEALTH_CHECKS, MODEL_HEALTH_TIMEOUT)
+
+def normalize_endpoint(url: str) -> str:
+    return url.rstrip("/") + "/"
+
+def discover_default_endpoint(timeout: float = MODEL_HEALTH_TIMEOUT) -> str:
+    """The Ollama server on this node: its hostname first (SLURM compute nodes), then OLLAMA_BASE_URL.
+
+    Both candidates are probed at once and the lookup gives up after timeout seconds in
+    total, so an unreachable host or slow DNS cannot hold up startup for longer.
+    """
+    candidates = [f"http://{socket.gethostname()}:{OLLAMA_PORT}/", OLLAMA_BASE_URL]
+
+    def probe(url: str) -> bool:
+        try:
+            return requests.get(f"{url.rstrip('/')}/api/tags", timeout=timeout).ok
+        except requests.RequestException:
+            return False
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="ollama-discovery")
+    futures = [executor.submit(probe, url) for url in candidates]
+    wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+    for url, future in zip(candidates, futures):
+        if future.done() and future.result():
+            return normalize_endpoint(url)
+    return normalize_endpoint(OLLAMA_BASE_URL)
+
+class OllamaClientRegistry:
+    """Shared ChatOllama instances and HTTP connection pools for one or more Ollama servers.
+
+    ChatOllama objects are deduplicated by (model, base_url) and every model on a server
+    uses that server's keep-alive pool: one httpx transport the registry owns, handed to
+    each ChatOllama through its public client kwargs. chat_model() returns a BalancedChatOllama that
+    spreads calls over the healthy servers ("least_busy" or "round_robin"). Every request
+    asks Ollama to keep the model loaded for keep_alive; warm_up() loads models ahead of use.
+    """
+
+    def __init__(self, endpoints: List[str] = None, temperature: float = LLM_TEMPERATURE,
+                 strategy: str = OLLAMA_LOAD_BALANCING, max_connections: int = OLLAMA_MAX_CONNECTIONS,
+                 health_checks: bool = MODEL_HEALTH_CHECKS, keep_alive=OLLAMA_KEEP_ALIVE):
+        endpoints = endpoints or OLLAMA_ENDPOINTS or [discover_default_endpoint()]
+        self.endpoints = list(dict.fromkeys(normalize_endpoint(url) for url in endpoints))
+        self.temperature = temperature
+        self.strategy = strategy
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.ready = threading.Event()  # Set once warm_up() has loaded every model somewhere
+        self.warm_up_status = {"state": "idle", "load_seconds": {}, "errors": {}}
+        self.health_monitors = {}  # base_url -> ModelHealthMonitor
+        if health_checks:
+            for url in self.endpoints:
+                self.health_monitors[url] = ModelHealthMonitor(url)
+                self.health_monitors[url].start()
+        self._llms = {}  # (model, base_url) -> ChatOllama
+        self._transports = {}  # base_url -> httpx.HTTPTransport (the connection pool)
+        self._clients = {}  # base_url -> Client, for warm-up requests
+        # httpx async pools are bound to the event loop that opened their connections
+        self._async_transports = weakref.WeakKeyDictionary()  # event loop -> {base_url: httpx.AsyncHTTPTransport}
+        self._async_llms = weakref.WeakKeyDictionary()  # event loop -> {(model, base_url): ChatOllama}
+        self._balanced = {}  # model -> BalancedChatOllama
+        self._in_flight = {url: 0 for url in self.endpoints}
+        self._requests = {url: 0 for url in self.endpoints}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _transport(self, base_url: str) -> httpx.HTTPTransport:
+        if base_url not in self._transports:
+            self._transports[base_url] = httpx.HTTPTransport(limits=self._limits())
+        return self._transports[base_url]
+
+    def _client(self, base_url: str) -> Client:
+        if base_url not in self._clients:
+            self._clients[base_url] = Client(host=base_url, transport=self._transport(base_url))
+        return self._clients[base_url]
+
+    def _new_llm(self, model: str, base_url: str, **client_kwargs) -> ChatOllama:
+        return ChatOllama(model=model, temperature=self.temperature, base_url=base_url,
+                          keep_alive=self.keep_alive, **client_kwargs)
+
+    def get_llm(self, model: str, base_url: str) -> ChatOllama:
+        """The shared ChatOllama for a model on one server (for synchronous calls)."""
+        key = (model, normalize_endpoint(base_url))
+        with self._lock:
+            if key not in self._llms:
+                self._llms[key] = self._new_llm(*key, sync_client_kwargs={"transport": self._transport(key[1])})
+            return self._llms[key]
+
+    def get_async_llm(self, model: str, base_url: str) -> ChatOllama:
+        """The shared ChatOllama for a model on one server, for the running event loop."""
+        key = (model, normalize_endpoint(base_url))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            llms = self._async_llms.setdefault(loop, {})
+            if key not in llms:
+                transports = self._async_transports.setdefault(loop, {})
+                if key[1] not in transports:
+                    transports[key[1]] = httpx.AsyncHTTPTransport(limits=self._limits())
+                llms[key] = self._new_llm(*key, async_client_kwargs={"transport": transports[key[1]]})
+            return llms[key]
+
+    def chat_model(self, model: str) -> "BalancedChatOllama":
+        """One load-balanced model handle per model name (chat and code share it when equal)."""
+        with self._lock:
+            if model not in self._balanced:
+                self._balanced[model] = BalancedChatOllama(self, model)
+            return self._balanced[model]
+
+    def warm_up(self, models: List[str]) -> Dict[str, Any]:
+        """Load each model on every reachable server and keep it resident for keep_alive.
+
+        An empty /api/generate request loads the model without generating anything.
+        """
+        models = list(dict.fromkeys(models))
+        self.warm_up_status["state"] = "loading"
+        loaded = set()
+        for url in self.endpoints:
+            monitor = self.health_monitors.get(url)
+            for model in models:
+                if monitor and not monitor.has_model(model):
+                    self.warm_up_status["errors"][f"{model}@{url}"] = "model not installed"
+                    continue
+                start_time = time.perf_counter()
+                try:
+                    with self._lock:
+                        client = self._client(url)
+                    client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+                except Exception as e:
+                    self.warm_up_status["errors"][f"{model}@{url}"] = str(e)
+                    print(f"⚠️ Could not pre-load {model} on {url}: {e}")
+                    if monitor:
+                        monitor.record_failure(e)
+                    continue
+                seconds = time.perf_counter() - start_time
+                self.warm_up_status["load_seconds"][f"{model}@{url}"] = round(seconds, 2)
+                loaded.add(model)
+                print(f"🔥 {model} loaded on {url} in {seconds:.1f}s (keep_alive={self.keep_alive})")
+        if loaded == set(models):
+            self.warm_up_status["state"] = "ready"
+            self.ready.set()
+        else:
+            self.warm_up_status["state"] = "failed"
+        return self.warm_up_status
+
+    def warm_up_in_background(self, models: List[str]) -> threading.Thread:
+        thread = threading.Thread(target=self.warm_up, args=(models,), name="ollama-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def acquire(self, model: str) -> str:
+        """Pick the server for the next call to model and count it as in flight."""
+        with self._lock:
+            candidates = [url for url in self.endpoints
+                          if url not in self.health_monitors or self.health_monitors[url].is_available(model)]
+        if not candidates:
+            # Every server is down or lacks the model: let an open circuit run its trial request
+            for url in self.endpoints:
+                monitor = self.health_monitors[url]
+                if monitor.has_model(model) and monitor.allow_request():
+                    candidates = [url]
+                    break
+            else:
+                raise ModelUnavailableError(f"No Ollama server available for {model}: " + "; ".join(
+                    f"{url} {self.health_monitors[url].state} ({self.health_monitors[url].last_error})"
+                    for url in self.endpoints))
+
+        with self._lock:
+            start = self._next % len(candidates)
+            self._next += 1
+            rotated = candidates[start:] + candidates[:start]
+            if self.strategy == "least_busy":
+                url = min(rotated, key=lambda candidate: self._in_flight[candidate])
+            else:
+                url = rotated[0]
+            self._in_flight[url] += 1
+            self._requests[url] += 1
+            return url
+
+    def release(self, base_url: str, error: Exception = None):
+        """Finish a call started with acquire() and report its outcome to the health monitor."""
+        with self._lock:
+            self._in_flight[base_url] -= 1
+        monitor = self.health_monitors.get(base_url)
+        if monitor:
+            if error is None:
+                monitor.record_success()
+            else:
+                monitor.record_failure(error)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [{"base_url": url, "in_flight": self._in_flight[url], "requests": self._requests[url]}
+                    for url in self.endpoints]
+        for row in rows:
+            monitor = self.health_monitors.get(row["base_url"])
+            if monitor:
+                row.update(monitor.status())
+        return rows
+
+    def close(self):
+        for monitor in self.health_monitors.values():
+            monitor.stop()
+        for transport in self._transports.values():
+            transport.close()
+
+class BalancedChatOllama:
+    """Drop-in for the ChatOllama calls RAGAgent makes, routed through the registry.
+
+    base_url names the whole endpoint group, so LLM cache keys do not depend on which
+    server produced a response.
+    """
+
+    def __init__(self, registry: OllamaClientRegistry, model: str):
+        self.registry = registry
+        self.model = model
+        self.temperature = registry.temperature
+        self.base_url = ",".join(registry.endpoints)
+
+    def is_available(self) -> bool:
+        monitors = self.registry.health_monitors
+        return not monitors or any(monitor.is_available(self.model) for monitor in monitors.values())
+
+    def _call(self, messages, tools=None):
+        url = self.registry.acquire(self.model)
+        llm = self.registry.get_llm(self.model, url)
+        try:
+            result = (llm.bind_tools(tools) if tools else llm).invoke(messages)
+        except Exception as e:
+            self.registry.release(url, e)
+            raise
+        self.registry.release(url)
+        return result
+
+    async def _acall(self, messages, tools=None):
+        url = self.registry.acquire(self.model)
+        llm = self.registry.get_async_llm(self.model, url)
+        try:
+            result = await (llm.bind_tools(tools) if tools else llm).ainvoke(messages)
+        except Exception as e:
+            self.registry.release(url, e)
+            raise
+        self.registry.release(url)
+        return result
+
+    def invoke(self, messages):
+        return self._call(messages)
+
+    async def ainvoke(self, messages):
+        return await self._acall(messages)
+
+    def stream(self, messages) -> Iterator:
+        url = self.registry.acquire(self.model)
+        error = None
+        try:
+            yield from self.registry.get_llm(self.model, url).stream(messages)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.registry.release(url, error)
+
+    async def astream(self, messages) -> AsyncIterator:
+        url = self.registry.acquire(self.model)
+        error = None
+        try:
+            async for chunk in self.registry.get_async_llm(self.model, url).astream(messages):
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.registry.release(url, error)
+
+    def bind_tools(self, tools) -> "_BoundTools":
+        return _BoundTools(self, tools)
+
+class _BoundTools:
+    """bind_tools() result whose server is chosen per call, not at bind time."""
+
+    def __init__(self, model: BalancedChatOllama, tools):
+        self.model = model
+        self.tools = tools
+
+    def invoke(self, messages):
+        return self.model._call(messages, self.tools)
+
+    async def ainvoke(self, messages):
+        return await self.model._acall(messages, self.tools)
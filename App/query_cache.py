@@ -0,0 +1,156 @@
+import re
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional
+import numpy as np
+from pydantic import ConfigDict
+from langchain.docstore.document import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+def _copy_documents(documents: List[Document]) -> List[Document]:
+    # Callers may edit metadata; never hand out the cached objects themselves
+    return [Document(id=doc.id, page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc in documents]
+
+class QueryCache:
+    """LRU + TTL cache of retrieval results keyed on normalized query text.
+
+    With embed_query and semantic_threshold set, a query that misses the exact tier
+    reuses the results of a cached query whose embedding has cosine similarity of at
+    least semantic_threshold.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600,
+                 semantic_threshold: float = None, embed_query: Callable[[str], List[float]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.embed_query = embed_query
+        self.entries = OrderedDict()  # normalized query -> (stored_at, documents, vector)
+        self.generation = 0
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return bool(self.semantic_threshold and self.embed_query)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, query: str) -> Optional[List[Document]]:
+        """Return cached documents for the query, or None on a miss."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy_documents(entry[1])
+                del self.entries[key]
+
+        if self.semantic_enabled:
+            vector = self._unit(self.embed_query(query))
+            with self._lock:
+                best_key, best_score = None, self.semantic_threshold
+                for cached_key, (stored_at, _, cached_vector) in self.entries.items():
+                    if cached_vector is None or self._expired(stored_at):
+                        continue
+                    score = float(vector @ cached_vector)
+                    if score >= best_score:
+                        best_key, best_score = cached_key, score
+                if best_key is not None:
+                    self.entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return _copy_documents(self.entries[best_key][1])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query: str, documents: List[Document], generation: int = None):
+        """Cache results; results computed before the last invalidation are dropped."""
+        if self.max_entries <= 0:
+            return
+        vector = self._unit(self.embed_query(query)) if self.semantic_enabled else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            key = normalize_query(query)
+            self.entries[key] = (time.time(), _copy_documents(documents), vector)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every entry; called whenever the underlying index changes."""
+        with self._lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+class CachedRetriever(BaseRetriever):
+    """Retriever wrapper that answers repeated queries from a QueryCache."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    cache: QueryCache
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self.cache.get(query)
+        if documents is not None:
+            print(f"⚡ Retrieval cache hit for: {query[:60]}")
+            return documents
+        generation = self.cache.generation
+        documents = self.retriever.invoke(query)
+        self.cache.put(query, documents, generation)
+        return documents
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        # The semantic tier embeds the query, which is too slow to run on the event loop
+        if self.cache.semantic_enabled:
+            documents = await asyncio.to_thread(self.cache.get, query)
+        else:
+            documents = self.cache.get(query)
+        if documents is not None:
+            print(f"⚡ Retrieval cache hit for: {query[:60]}")
+            return documents
+        generation = self.cache.generation
+        documents = await self.retriever.ainvoke(query)
+        if self.cache.semantic_enabled:
+            await asyncio.to_thread(self.cache.put, query, documents, generation)
+        else:
+            self.cache.put(query, documents, generation)
+        return documents
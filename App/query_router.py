@@ -0,0 +1,173 @@
+import re
+import threading
+from typing import List, Dict, Tuple, Callable
+import numpy as np
+from config import QUERY_ROUTER_EMBEDDING_THRESHOLD
+
+# Each list is compiled into one alternation, so a category costs a single regex scan
+CODE_REQUEST_PATTERNS = [
+    r'what does this code do', r'explain this code', r'analyze.*code', r'what is this code',
+    r'how does this code work', r'what does.*code.*do', r'optimize.*code', r'accelerate.*code',
+    r'make.*code.*faster', r'convert.*code',
+]
+CODE_INDICATORS = ['import ', 'def ', 'class ', 'np.', 'pd.', 'for ', 'if ', '=', '()', 'numpy', 'pandas', 'sklearn']
+GPU_PATTERNS = [
+    r'\bgpu acceleration\b', r'\bcuda programming\b', r'\bcupy\b', r'\bcudf\b', r'\bcuml\b',
+    r'\brapids\b', r'\bnvidia\b', r'\boptimize.*gpu\b', r'\baccelerating.*gpu\b',
+    r'\bgpu.*performance\b', r'\bconvert.*cupy\b', r'\bconvert.*cudf\b', r'\bparallel.*gpu\b',
+    r'\bgpu.*computing\b', r'\bconvert.*to.*gpu\b', r'\bmake.*faster.*gpu\b',
+    r'help with.*gpu.*acceleration', r'suggest.*gpu.*acceleration', r'data analysis.*gpu',
+    r'gpu.*data analysis', r'accelerated.*analyses', r'gpu.*operations',
+]
+# Every GPU pattern contains one of these words. A cheap literal scan for them skips the
+# full alternation, whose leading \b assertions defeat the regex engine's prefix search.
+GPU_KEYWORDS = ['gpu', 'cuda', 'cupy', 'cudf', 'cuml', 'rapids', 'nvidia', 'accelerated']
+LIBRARIES = ['numpy', 'pandas', 'sklearn']
+CODE_WORDS = ['analyze', 'optimize', 'convert', 'explain']
+
+FOLLOWUP_PATTERNS = [
+    r'what about', r'how about', r'and what', r'can you also', r'what if', r'tell me more',
+    r'explain more', r'go into more detail', r'elaborate',
+    r'\bthat\b', r'\bthis\b', r'\bit\b', r'\bthem\b', r'\bthose\b', r'\bthese\b',
+]
+# General chat intents with canned answers, highest priority first
+CHAT_INTENT_PATTERNS = [
+    ("greeting", [r'\bhello\b', r'\bhi\b', r'\bhey\b']),
+    ("identity", [r'who are you', r'what are you']),
+    ("capabilities", [r'what can you do']),
+    ("explain_code", [r'what does this code do', r'explain this code', r'what is this']),
+    ("thanks", [r'thank you', r'thanks']),
+    ("goodbye", [r'\bbye\b', r'goodbye']),
+    ("how_are_you", [r'how are you']),
+    ("define_llm", [r'what is (?:an? )?llm']),
+    ("define_ai", [r'what is (?:artificial intelligence|ai)\b']),
+    ("define_ml", [r'what is (?:machine learning|ml)\b']),
+    ("define_python", [r'what is python']),
+]
+
+# Labeled exemplars for the optional embedding classifier, consulted only when no rule matches
+ROUTE_EXEMPLARS = {
+    "gpu_question": [
+        "How do I speed up array math on the graphics card?",
+        "Can my dataframe joins run on the GPU?",
+        "Which library replaces scikit-learn for GPU training?",
+        "How much faster is matrix multiplication on a GPU than a CPU?",
+        "How do I move data between host and device memory efficiently?",
+        "Why is my CUDA kernel slow?",
+        "How do I run k-means clustering on a GPU?",
+        "What is the best way to parallelize numerical code on GPUs?",
+    ],
+    "general_chat": [
+        "What is the capital of France?",
+        "Can you recommend a good book?",
+        "How do I write a for loop in Python?",
+        "What time zone is Arizona in?",
+        "Tell me a joke",
+        "How do I install a package with pip?",
+        "What is the difference between a list and a tuple?",
+        "How do I read a text file line by line?",
+    ],
+}
+
+def _alternation(patterns: List[str], literal: bool = False) -> re.Pattern:
+    return re.compile("|".join(f"(?:{re.escape(p) if literal else p})" for p in patterns))
+
+class QueryRouter:
+    """Precompiled query classification returning (route, confidence).
+
+    Routes are "code_analysis", "gpu_question" and "general_chat". Rules follow the
+    original cascade (code fences, code requests with code, GPU topics, library mentions),
+    but each rule group is one compiled alternation. When no rule matches and embed_query
+    is set, the query is compared with the labeled exemplars and sent to the most similar
+    route if the cosine similarity reaches embedding_threshold.
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]] = None,
+                 embedding_threshold: float = QUERY_ROUTER_EMBEDDING_THRESHOLD,
+                 exemplars: Dict[str, List[str]] = None):
+        self.code_request = _alternation(CODE_REQUEST_PATTERNS)
+        self.code_indicator = _alternation(CODE_INDICATORS, literal=True)
+        self.gpu_topic = _alternation(GPU_PATTERNS)
+        self.gpu_keyword = _alternation(GPU_KEYWORDS, literal=True)
+        self.library = _alternation(LIBRARIES, literal=True)
+        self.code_word = _alternation(CODE_WORDS, literal=True)
+        self.followup = _alternation(FOLLOWUP_PATTERNS)
+        self.chat_intent_priority = {intent: rank for rank, (intent, _) in enumerate(CHAT_INTENT_PATTERNS)}
+        self.chat_intents = re.compile("|".join(
+            f"(?P<{intent}>{'|'.join(patterns)})" for intent, patterns in CHAT_INTENT_PATTERNS
+        ))
+        self.embed_query = embed_query
+        self.embedding_threshold = embedding_threshold
+        self.exemplars = exemplars or ROUTE_EXEMPLARS
+        self._centroids = None  # route -> unit vector, computed on first use
+        self._lock = threading.Lock()
+
+    def set_embedder(self, embed_query: Callable[[str], List[float]]):
+        """Enable the exemplar classifier with an embedding function (e.g. the vector store's)."""
+        with self._lock:
+            self.embed_query = embed_query
+            self._centroids = None
+
+    def looks_like_code(self, text: str) -> bool:
+        return "```" in text or bool(self.code_indicator.search(text))
+
+    def route(self, question: str) -> Tuple[str, float]:
+        """Return the route for a question and a confidence between 0 and 1."""
+        if "```" in question:
+            return "code_analysis", 1.0
+        question_lower = question.lower().strip()
+
+        # Asking about code only goes to the code model when the question contains code
+        if "code" in question_lower and self.code_request.search(question_lower):
+            if self.code_indicator.search(question):
+                return "code_analysis", 0.9
+            return "general_chat", 0.8
+
+        if self.gpu_keyword.search(question_lower) and self.gpu_topic.search(question_lower):
+            return "gpu_question", 0.9
+
+        # A library mentioned in a general context rather than as code to work on
+        if self.library.search(question_lower) and not self.code_word.search(question_lower):
+            return "gpu_question", 0.7
+
+        if self.embed_query:
+            try:
+                return self._nearest_route(question)
+            except Exception as e:
+                print(f"⚠️ Embedding router failed, using rules only: {e}")
+        return "general_chat", 0.5
+
+    def chat_intent(self, question: str, has_context: bool = False) -> Tuple[str, float]:
+        """Classify a general chat question: a follow-up, a canned-answer intent or "open"."""
+        question_lower = question.lower().strip()
+        if has_context and self.followup.search(question_lower):
+            return "followup", 0.8
+        # A question can match several intents; the highest-priority one wins, as in the old elif chain
+        intents = {match.lastgroup for match in self.chat_intents.finditer(question_lower)}
+        if intents:
+            return min(intents, key=self.chat_intent_priority.get), 0.9
+        return "open", 0.5
+
+    def _nearest_route(self, question: str) -> Tuple[str, float]:
+        centroids = self._route_centroids()
+        vector = self._unit(self.embed_query(question))
+        similarities = {route: float(vector @ centroid) for route, centroid in centroids.items()}
+        route = max(similarities, key=similarities.get)
+        if similarities[route] >= self.embedding_threshold:
+            return route, round(similarities[route], 3)
+        return "general_chat", 0.5
+
+    def _route_centroids(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if self._centroids is None:
+                self._centroids = {
+                    route: self._unit(np.mean([self._unit(self.embed_query(text)) for text in texts], axis=0))
+                    for route, texts in self.exemplars.items()
+                }
+            return self._centroids
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
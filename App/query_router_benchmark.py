@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Query router micro-benchmark
+
+Times QueryRouter.route against the original _classify_query cascade (one uncompiled
+re.search per pattern) on a mix of short questions and code submissions from the
+samples, and reports how often the two agree.
+
+Usage:
+    python query_router_benchmark.py [--iterations N]
+"""
+
+import re
+import argparse
+import time
+from query_router import QueryRouter
+from samples import SAMPLE_CODES
+
+QUESTIONS = [
+    "Hello!", "What can you do?", "Tell me about GPU acceleration", "How does CuPy compare with NumPy?",
+    "What is cuDF?", "Is pandas good for large datasets?", "What is machine learning?",
+    "How do I speed up my training loop?", "What does this code do?", "Thanks a lot",
+    "Which NVIDIA cards are supported?", "Can you help with data analysis on a gpu",
+]
+
+def legacy_classify(question: str) -> str:
+    """The regex cascade _classify_query used before the router."""
+    question_lower = question.lower().strip()
+    if "```" in question:
+        return "code_analysis"
+    code_analysis_patterns = [
+        r'what does this code do', r'explain this code', r'analyze.*code', r'what is this code',
+        r'how does this code work', r'what does.*code.*do', r'optimize.*code', r'accelerate.*code',
+        r'make.*code.*faster', r'convert.*code'
+    ]
+    for pattern in code_analysis_patterns:
+        if re.search(pattern, question_lower):
+            if any(indicator in question for indicator in ['import ', 'def ', 'class ', 'np.', 'pd.', 'for ', 'if ', '=', '()', 'numpy', 'pandas', 'sklearn']):
+                return "code_analysis"
+            return "general_chat"
+    gpu_patterns = [
+        r'\bgpu acceleration\b', r'\bcuda programming\b', r'\bcupy\b', r'\bcudf\b', r'\bcuml\b',
+        r'\brapids\b', r'\bnvidia\b', r'\boptimize.*gpu\b', r'\baccelerating.*gpu\b',
+        r'\bgpu.*performance\b', r'\bconvert.*cupy\b', r'\bconvert.*cudf\b', r'\bparallel.*gpu\b',
+        r'\bgpu.*computing\b', r'\bconvert.*to.*gpu\b', r'\bmake.*faster.*gpu\b',
+        r'help with.*gpu.*acceleration', r'suggest.*gpu.*acceleration', r'data analysis.*gpu',
+        r'gpu.*data analysis', r'accelerated.*analyses', r'gpu.*operations'
+    ]
+    for pattern in gpu_patterns:
+        if re.search(pattern, question_lower):
+            return "gpu_question"
+    if any(lib in question_lower for lib in ['numpy', 'pandas', 'sklearn']) and not any(code_word in question_lower for code_word in ['analyze', 'optimize', 'convert', 'explain']):
+        return "gpu_question"
+    return "general_chat"
+
+def build_workload():
+    """Short questions plus each sample program asked about with and without a code fence."""
+    workload = list(QUESTIONS)
+    for code in SAMPLE_CODES.values():
+        workload.append(f"What does this code do?\n{code}")
+        workload.append(f"How can I make this faster?\n```python\n{code}\n```")
+        workload.append(f"Please review the following program:\n{code}")
+    return workload
+
+def time_per_query(classify, workload, iterations: int) -> float:
+    """Best-of-five mean microseconds per query."""
+    best = float("inf")
+    for _ in range(5):
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            for question in workload:
+                classify(question)
+        best = min(best, (time.perf_counter() - start_time) / (iterations * len(workload)))
+    return best * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the query router with the original regex cascade")
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the workload per timing run")
+    args = parser.parse_args()
+
+    router = QueryRouter()
+    workload = build_workload()
+    agreement = sum(router.route(question)[0] == legacy_classify(question) for question in workload) / len(workload)
+
+    legacy_us = time_per_query(legacy_classify, workload, args.iterations)
+    router_us = time_per_query(router.route, workload, args.iterations)
+    print(f"\n{len(workload)} queries, {args.iterations} iterations")
+    print(f"{'classifier':<16} {'us/query':>9}")
+    print(f"{'legacy cascade':<16} {legacy_us:>9.1f}")
+    print(f"{'query router':<16} {router_us:>9.1f}")
+    print(f"\nRouter: {legacy_us / router_us:.1f}x faster, agrees with the cascade on {agreement:.0%} of queries")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,23 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, AsyncIterator
 import re
-from datetime import datetime
+import time
+import inspect
+import threading
+from contextvars import ContextVar
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import PromptTemplate
-from langchain_ollama import ChatOllama
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import MessagesState
-import socket
-from config import OLLAMA_BASE_URL, CHAT_MODEL, CODE_MODEL, LLM_TEMPERATURE, OLLAMA_PORT
+from llm_cache import LLMResponseCache
+from conversation_memory import ConversationMemory, SessionMemoryStore
+from query_router import QueryRouter
+from ollama_clients import OllamaClientRegistry, BalancedChatOllama
+from config import CHAT_MODEL, CODE_MODEL, LLM_CACHE_ENABLED, CONVERSATION_SUMMARY_TOKENS
+
+# LLM usage of the request being served. A context variable, so requests served at the same time
+# on other threads or asyncio tasks each count their own calls
+_request_usage = ContextVar("request_usage", default=None)
 
 class GradeDocuments(BaseModel):
     """Grade documents using a binary score for relevance check."""
@@ -23,87 +33,274 @@ class RAGAgent:
         self.code_llm_model = None  # For code analysis and optimization
         self.retriever_tool = None
         self.rag_graph = None
-        self.conversation_memory = []  # Store conversation history for context
-        self.max_history_length = 10  # Keep last 10 exchanges to avoid token limits
+        # Per-session history: recent exchanges verbatim plus a rolling summary, within a token budget
+        self.sessions = SessionMemoryStore(summarize=self._summarize_conversation)
+        self.router = QueryRouter()
+        self.token_usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0}  # Totals over all requests
+        self._usage_lock = threading.Lock()
+        self.llm_cache = None
+        if LLM_CACHE_ENABLED:
+            try:
+                self.llm_cache = LLMResponseCache()
+            except Exception as e:
+                print(f"⚠️ LLM response cache disabled: {e}")
+        self.clients = None
         self._setup_llm()
     
-    def clear_conversation_memory(self):
-        """Clear the conversation memory."""
-        self.conversation_memory = []
+    def get_conversation_memory(self, session_id: str = None) -> ConversationMemory:
+        """The conversation memory of one chat session (a shared default session when None)."""
+        return self.sessions.get(session_id)
+    
+    def clear_conversation_memory(self, session_id: str = None):
+        """Clear the conversation memory of a session."""
+        self.sessions.clear(session_id)
         print("🧹 Conversation memory cleared")
     
-    def add_to_conversation_memory(self, user_message: str, assistant_response: str):
-        """Add an exchange to conversation memory."""
-        self.conversation_memory.append({
-            "user": user_message,
-            "assistant": assistant_response,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Keep only the last max_history_length exchanges
-        if len(self.conversation_memory) > self.max_history_length:
-            self.conversation_memory = self.conversation_memory[-self.max_history_length:]
+    def add_to_conversation_memory(self, user_message: str, assistant_response: str, session_id: str = None):
+        """Add an exchange to a session's memory; older exchanges are summarized in the background."""
+        self.sessions.add(session_id, user_message, assistant_response)
+    
+    def get_conversation_context(self, session_id: str = None) -> str:
+        """Get a session's formatted conversation history, within the conversation token budget."""
+        memory = self.get_conversation_memory(session_id)
+        context = memory.context()
+        if context:
+            print(f"DEBUG: Conversation context: {memory.last_context_tokens} tokens")
+        return context
+    
+    def get_conversation_stats(self, session_id: str = None) -> Dict[str, Any]:
+        """A session's memory size and latest request's token counts, and the session store totals."""
+        stats = self.get_conversation_memory(session_id).stats()
+        stats["store"] = self.sessions.stats()
+        return stats
     
-    def get_conversation_context(self) -> str:
-        """Get formatted conversation history for context."""
-        if not self.conversation_memory:
-            return ""
+    def get_request_usage(self, session_id: str = None) -> Dict[str, Any]:
+        """LLM usage of the session's latest request: calls, input/output tokens, the prompt
+        tokens of its last LLM call and the time to its first streamed token (None before any)."""
+        usage = self.get_conversation_memory(session_id).last_request_usage
+        return dict(usage) if usage else None
+    
+    def _track_request(self, session_id: str = None) -> Dict[str, Any]:
+        """Start counting a request's LLM usage, kept as the session's latest request.
         
-        context_parts = ["Previous conversation:"]
-        for i, exchange in enumerate(self.conversation_memory, 1):
-            context_parts.append(f"User: {exchange['user']}")
-            context_parts.append(f"Assistant: {exchange['assistant']}")
-            if i < len(self.conversation_memory):
-                context_parts.append("---")
+        Streaming generators read the counts once, on their first step, since later steps
+        may run in another thread's context.
+        """
+        usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "prompt_tokens": None, "ttft": None}
+        _request_usage.set(usage)
+        self.get_conversation_memory(session_id).last_request_usage = usage
+        return usage
+    
+    def _summarize_conversation(self, summary: str, exchanges: List[Dict[str, str]]) -> str:
+        """Fold exchanges that left the verbatim window into the running summary.
         
-        return "\n".join(context_parts)
+        Runs on the memory's background thread. It calls the model directly so the summary
+        neither fills the response cache nor counts towards the user's request.
+        """
+        transcript = "\n\n".join(f"User: {exchange['user']}\nAssistant: {exchange['assistant']}"
+                                 for exchange in exchanges)
+        prompt = f"""Update the summary of a conversation between a user and a GPU acceleration assistant.
+
+Current summary:
+{summary or "(none)"}
 
+New exchanges:
+{transcript}
+
+Write the updated summary in at most {CONVERSATION_SUMMARY_TOKENS // 2} words. Keep the user's goals, the code and libraries discussed, and any conclusions or recommendations. Reply with the summary only."""
+        response = self._require_llm("chat").invoke([HumanMessage(content=prompt)])
+        return self._strip_thinking(response).content
+    
     def _setup_llm(self):
-        """Initialize both LLM models - chat model and code model."""
+        """Initialize both LLM models - chat model and code model.
+        
+        Both come from one client registry, so they share HTTP connections and are the same
+        object when CHAT_MODEL == CODE_MODEL; calls are spread over the OLLAMA_ENDPOINTS servers.
+        """
         try:
-            # Try different connection methods for supercomputer environment
-            import socket
-            host_node = socket.gethostname()
-            
-            # Setup Chat Model (for general conversation and RAG)
-            try:
-                self.chat_llm_model = ChatOllama(
-                    model=CHAT_MODEL,
-                    temperature=LLM_TEMPERATURE,
-                    base_url=f"http://vpatel69@{host_node}:{OLLAMA_PORT}/"  # Use configurable port
-                )
-                print(f"✅ Chat LLM model ({CHAT_MODEL}) initialized (supercomputer style)")
-            except:
-                # Fallback to standard connection
-                self.chat_llm_model = ChatOllama(
-                    model=CHAT_MODEL,
-                    temperature=LLM_TEMPERATURE,
-                    base_url=OLLAMA_BASE_URL
-                )
-                print(f"✅ Chat LLM model ({CHAT_MODEL}) initialized (standard)")
-            
-            # Setup Code Model (for code analysis and optimization)
-            try:
-                self.code_llm_model = ChatOllama(
-                    model=CODE_MODEL,
-                    temperature=LLM_TEMPERATURE,
-                    base_url=f"http://vpatel69@{host_node}:{OLLAMA_PORT}/"  # Use configurable port
-                )
-                print(f"✅ Code LLM model ({CODE_MODEL}) initialized (supercomputer style)")
-            except:
-                # Fallback to standard connection
-                self.code_llm_model = ChatOllama(
-                    model=CODE_MODEL,
-                    temperature=LLM_TEMPERATURE,
-                    base_url=OLLAMA_BASE_URL
-                )
-                print(f"✅ Code LLM model ({CODE_MODEL}) initialized (standard)")
-                
+            self.clients = OllamaClientRegistry()
+            self.chat_llm_model = self.clients.chat_model(CHAT_MODEL)  # General conversation and RAG
+            self.code_llm_model = self.clients.chat_model(CODE_MODEL)  # Code analysis and optimization
+            print(f"✅ LLM models initialized (chat: {CHAT_MODEL}, code: {CODE_MODEL}) "
+                  f"on {', '.join(self.clients.endpoints)}")
         except Exception as e:
             print(f"⚠️ Could not initialize LLM models: {e}")
             self.chat_llm_model = None
             self.code_llm_model = None
     
+    def warm_up_models(self):
+        """Load the chat and code models into Ollama in the background."""
+        if self.clients and self.chat_llm_model:
+            self.clients.warm_up_in_background([CHAT_MODEL, CODE_MODEL])
+    
+    def models_ready(self) -> bool:
+        """Readiness flag: True once warm-up has loaded every model (requests work before that, just slower)."""
+        return bool(self.clients and self.clients.ready.is_set())
+    
+    def get_warm_up_status(self) -> Dict[str, Any]:
+        """Warm-up state ("idle", "loading", "ready" or "failed") with per-model load seconds."""
+        return self.clients.warm_up_status if self.clients else {"state": "idle", "load_seconds": {}, "errors": {}}
+    
+    def is_model_available(self, model: str = "chat") -> bool:
+        """Cached health of the chat or code model; never contacts Ollama."""
+        llm = self._get_llm(model)
+        if llm is None:
+            return False
+        return llm.is_available() if isinstance(llm, BalancedChatOllama) else True
+    
+    def get_model_status(self) -> List[Dict[str, Any]]:
+        """Per-server load and health of the Ollama endpoints."""
+        return self.clients.stats() if self.clients else []
+    
+    def _get_llm(self, model: str):
+        return self.code_llm_model if model == "code" else self.chat_llm_model
+    
+    def _llm_cache_key(self, llm, messages: List[Any]) -> str:
+        return LLMResponseCache.make_key(llm.model, llm.base_url, llm.temperature, messages)
+    
+    def _require_llm(self, model: str):
+        llm = self._get_llm(model)
+        if llm is None:
+            raise RuntimeError(f"The {model} LLM model is not available")
+        return llm
+    
+    def _cache_lookup(self, llm, messages: List[Any], use_cache: bool):
+        """Return (cache key, cached response text or None)."""
+        key = self._llm_cache_key(llm, messages) if self.llm_cache else None
+        if key and use_cache:
+            return key, self.llm_cache.get(key)
+        return key, None
+    
+    def invoke_llm(self, messages: List[Any], model: str = "chat", use_cache: bool = True):
+        """Invoke the chat or code model, answering identical prompts from the response cache.
+        
+        Pass use_cache=False to force a fresh generation (the new response is still stored).
+        """
+        llm = self._require_llm(model)
+        key, cached = self._cache_lookup(llm, messages, use_cache)
+        if cached is not None:
+            print(f"⚡ LLM cache hit ({llm.model})")
+            return AIMessage(content=cached)
+        
+        response = llm.invoke(messages)
+        self._record_usage(response)
+        if key and response.content and not getattr(response, "tool_calls", None):
+            self.llm_cache.put(key, llm.model, response.content)
+        return response
+    
+    async def ainvoke_llm(self, messages: List[Any], model: str = "chat", use_cache: bool = True):
+        """Async variant of invoke_llm(); awaits the model without holding a worker thread."""
+        llm = self._require_llm(model)
+        # SQLite lookups are local and sub-millisecond, so the cache stays synchronous
+        key, cached = self._cache_lookup(llm, messages, use_cache)
+        if cached is not None:
+            print(f"⚡ LLM cache hit ({llm.model})")
+            return AIMessage(content=cached)
+        
+        response = await llm.ainvoke(messages)
+        self._record_usage(response)
+        if key and response.content and not getattr(response, "tool_calls", None):
+            self.llm_cache.put(key, llm.model, response.content)
+        return response
+    
+    async def _ainvoke_text(self, messages: List[Any], model: str = "chat", use_cache: bool = True) -> str:
+        return (await self.ainvoke_llm(messages, model, use_cache)).content
+    
+    def stream_llm(self, messages: List[Any], model: str = "chat", use_cache: bool = True) -> Iterator[str]:
+        """Stream the model's reply as text chunks; a cached reply is yielded in one piece."""
+        llm = self._require_llm(model)
+        usage = _request_usage.get()
+        start_time = time.perf_counter()
+        key, cached = self._cache_lookup(llm, messages, use_cache)
+        if cached is not None:
+            self._record_ttft(time.perf_counter() - start_time, usage, cached=True)
+            yield cached
+            return
+        
+        self._count_call(usage)
+        parts = []
+        for chunk in llm.stream(messages):
+            self._record_usage(chunk, count_call=False, usage=usage)
+            if not chunk.content:
+                continue
+            if not parts:
+                self._record_ttft(time.perf_counter() - start_time, usage)
+            parts.append(chunk.content)
+            yield chunk.content
+        if key and parts:
+            self.llm_cache.put(key, llm.model, "".join(parts))
+    
+    async def astream_llm(self, messages: List[Any], model: str = "chat", use_cache: bool = True) -> AsyncIterator[str]:
+        """Async variant of stream_llm() built on ChatOllama.astream."""
+        llm = self._require_llm(model)
+        usage = _request_usage.get()
+        start_time = time.perf_counter()
+        key, cached = self._cache_lookup(llm, messages, use_cache)
+        if cached is not None:
+            self._record_ttft(time.perf_counter() - start_time, usage, cached=True)
+            yield cached
+            return
+        
+        self._count_call(usage)
+        parts = []
+        async for chunk in llm.astream(messages):
+            self._record_usage(chunk, count_call=False, usage=usage)
+            if not chunk.content:
+                continue
+            if not parts:
+                self._record_ttft(time.perf_counter() - start_time, usage)
+            parts.append(chunk.content)
+            yield chunk.content
+        if key and parts:
+            self.llm_cache.put(key, llm.model, "".join(parts))
+    
+    def _count_call(self, usage: Dict[str, Any] = None):
+        with self._usage_lock:
+            self.token_usage["calls"] += 1
+            if usage is not None:
+                usage["calls"] += 1
+    
+    def _record_usage(self, message, count_call: bool = True, usage: Dict[str, Any] = None):
+        """Add a model response's token counts (reported by Ollama) to token_usage and to the
+        request's counts (by default those of the current context)."""
+        usage = usage if usage is not None else _request_usage.get()
+        if count_call:
+            self._count_call(usage)
+        tokens = getattr(message, "usage_metadata", None)
+        if not tokens:
+            return
+        with self._usage_lock:
+            for counts in (self.token_usage, usage):
+                if counts is not None:
+                    counts["input_tokens"] += tokens.get("input_tokens", 0)
+                    counts["output_tokens"] += tokens.get("output_tokens", 0)
+            if usage is not None and tokens.get("input_tokens"):
+                usage["prompt_tokens"] = tokens["input_tokens"]
+    
+    def get_token_usage(self) -> Dict[str, int]:
+        """LLM calls and tokens generated across all requests since the last reset (cache hits cost nothing)."""
+        with self._usage_lock:
+            return dict(self.token_usage)
+    
+    def reset_token_usage(self):
+        with self._usage_lock:
+            self.token_usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+    
+    def _record_ttft(self, seconds: float, usage: Dict[str, Any] = None, cached: bool = False):
+        if usage is not None and usage["ttft"] is None:
+            usage["ttft"] = seconds
+        print(f"⏱️ Time to first token: {seconds:.2f}s{' (cached)' if cached else ''}")
+    
+    def is_llm_response_cached(self, messages: List[Any], model: str = "chat") -> bool:
+        llm = self._get_llm(model)
+        return bool(self.llm_cache and llm and self.llm_cache.contains(self._llm_cache_key(llm, messages)))
+    
+    def get_llm_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the LLM response cache."""
+        if not self.llm_cache:
+            return {"entries": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+        return self.llm_cache.stats()
+    
     def set_retriever_tool(self, retriever_tool):
         """Set the retriever tool for the RAG system."""
         self.retriever_tool = retriever_tool
@@ -116,10 +313,12 @@ class RAGAgent:
         # Build the graph
         workflow = StateGraph(MessagesState)
         
-        # Add nodes
-        workflow.add_node("generate_query_or_respond", self._generate_query_or_respond)
+        # Add nodes; the async variants run when the graph is driven with ainvoke/astream
+        workflow.add_node("generate_query_or_respond",
+                          RunnableLambda(self._generate_query_or_respond, afunc=self._agenerate_query_or_respond))
         workflow.add_node("grade_documents", self._grade_documents)
-        workflow.add_node("generate_response", self._generate_response)
+        workflow.add_node("generate_response",
+                          RunnableLambda(self._generate_response, afunc=self._agenerate_response))
         
         # Add edges
         workflow.add_edge(START, "generate_query_or_respond")
@@ -144,66 +343,95 @@ class RAGAgent:
         
         try:
             response = self.chat_llm_model.bind_tools([self.retriever_tool]).invoke(state["messages"])
-            # Clean up response content
-            content = re.sub(r"<think>.*</think>", "", response.content, flags=re.DOTALL).strip()
-            response.content = content
-            return {"messages": [response]}
+            self._record_usage(response)
+            return {"messages": [self._strip_thinking(response)]}
+        except Exception as e:
+            print(f"Error in LLM generation: {e}")
+            return {"messages": [AIMessage(content=f"Error generating response. Please check if Ollama is running with the chat model {CHAT_MODEL}")]}
+    
+    async def _agenerate_query_or_respond(self, state: MessagesState):
+        """Async variant of _generate_query_or_respond()."""
+        if not self.chat_llm_model:
+            return {"messages": [AIMessage(content="Chat LLM model not available. Please check Ollama connection.")]}
+        
+        try:
+            response = await self.chat_llm_model.bind_tools([self.retriever_tool]).ainvoke(state["messages"])
+            self._record_usage(response)
+            return {"messages": [self._strip_thinking(response)]}
         except Exception as e:
             print(f"Error in LLM generation: {e}")
             return {"messages": [AIMessage(content=f"Error generating response. Please check if Ollama is running with the chat model {CHAT_MODEL}")]}
     
+    @staticmethod
+    def _strip_thinking(response):
+        # Clean up response content
+        response.content = re.sub(r"<think>.*</think>", "", response.content, flags=re.DOTALL).strip()
+        return response
+    
     def _grade_documents(self, state: MessagesState):
         """Grade retrieved documents for relevance."""
         # For simplicity, assume all retrieved documents are relevant
         # In production, implement proper document grading
         return {"messages": state["messages"]}
     
-    def _generate_response(self, state: MessagesState):
-        """Generate final response based on retrieved documents."""
-        if not self.chat_llm_model:
-            return {"messages": [AIMessage(content="Chat LLM model not available. Please check Ollama connection.")]}
+    def _pending_retrieval_query(self, state: MessagesState):
+        """The retriever query requested by the last message's tool call, if any."""
+        last_message = state["messages"][-1]
+        if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
+            return last_message.tool_calls[0]['args']['query']
+        return None
+    
+    def _build_response_messages(self, state: MessagesState) -> List[Any]:
+        """Messages for the final answer: retrieved context plus the question, or the conversation as is."""
+        query = self._pending_retrieval_query(state)
+        if query is None:
+            # Direct response without retrieval
+            return state["messages"]
         
+        # Get retrieved documents
         try:
-            # Get the last message and generate response
-            last_message = state["messages"][-1]
-            
-            # If there are tool calls, handle them
-            if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
-                # Retrieve documents
-                tool_call = last_message.tool_calls[0]
-                query = tool_call['args']['query']
-                
-                # Get retrieved documents
-                try:
-                    retrieved_docs = self.retriever_tool.invoke({"query": query})
-                    print(f"DEBUG: Retrieved docs type: {type(retrieved_docs)}")
-                    if isinstance(retrieved_docs, list) and len(retrieved_docs) > 0:
-                        print(f"DEBUG: First doc type: {type(retrieved_docs[0])}")
-                except Exception as e:
-                    print(f"Error retrieving documents: {e}")
-                    retrieved_docs = []
-                
-                # Handle different types of retrieved content
-                if isinstance(retrieved_docs, list):
-                    # If it's a list of documents or strings
-                    context_parts = []
-                    for doc in retrieved_docs:
-                        if hasattr(doc, 'page_content'):
-                            context_parts.append(doc.page_content)
-                        elif isinstance(doc, str):
-                            context_parts.append(doc)
-                        else:
-                            context_parts.append(str(doc))
-                    context = "\n\n".join(context_parts)
-                elif hasattr(retrieved_docs, 'page_content'):
-                    # Single document
-                    context = retrieved_docs.page_content
+            retrieved_docs = self.retriever_tool.invoke({"query": query})
+            print(f"DEBUG: Retrieved docs type: {type(retrieved_docs)}")
+        except Exception as e:
+            print(f"Error retrieving documents: {e}")
+            retrieved_docs = []
+        return self._context_messages(query, retrieved_docs)
+    
+    async def _abuild_response_messages(self, state: MessagesState) -> List[Any]:
+        """Async variant of _build_response_messages() using the retriever tool's ainvoke."""
+        query = self._pending_retrieval_query(state)
+        if query is None:
+            return state["messages"]
+        
+        try:
+            retrieved_docs = await self.retriever_tool.ainvoke({"query": query})
+        except Exception as e:
+            print(f"Error retrieving documents: {e}")
+            retrieved_docs = []
+        return self._context_messages(query, retrieved_docs)
+    
+    def _context_messages(self, query: str, retrieved_docs) -> List[Any]:
+        # Handle different types of retrieved content
+        if isinstance(retrieved_docs, list):
+            # If it's a list of documents or strings
+            context_parts = []
+            for doc in retrieved_docs:
+                if hasattr(doc, 'page_content'):
+                    context_parts.append(doc.page_content)
+                elif isinstance(doc, str):
+                    context_parts.append(doc)
                 else:
-                    # Fallback - convert to string
-                    context = str(retrieved_docs)
-                
-                # Generate response with context
-                response_prompt = f"""
+                    context_parts.append(str(doc))
+            context = "\n\n".join(context_parts)
+        elif hasattr(retrieved_docs, 'page_content'):
+            # Single document
+            context = retrieved_docs.page_content
+        else:
+            # Fallback - convert to string
+            context = str(retrieved_docs)
+        
+        # Generate response with context
+        response_prompt = f"""
                 Based on the following context about GPU acceleration, answer the user's question:
                 
                 Context:
@@ -213,14 +441,29 @@ class RAGAgent:
                 
                 Provide a comprehensive answer focusing on practical GPU acceleration techniques.
                 """
-                
-                response = self.chat_llm_model.invoke([HumanMessage(content=response_prompt)])
-                return {"messages": [response]}
-            else:
-                # Direct response without retrieval
-                response = self.chat_llm_model.invoke(state["messages"])
-                return {"messages": [response]}
-                
+        
+        return [HumanMessage(content=response_prompt)]
+    
+    def _generate_response(self, state: MessagesState):
+        """Generate final response based on retrieved documents."""
+        if not self.chat_llm_model:
+            return {"messages": [AIMessage(content="Chat LLM model not available. Please check Ollama connection.")]}
+        
+        try:
+            response = self.invoke_llm(self._build_response_messages(state))
+            return {"messages": [response]}
+        except Exception as e:
+            print(f"Error in response generation: {e}")
+            return {"messages": [AIMessage(content=f"Error generating response. Please check if Ollama is running with the chat model {CHAT_MODEL}")]}
+    
+    async def _agenerate_response(self, state: MessagesState):
+        """Async variant of _generate_response()."""
+        if not self.chat_llm_model:
+            return {"messages": [AIMessage(content="Chat LLM model not available. Please check Ollama connection.")]}
+        
+        try:
+            response = await self.ainvoke_llm(await self._abuild_response_messages(state))
+            return {"messages": [response]}
         except Exception as e:
             print(f"Error in response generation: {e}")
             return {"messages": [AIMessage(content=f"Error generating response. Please check if Ollama is running with the chat model {CHAT_MODEL}")]}
@@ -235,8 +478,9 @@ class RAGAgent:
         else:
             return "respond"
     
-    def query(self, question: str, use_conversation_context: bool = True) -> str:
-        """Query the RAG system with a question, optionally including conversation context."""
+    def query(self, question: str, use_conversation_context: bool = True, session_id: str = None) -> str:
+        """Query the RAG system with a question, optionally including the session's conversation context."""
+        self._track_request(session_id)
         try:
             print(f"DEBUG: RAGAgent.query called with question length: {len(question)}")
             
@@ -249,8 +493,8 @@ class RAGAgent:
             conversation_context_used = False
             
             # Add conversation context if enabled and available
-            if use_conversation_context and self.conversation_memory:
-                conversation_context = self.get_conversation_context()
+            conversation_context = self.get_conversation_context(session_id) if use_conversation_context else ""
+            if conversation_context:
                 question = f"{conversation_context}\n\nCurrent question: {question}"
                 conversation_context_used = True
                 print(f"DEBUG: Added conversation context, total length: {len(question)}")
@@ -265,7 +509,7 @@ class RAGAgent:
             elif query_type == "code_analysis":
                 # Handle code analysis with the dedicated code model
                 print("DEBUG: Handling as code analysis")
-                response = self.query_code_analysis(question)
+                response = self._code_analysis(question)
                 print(f"DEBUG: Code analysis result length: {len(response) if response else 0}")
             elif query_type == "gpu_question":
                 # Handle GPU-specific questions with RAG retrieval
@@ -301,7 +545,7 @@ class RAGAgent:
             
             # Add this exchange to conversation memory
             if use_conversation_context and response:
-                self.add_to_conversation_memory(original_question, response)
+                self.add_to_conversation_memory(original_question, response, session_id)
             
             return response
                 
@@ -311,78 +555,151 @@ class RAGAgent:
             traceback.print_exc()
             return f"Error processing query: {str(e)}"
     
+    def query_stream(self, question: str, use_conversation_context: bool = True, session_id: str = None) -> Iterator[str]:
+        """Streaming variant of query(): yields the response as text chunks."""
+        self._track_request(session_id)
+        try:
+            query_type = self._classify_query(question)
+            print(f"DEBUG: Streaming query classified as: {query_type}")
+            
+            original_question = question
+            conversation_context = self.get_conversation_context(session_id) if use_conversation_context else ""
+            if conversation_context:
+                question = f"{conversation_context}\n\nCurrent question: {question}"
+            
+            if query_type == "code_analysis":
+                chunks = self._code_analysis_stream(question)
+            elif query_type == "gpu_question":
+                if not self.rag_graph:
+                    chunks = ["RAG system not initialized for GPU queries"]
+                elif not self.chat_llm_model:
+                    chunks = ["Chat LLM model not available. Please check Ollama connection."]
+                else:
+                    # Same steps as the RAG graph, with the final generation streamed
+                    state = {"messages": [HumanMessage(content=question)]}
+                    decision = self._generate_query_or_respond(state)["messages"][-1]
+                    messages = self._build_response_messages({"messages": state["messages"] + [decision]})
+                    chunks = self.stream_llm(messages)
+            else:
+                result = self._handle_general_chat(question, mode="stream")
+                chunks = [result] if isinstance(result, str) else result
+            
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            
+            response = "".join(parts)
+            if use_conversation_context and response:
+                self.add_to_conversation_memory(original_question, response, session_id)
+                
+        except Exception as e:
+            print(f"ERROR in streaming query: {e}")
+            yield f"\n\nError processing query: {str(e)}"
+    
+    async def aquery(self, question: str, use_conversation_context: bool = True, session_id: str = None) -> str:
+        """Async variant of query(): LLM calls, retrieval and the RAG graph are awaited."""
+        self._track_request(session_id)
+        try:
+            query_type = self._classify_query(question)
+            print(f"DEBUG: Async query classified as: {query_type}")
+            
+            original_question = question
+            conversation_context = self.get_conversation_context(session_id) if use_conversation_context else ""
+            if conversation_context:
+                question = f"{conversation_context}\n\nCurrent question: {question}"
+            
+            if query_type == "code_analysis":
+                response = await self._acode_analysis(question)
+            elif query_type == "gpu_question":
+                if not self.rag_graph:
+                    response = "RAG system not initialized for GPU queries"
+                else:
+                    try:
+                        result = await self.rag_graph.ainvoke({
+                            "messages": [HumanMessage(content=question)]
+                        })
+                        if result.get('messages'):
+                            response = result["messages"][-1].content
+                        else:
+                            response = await self._ahandle_general_chat(question)
+                    except Exception as e:
+                        print(f"ERROR: RAG graph failed: {e}")
+                        print("DEBUG: Falling back to direct LLM due to RAG error")
+                        response = await self._ahandle_general_chat(question)
+            else:
+                response = await self._ahandle_general_chat(question)
+            
+            if use_conversation_context and response:
+                self.add_to_conversation_memory(original_question, response, session_id)
+            
+            return response
+                
+        except Exception as e:
+            print(f"ERROR in async query processing: {e}")
+            return f"Error processing query: {str(e)}"
+    
+    async def aquery_stream(self, question: str, use_conversation_context: bool = True, session_id: str = None) -> AsyncIterator[str]:
+        """Async variant of query_stream(): yields the response as text chunks."""
+        self._track_request(session_id)
+        try:
+            query_type = self._classify_query(question)
+            print(f"DEBUG: Async streaming query classified as: {query_type}")
+            
+            original_question = question
+            conversation_context = self.get_conversation_context(session_id) if use_conversation_context else ""
+            if conversation_context:
+                question = f"{conversation_context}\n\nCurrent question: {question}"
+            
+            if query_type == "code_analysis":
+                chunks = self._acode_analysis_stream(question)
+            elif query_type == "gpu_question" and not self.rag_graph:
+                chunks = "RAG system not initialized for GPU queries"
+            elif query_type == "gpu_question" and not self.chat_llm_model:
+                chunks = "Chat LLM model not available. Please check Ollama connection."
+            elif query_type == "gpu_question":
+                # Same steps as the RAG graph, with the final generation streamed
+                state = {"messages": [HumanMessage(content=question)]}
+                decision = (await self._agenerate_query_or_respond(state))["messages"][-1]
+                messages = await self._abuild_response_messages({"messages": state["messages"] + [decision]})
+                chunks = self.astream_llm(messages)
+            else:
+                chunks = self._handle_general_chat(question, mode="astream")
+            
+            parts = []
+            if isinstance(chunks, str):
+                parts.append(chunks)
+                yield chunks
+            else:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    yield chunk
+            
+            response = "".join(parts)
+            if use_conversation_context and response:
+                self.add_to_conversation_memory(original_question, response, session_id)
+                
+        except Exception as e:
+            print(f"ERROR in async streaming query: {e}")
+            yield f"\n\nError processing query: {str(e)}"
+    
+    async def _ahandle_general_chat(self, question: str) -> str:
+        result = self._handle_general_chat(question, mode="async")
+        return await result if inspect.isawaitable(result) else result
+    
     def _classify_query(self, question: str) -> str:
         """Classify the type of query to determine appropriate handling."""
-        question_lower = question.lower().strip()
-        
-        # Check if question contains code blocks - these should be analyzed with code model
-        if "```" in question:
-            return "code_analysis"
-        
-        # Check for explicit code analysis patterns with actual code content
-        code_analysis_patterns = [
-            r'what does this code do',
-            r'explain this code',
-            r'analyze.*code',
-            r'what is this code',
-            r'how does this code work',
-            r'what does.*code.*do',
-            r'optimize.*code',
-            r'accelerate.*code',
-            r'make.*code.*faster',
-            r'convert.*code'
-        ]
-        
-        # Only classify as code analysis if the pattern matches AND there's actual code context
-        for pattern in code_analysis_patterns:
-            if re.search(pattern, question_lower):
-                # Check if there's code-like content in the question
-                if any(indicator in question for indicator in ['import ', 'def ', 'class ', 'np.', 'pd.', 'for ', 'if ', '=', '()', 'numpy', 'pandas', 'sklearn']):
-                    return "code_analysis"
-                # If no code content but asking about code, treat as general chat
-                else:
-                    return "general_chat"
-        
-        # GPU/technical patterns - Check for GPU-specific questions (without code)
-        gpu_patterns = [
-            r'\bgpu acceleration\b',
-            r'\bcuda programming\b',
-            r'\bcupy\b',
-            r'\bcudf\b',
-            r'\bcuml\b',
-            r'\brapids\b',
-            r'\bnvidia\b',
-            r'\boptimize.*gpu\b',
-            r'\baccelerating.*gpu\b',
-            r'\bgpu.*performance\b',
-            r'\bconvert.*cupy\b',
-            r'\bconvert.*cudf\b',
-            r'\bparallel.*gpu\b',
-            r'\bgpu.*computing\b',
-            r'\bconvert.*to.*gpu\b',
-            r'\bmake.*faster.*gpu\b',
-            r'help with.*gpu.*acceleration',
-            r'suggest.*gpu.*acceleration',
-            r'data analysis.*gpu',
-            r'gpu.*data analysis',
-            r'accelerated.*analyses',
-            r'gpu.*operations'
-        ]
-        
-        # Check for GPU-specific questions
-        for pattern in gpu_patterns:
-            if re.search(pattern, question_lower):
-                return "gpu_question"
-        
-        # If question mentions specific libraries in a general context (not code analysis)
-        if any(lib in question_lower for lib in ['numpy', 'pandas', 'sklearn']) and not any(code_word in question_lower for code_word in ['analyze', 'optimize', 'convert', 'explain']):
-            return "gpu_question"
-        
-        # Everything else should be general chat
-        return "general_chat"
-    
-    def _handle_general_chat(self, question: str) -> str:
-        """Handle general conversation without document retrieval."""
+        route, confidence = self.router.route(question)
+        print(f"DEBUG: Routed to {route} (confidence {confidence:.2f})")
+        return route
+    
+    def _handle_general_chat(self, question: str, mode: str = "invoke"):
+        """Handle general conversation without document retrieval.
+        
+        Canned answers are always returned as text. Answers that need the LLM are returned
+        as text for mode="invoke", an iterator of chunks for "stream", a coroutine for
+        "async" and an async iterator of chunks for "astream".
+        """
         print(f"DEBUG: _handle_general_chat called with question length: {len(question)}")
         
         # Extract the current question if conversation context was added
@@ -390,17 +707,11 @@ class RAGAgent:
         if "Current question:" in question:
             current_question = question.split("Current question:")[-1].strip()
         
-        question_lower = current_question.lower().strip()
-        
-        # Check if this is a follow-up question that references previous conversation
-        is_followup = any(phrase in question_lower for phrase in [
-            'what about', 'how about', 'and what', 'can you also', 'what if',
-            'tell me more', 'explain more', 'go into more detail', 'elaborate',
-            'that', 'this', 'it', 'them', 'those', 'these'
-        ])
+        # Follow-ups are only recognized when there is conversation context to follow up on
+        intent, _ = self.router.chat_intent(current_question, has_context="Previous conversation:" in question)
         
         # If it's a follow-up and we have conversation context, use LLM for context-aware response
-        if is_followup and "Previous conversation:" in question:
+        if intent == "followup":
             print("DEBUG: Detected follow-up question with context, using LLM")
             try:
                 if self.chat_llm_model:
@@ -412,7 +723,9 @@ The user is asking a follow-up question based on our previous conversation. Plea
 
 Provide a clear, helpful answer that acknowledges the conversation context. If the question relates to GPU acceleration, provide specific guidance. Keep your response conversational and informative."""
                     
-                    response = self.chat_llm_model.invoke([HumanMessage(content=context_prompt)])
+                    if mode != "invoke":
+                        return self._deferred_llm([HumanMessage(content=context_prompt)], mode)
+                    response = self.invoke_llm([HumanMessage(content=context_prompt)])
                     return response.content
                 else:
                     return f"""I'd be happy to help with your follow-up question: "{current_question}"
@@ -432,7 +745,7 @@ I specialize in GPU acceleration with NVIDIA Rapids libraries and can help with:
 - GPU acceleration best practices"""
         
         # Handle predefined responses for common queries (without context dependency)
-        if any(greeting in question_lower for greeting in ['hello', 'hi', 'hey']):
+        if intent == "greeting":
             return """Hello! I'm GPU Mentor, your AI assistant for GPU acceleration with NVIDIA Rapids libraries. 
 
 I can help you:
@@ -443,7 +756,7 @@ I can help you:
 
 Feel free to ask me questions about GPU acceleration or paste some code for analysis!"""
         
-        elif any(phrase in question_lower for phrase in ['who are you', 'what are you']):
+        elif intent == "identity":
             return """I'm GPU Mentor, an AI-powered assistant specialized in helping developers accelerate their Python code using NVIDIA Rapids libraries.
 
 My expertise includes:
@@ -454,7 +767,7 @@ My expertise includes:
 
 I can analyze your code, suggest optimizations, and help you learn GPU acceleration techniques!"""
         
-        elif 'what can you do' in question_lower:
+        elif intent == "capabilities":
             return """I can help you accelerate your Python code with GPU computing! Here's what I can do:
 
 🔍 **Code Analysis**: Analyze your Python code to identify GPU acceleration opportunities
@@ -469,10 +782,16 @@ I can analyze your code, suggest optimizations, and help you learn GPU accelerat
 
 Just paste your Python code or ask me questions about GPU acceleration!"""
         
-        elif any(phrase in question_lower for phrase in ['what does this code do', 'explain this code', 'what is this']):
+        elif intent == "explain_code":
             # Check if there's actual code in the question
-            if "```" in question or any(lib in question for lib in ['import ', 'def ', 'class ', 'numpy', 'pandas', 'sklearn', 'np.', 'pd.']):
+            if self.router.looks_like_code(current_question):
                 # This should have been classified as code_analysis, but handle it here as fallback
+                if mode == "stream":
+                    return self.query_code_analysis_stream(question)
+                if mode == "async":
+                    return self.aquery_code_analysis(question)
+                if mode == "astream":
+                    return self.aquery_code_analysis_stream(question)
                 return self.query_code_analysis(question)
             else:
                 return """I'd be happy to explain code for you! However, I don't see any code in your message. 
@@ -485,17 +804,17 @@ Please paste the Python code you'd like me to explain, and I'll:
 
 You can paste code directly in the chat or use the "Code Analysis & Optimization" tab for detailed analysis."""
         
-        elif any(phrase in question_lower for phrase in ['thank you', 'thanks']):
+        elif intent == "thanks":
             return "You're welcome! I'm here to help with your GPU acceleration journey. Feel free to ask more questions or share code for optimization!"
         
-        elif any(phrase in question_lower for phrase in ['bye', 'goodbye']):
+        elif intent == "goodbye":
             return "Goodbye! Feel free to come back anytime you need help with GPU acceleration. Happy coding! 🚀"
         
-        elif 'how are you' in question_lower:
+        elif intent == "how_are_you":
             return "I'm doing great and ready to help you accelerate your Python code with GPUs! What would you like to work on today?"
         
         # Handle specific knowledge questions
-        elif re.search(r'what is (an? )?llm', question_lower):
+        elif intent == "define_llm":
             return """An **LLM** stands for **Large Language Model**. It's a type of artificial intelligence model that has been trained on vast amounts of text data to understand and generate human-like text.
 
 Key characteristics of LLMs:
@@ -508,7 +827,7 @@ Popular examples include GPT (like ChatGPT), Claude, Llama, and others.
 
 As GPU Mentor, I use LLM capabilities to help analyze your code and provide GPU acceleration recommendations! Would you like to know how I can help optimize your Python code for GPU acceleration?"""
         
-        elif re.search(r'what is (artificial intelligence|ai)', question_lower):
+        elif intent == "define_ai":
             return """**Artificial Intelligence (AI)** is the simulation of human intelligence in machines that are programmed to think and learn like humans.
 
 Key aspects of AI:
@@ -524,7 +843,7 @@ AI is heavily used in GPU acceleration because:
 
 Would you like to learn how to accelerate your AI/ML code using GPU libraries like cuML?"""
         
-        elif re.search(r'what is (machine learning|ml)', question_lower):
+        elif intent == "define_ml":
             return """**Machine Learning (ML)** is a subset of AI that enables computers to learn and make decisions from data without being explicitly programmed for every task.
 
 Types of Machine Learning:
@@ -540,7 +859,7 @@ ML algorithms that benefit greatly from GPU acceleration:
 
 As GPU Mentor, I can help you accelerate your ML code using cuML (GPU-accelerated scikit-learn)! Would you like to see how to convert your scikit-learn code to use GPU acceleration?"""
         
-        elif re.search(r'what is python', question_lower):
+        elif intent == "define_python":
             return """**Python** is a high-level, interpreted programming language known for its simplicity and versatility.
 
 Why Python is popular:
@@ -560,11 +879,14 @@ As GPU Mentor, I specialize in helping you accelerate your Python code using NVI
             # For other questions, use LLM without RAG retrieval
             try:
                 if self.chat_llm_model:
-                    response = self.chat_llm_model.invoke([HumanMessage(content=f"""You are GPU Mentor, a friendly AI assistant specialized in GPU acceleration with NVIDIA Rapids libraries. Answer this question in a helpful, conversational way:
+                    messages = [HumanMessage(content=f"""You are GPU Mentor, a friendly AI assistant specialized in GPU acceleration with NVIDIA Rapids libraries. Answer this question in a helpful, conversational way:
 
 {question}
 
-Provide a clear, accurate answer. If it's not directly related to GPU acceleration, give a good general answer but also mention how GPU acceleration might be relevant. Keep your response concise and helpful. Don't use information from GPU documentation unless the question specifically asks about GPU topics.""")])
+Provide a clear, accurate answer. If it's not directly related to GPU acceleration, give a good general answer but also mention how GPU acceleration might be relevant. Keep your response concise and helpful. Don't use information from GPU documentation unless the question specifically asks about GPU topics.""")]
+                    if mode != "invoke":
+                        return self._deferred_llm(messages, mode)
+                    response = self.invoke_llm(messages)
                     return response.content
                 else:
                     return f"""I'd be happy to help answer your question: "{question}"
@@ -586,15 +908,18 @@ As GPU Mentor, I specialize in GPU acceleration with NVIDIA Rapids libraries. Wh
 
 Is there any Python code you'd like me to help optimize for GPU acceleration?"""
     
-    def query_code_analysis(self, prompt: str) -> str:
-        """Query the code-specific LLM for code analysis and optimization."""
-        try:
-            print(f"DEBUG: query_code_analysis called with prompt length: {len(prompt)}")
-            
-            if not self.code_llm_model:
-                print("DEBUG: Code model not available, falling back to chat model")
-                if self.chat_llm_model:
-                    response = self.chat_llm_model.invoke([HumanMessage(content=f"""You are GPU Mentor, an expert in Python and GPU acceleration. {prompt}
+    def _deferred_llm(self, messages: List[Any], mode: str, model: str = "chat"):
+        """The LLM call for the non-blocking modes of _handle_general_chat()."""
+        if mode == "stream":
+            return self.stream_llm(messages, model)
+        if mode == "astream":
+            return self.astream_llm(messages, model)
+        return self._ainvoke_text(messages, model)
+    
+    def _code_analysis_request(self, prompt: str):
+        """Build the code analysis messages; falls back to the chat model if the code model is missing."""
+        if not self.code_llm_model:
+            return [HumanMessage(content=f"""You are GPU Mentor, an expert in Python and GPU acceleration. {prompt}
                     
 Please provide a clear explanation focusing on:
 1. What the code does
@@ -602,15 +927,10 @@ Please provide a clear explanation focusing on:
 3. Any GPU acceleration opportunities
 4. Suggestions for optimization
 
-Be helpful and educational in your response.""")])
-                    return response.content
-                else:
-                    return "Neither code analysis model nor chat model is available. Please check Ollama connection."
-            
-            print(f"DEBUG: Using code model {CODE_MODEL} for analysis")
-            
-            # Enhance the prompt for better code analysis
-            enhanced_prompt = f"""You are GPU Mentor, an expert in Python programming and GPU acceleration with NVIDIA Rapids libraries.
+Be helpful and educational in your response.""")], "chat"
+        
+        # Enhance the prompt for better code analysis
+        enhanced_prompt = f"""You are GPU Mentor, an expert in Python programming and GPU acceleration with NVIDIA Rapids libraries.
 
 {prompt}
 
@@ -622,8 +942,32 @@ Please provide a comprehensive analysis that includes:
 5. **Performance Considerations**: Expected speedups and when GPU acceleration makes sense
 
 Focus on being educational and practical in your response."""
+        return [HumanMessage(content=enhanced_prompt)], "code"
+    
+    def is_code_analysis_cached(self, prompt: str) -> bool:
+        """Check whether query_code_analysis(prompt) would be answered from the cache."""
+        messages, model = self._code_analysis_request(prompt)
+        return self.is_llm_response_cached(messages, model)
+    
+    def query_code_analysis(self, prompt: str, use_cache: bool = True, session_id: str = None) -> str:
+        """Query the code-specific LLM for code analysis and optimization."""
+        self._track_request(session_id)
+        return self._code_analysis(prompt, use_cache)
+    
+    def _code_analysis(self, prompt: str, use_cache: bool = True) -> str:
+        try:
+            print(f"DEBUG: query_code_analysis called with prompt length: {len(prompt)}")
+            
+            if not self.code_llm_model and not self.chat_llm_model:
+                return "Neither code analysis model nor chat model is available. Please check Ollama connection."
+            
+            messages, model = self._code_analysis_request(prompt)
+            if model == "chat":
+                print("DEBUG: Code model not available, falling back to chat model")
+            else:
+                print(f"DEBUG: Using code model {CODE_MODEL} for analysis")
             
-            response = self.code_llm_model.invoke([HumanMessage(content=enhanced_prompt)])
+            response = self.invoke_llm(messages, model, use_cache)
             
             print(f"DEBUG: Code analysis response length: {len(response.content) if response.content else 0}")
             return response.content
@@ -633,3 +977,53 @@ Focus on being educational and practical in your response."""
             import traceback
             traceback.print_exc()
             return f"Error in code analysis: {str(e)}"
+    
+    def query_code_analysis_stream(self, prompt: str, use_cache: bool = True, session_id: str = None) -> Iterator[str]:
+        """Streaming variant of query_code_analysis(): yields the analysis as text chunks."""
+        self._track_request(session_id)
+        yield from self._code_analysis_stream(prompt, use_cache)
+    
+    def _code_analysis_stream(self, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        if not self.code_llm_model and not self.chat_llm_model:
+            yield "Neither code analysis model nor chat model is available. Please check Ollama connection."
+            return
+        messages, model = self._code_analysis_request(prompt)
+        try:
+            yield from self.stream_llm(messages, model, use_cache)
+        except Exception as e:
+            print(f"ERROR in code analysis: {e}")
+            yield f"\n\nError in code analysis: {str(e)}"
+    
+    async def aquery_code_analysis(self, prompt: str, use_cache: bool = True, session_id: str = None) -> str:
+        """Async variant of query_code_analysis()."""
+        self._track_request(session_id)
+        return await self._acode_analysis(prompt, use_cache)
+    
+    async def _acode_analysis(self, prompt: str, use_cache: bool = True) -> str:
+        if not self.code_llm_model and not self.chat_llm_model:
+            return "Neither code analysis model nor chat model is available. Please check Ollama connection."
+        messages, model = self._code_analysis_request(prompt)
+        try:
+            return await self._ainvoke_text(messages, model, use_cache)
+        except Exception as e:
+            print(f"ERROR in code analysis: {e}")
+            return f"Error in code analysis: {str(e)}"
+    
+    async def aquery_code_analysis_stream(self, prompt: str, use_cache: bool = True,
+                                          session_id: str = None) -> AsyncIterator[str]:
+        """Async variant of query_code_analysis_stream()."""
+        self._track_request(session_id)
+        async for chunk in self._acode_analysis_stream(prompt, use_cache):
+            yield chunk
+    
+    async def _acode_analysis_stream(self, prompt: str, use_cache: bool = True) -> AsyncIterator[str]:
+        if not self.code_llm_model and not self.chat_llm_model:
+            yield "Neither code analysis model nor chat model is available. Please check Ollama connection."
+            return
+        messages, model = self._code_analysis_request(prompt)
+        try:
+            async for chunk in self.astream_llm(messages, model, use_cache):
+                yield chunk
+        except Exception as e:
+            print(f"ERROR in code analysis: {e}")
+            yield f"\n\nError in code analysis: {str(e)}"
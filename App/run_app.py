@@ -73,6 +73,10 @@ def main():
     parser = argparse.ArgumentParser(description="Run GPU Mentor Application")
     parser.add_argument("--share", action="store_true", help="Create a public shareable link")
     parser.add_argument("--skip-checks", action="store_true", help="Skip requirement checks")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the vector store from all knowledge sources")
+    parser.add_argument("--refresh-knowledge", action="store_true", help="Re-check knowledge sources and ingest changes")
+    parser.add_argument("--no-warm-up", action="store_true", help="Do not pre-load the LLMs into Ollama at startup")
+    parser.add_argument("--warm-workers", action="store_true", help="Run benchmarks on a long-lived warm worker job")
     
     args = parser.parse_args()
     
@@ -92,12 +96,16 @@ def main():
     
     try:
         from app import GPUMentorApp
+        from config import WARM_UP_MODELS, WARM_WORKER_ENABLED
         
         print(f"🌐 Starting application...")
         if args.share:
             print("🔗 Creating public shareable link...")
         
-        app = GPUMentorApp()
+        app = GPUMentorApp(rebuild_index=args.rebuild_index,
+                           refresh_knowledge=args.refresh_knowledge,
+                           warm_up_models=WARM_UP_MODELS and not args.no_warm_up,
+                           warm_workers=args.warm_workers or WARM_WORKER_ENABLED)
         app.launch(share=args.share)
         
     except KeyboardInterrupt:
@@ -0,0 +1,307 @@
+import os
+import re
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+import subprocess
+from concurrent.futures import Future, as_completed
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from config import (SLURM_POLL_INTERVAL, SLURM_POLL_MAX_INTERVAL, SLURM_POLL_BACKOFF,
+                    SLURM_OUTPUT_CHECK_INTERVAL, SLURM_USE_INOTIFY, SLURM_JOB_TIMEOUT)
+
+# Job states after which a job will not run again (squeue shows them briefly, sacct keeps them)
+TERMINAL_STATES = {"COMPLETED", "FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY", "NODE_FAIL",
+                   "PREEMPTED", "BOOT_FAIL", "DEADLINE", "REVOKED"}
+
+# Final lines printed by the benchmark and analysis wrappers; either one in a job's .out file means it is done
+SUCCESS_MARKER = re.compile(r"^✅ .*completed successfully", re.MULTILINE)
+FAILURE_MARKER = re.compile(r"^❌ Error:", re.MULTILINE)
+MARKER_TAIL_BYTES = 4096  # Only the end of a growing output file is searched for the markers
+
+# inotify(7) flags and the fixed part of struct inotify_event
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x2, 0x8, 0x80, 0x100
+IN_NONBLOCK, IN_CLOEXEC = os.O_NONBLOCK, 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+class OutputWatcher:
+    """Sleeps until a file changes in a watched directory, a timeout passes or wake() is called.
+
+    Uses Linux inotify through ctypes when it is available and falls back to a plain
+    timed sleep otherwise. inotify only sees writes made by this host, so files written
+    by compute nodes on a shared filesystem still rely on the monitor's periodic size check.
+    """
+
+    def __init__(self, use_inotify: bool = SLURM_USE_INOTIFY):
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._libc = None
+        self._fd = self._open_inotify() if use_inotify else None
+        self._watches = {}  # directory -> watch descriptor
+        self._lock = threading.Lock()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _open_inotify(self) -> Optional[int]:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        self._libc = libc
+        return fd
+
+    def add(self, directory: str):
+        if self._fd is None:
+            return
+        with self._lock:
+            if directory in self._watches:
+                return
+            mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if descriptor >= 0:
+                self._watches[directory] = descriptor
+
+    def remove(self, directory: str):
+        with self._lock:
+            descriptor = self._watches.pop(directory, None)
+        if descriptor is not None:
+            self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def wake(self):
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            pass  # A wake-up is already pending
+
+    def wait(self, timeout: float) -> bool:
+        """Block for up to timeout seconds; True when a watched file changed."""
+        readers = [self._wake_read] + ([self._fd] if self._fd is not None else [])
+        ready, _, _ = select.select(readers, [], [], max(timeout, 0))
+        if self._wake_read in ready:
+            self._drain(self._wake_read)
+        return self._fd is not None and self._fd in ready and self._drain(self._fd)
+
+    @staticmethod
+    def _drain(fd: int) -> bool:
+        try:
+            return bool(os.read(fd, 64 * INOTIFY_EVENT.size + 4096))
+        except BlockingIOError:
+            return False
+
+class SlurmJobMonitor:
+    """Waits on any number of SLURM jobs from one shared background thread.
+
+    watch() returns a Future per job that resolves to
+    {"job_id", "state", "exit_code", "done", "seconds", "source"} once the job finishes.
+    Completion is noticed in two ways:
+    - "output": the job's .out file ends with a wrapper's success or failure marker. The
+      thread sleeps on inotify (or a short timer) and checks each file's size when woken,
+      so this costs no scheduler calls.
+    - "scheduler": one batched `sacct` query for all watched jobs (`squeue` for jobs sacct
+      does not know yet) catches jobs that crash, are cancelled or have no output file.
+      The gap between queries starts at poll_interval and grows by `backoff` up to
+      max_interval while nothing finishes.
+    Jobs that pass their deadline resolve with done=False and source "timeout".
+    """
+
+    def __init__(self, poll_interval: float = SLURM_POLL_INTERVAL,
+                 max_interval: float = SLURM_POLL_MAX_INTERVAL, backoff: float = SLURM_POLL_BACKOFF,
+                 output_check_interval: float = SLURM_OUTPUT_CHECK_INTERVAL,
+                 use_inotify: bool = SLURM_USE_INOTIFY):
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.output_check_interval = output_check_interval
+        self.polls = 0  # Number of scheduler queries made, however many jobs each covered
+        self._interval = poll_interval
+        self._next_poll = 0.0
+        self._jobs = {}  # job id -> {"future", "started", "deadline", "output", "size", "state"}
+        self._lock = threading.Lock()
+        self._watcher = OutputWatcher(use_inotify)
+        self._thread = None
+
+    def watch(self, job_id: str, timeout: float = SLURM_JOB_TIMEOUT, output_path: str = None) -> Future:
+        """Start tracking a job; output_path is its .out file, checked for the completion markers."""
+        job_id = str(job_id)
+        with self._lock:
+            if job_id in self._jobs:
+                return self._jobs[job_id]["future"]
+            now = time.time()
+            job = {"future": Future(), "started": now, "deadline": now + timeout if timeout else None,
+                   "output": str(output_path) if output_path else None, "size": -1, "state": "PENDING"}
+            self._jobs[job_id] = job
+            # A new job restarts the backoff, but a fresh submission has nothing to report yet
+            self._interval = self.poll_interval
+            first_poll = now + self.poll_interval
+            self._next_poll = first_poll if len(self._jobs) == 1 else min(self._next_poll, first_poll)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slurm-monitor", daemon=True)
+                self._thread.start()
+        if job["output"]:
+            self._watcher.add(os.path.dirname(os.path.abspath(job["output"])))
+        self._watcher.wake()
+        return job["future"]
+
+    def as_completed(self, job_ids: Iterable[str], timeout: float = SLURM_JOB_TIMEOUT,
+                     output_paths: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each job's result in the order the jobs finish."""
+        output_paths = output_paths or {}
+        futures = [self.watch(job_id, timeout, output_paths.get(job_id)) for job_id in job_ids]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def wait(self, job_id: str, timeout: float = SLURM_JOB_TIMEOUT, output_path: str = None) -> Dict[str, Any]:
+        return self.watch(job_id, timeout, output_path).result()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._jobs:
+                    self._thread = None
+                    return
+            if time.time() >= self._next_poll:
+                finished = self.poll()
+                self._interval = self.poll_interval if finished else min(self._interval * self.backoff, self.max_interval)
+                self._next_poll = time.time() + self._interval
+            self.check_outputs()
+            self._expire()
+            with self._lock:
+                wake_at = min([self._next_poll] + [job["deadline"] for job in self._jobs.values() if job["deadline"]])
+            self._watcher.wait(min(wake_at - time.time(), self.output_check_interval))
+
+    def poll(self) -> int:
+        """One scheduler query for every watched job; returns how many were found finished."""
+        with self._lock:
+            job_ids = list(self._jobs)
+        if not job_ids:
+            return 0
+        self.polls += 1
+        states = self._sacct(job_ids)
+        unknown = [job_id for job_id in job_ids if job_id not in states]
+        if unknown:
+            # Accounting can lag behind a fresh submission or be disabled; ask the controller
+            queued = self._squeue(unknown)
+            if queued is not None:
+                for job_id in unknown:
+                    states[job_id] = (queued.get(job_id, "COMPLETED"), None)
+
+        finished = 0
+        for job_id, (state, exit_code) in states.items():
+            if state in TERMINAL_STATES:
+                finished += self._finish(job_id, state, exit_code, "scheduler")
+            else:
+                with self._lock:
+                    if job_id in self._jobs:
+                        self._jobs[job_id]["state"] = state
+        return finished
+
+    def check_outputs(self) -> int:
+        """Finish jobs whose output file grew and now ends with a completion marker."""
+        with self._lock:
+            watched = [(job_id, job) for job_id, job in self._jobs.items() if job["output"]]
+        finished = 0
+        for job_id, job in watched:
+            try:
+                size = os.path.getsize(job["output"])
+            except OSError:
+                continue
+            if size == job["size"]:
+                continue
+            job["size"] = size
+            state = self._output_state(job["output"], size)
+            if state:
+                finished += self._finish(job_id, state, None, "output")
+        return finished
+
+    @staticmethod
+    def _output_state(path: str, size: int) -> Optional[str]:
+        try:
+            with open(path, "rb") as handle:
+                handle.seek(max(0, size - MARKER_TAIL_BYTES))
+                tail = handle.read().decode("utf-8", errors="ignore")
+        except OSError:
+            return None
+        if SUCCESS_MARKER.search(tail):
+            return "COMPLETED"
+        if FAILURE_MARKER.search(tail):
+            return "FAILED"
+        return None
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = {job_id: job for job_id, job in self._jobs.items() if job["deadline"] and now >= job["deadline"]}
+        for job_id, job in expired.items():
+            if self._finish(job_id, job["state"], None, "timeout", done=False):
+                print(f"⚠️ Stopped waiting for SLURM job {job_id} after {now - job['started']:.0f}s")
+
+    def _finish(self, job_id: str, state: str, exit_code, source: str, done: bool = True) -> int:
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            directories = {os.path.dirname(os.path.abspath(other["output"]))
+                           for other in self._jobs.values() if other["output"]}
+        if job is None:
+            return 0
+        if job["output"]:
+            directory = os.path.dirname(os.path.abspath(job["output"]))
+            if directory not in directories:
+                self._watcher.remove(directory)
+        job["future"].set_result({"job_id": job_id, "state": state, "exit_code": exit_code, "done": done,
+                                  "seconds": time.time() - job["started"], "source": source})
+        return 1
+
+    def _squeue(self, job_ids: List[str]):
+        """{job id: state} for the jobs still known to the scheduler, or None if squeue failed."""
+        try:
+            result = subprocess.run(["squeue", "--noheader", "-j", ",".join(job_ids), "-o", "%i %T"],
+                                    capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️ squeue failed: {e}")
+            return None
+        if result.returncode != 0:
+            # squeue rejects a lone job id that has already been purged from the queue
+            if "Invalid job id" in result.stderr:
+                return {}
+            print(f"⚠️ squeue failed: {result.stderr.strip()}")
+            return None
+        states = {}
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                states[parts[0]] = parts[1]
+        return states
+
+    def _sacct(self, job_ids: List[str]) -> Dict[str, tuple]:
+        """{job id: (state, exit code)} from accounting; empty when sacct is unavailable."""
+        try:
+            result = subprocess.run(["sacct", "--noheader", "-P", "-j", ",".join(job_ids),
+                                     "-o", "JobID,State,ExitCode"], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return {}
+        accounting = {}
+        for line in result.stdout.splitlines():
+            parts = line.strip().split("|")
+            # Skip job steps such as 123.batch; the allocation line carries the job's state
+            if len(parts) >= 3 and parts[0] in job_ids:
+                exit_code = parts[2].split(":")[0]
+                accounting[parts[0]] = (parts[1].split()[0], int(exit_code) if exit_code.isdigit() else None)
+        return accounting
+
+_shared_monitor = None
+_shared_lock = threading.Lock()
+
+def get_job_monitor() -> SlurmJobMonitor:
+    """The process-wide monitor, so every outstanding job is tracked by one thread."""
+    global _shared_monitor
+    with _shared_lock:
+        if _shared_monitor is None:
+            _shared_monitor = SlurmJobMonitor()
+        return _shared_monitor
@@ -0,0 +1,101 @@
+"""Stand-in chat model and code optimizer for tests of the RAG agent and GPU Mentor handlers, so no Ollama server is needed."""
+
+import time
+import asyncio
+from langchain_core.messages import AIMessage, AIMessageChunk
+from rag_agent import RAGAgent
+
+class FakeChatModel:
+    """Answers every prompt with `reply`, streamed word by word after `delay` seconds per chunk.
+
+    Like Ollama, it reports token usage (whitespace-separated words here) with the response,
+    or with the last chunk when streaming. Prompts it received are kept in `prompts`.
+    """
+
+    def __init__(self, reply: str = "ok done", delay: float = 0.01, model: str = "fake-model"):
+        self.reply = reply
+        self.delay = delay
+        self.model = model
+        self.prompts = []
+
+    def _usage(self, messages):
+        prompt_tokens = sum(len(message.content.split()) for message in messages)
+        output_tokens = len(self.reply.split())
+        return {"input_tokens": prompt_tokens, "output_tokens": output_tokens, "total_tokens": prompt_tokens + output_tokens}
+
+    def _chunks(self, messages):
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield AIMessageChunk(content=word if last else word + " ", usage_metadata=self._usage(messages) if last else None)
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        time.sleep(self.delay)
+        return AIMessage(content=self.reply, usage_metadata=self._usage(messages))
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=self.reply, usage_metadata=self._usage(messages))
+
+    def stream(self, messages):
+        self.prompts.append(messages)
+        for chunk in self._chunks(messages):
+            time.sleep(self.delay)
+            yield chunk
+
+    async def astream(self, messages):
+        self.prompts.append(messages)
+        for chunk in self._chunks(messages):
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+class FakeRAGAgent(RAGAgent):
+    """RAGAgent whose chat and code models are one FakeChatModel, without the response cache."""
+
+    def __init__(self, model: FakeChatModel = None):
+        self.fake_model = model or FakeChatModel()
+        super().__init__()
+        self.llm_cache = None
+
+    def _setup_llm(self):
+        self.chat_llm_model = self.code_llm_model = self.fake_model
+
+# A reply in the format GPUMentor._build_analysis_prompt asks for
+STRUCTURED_REPLY = """## 🔍 AI Analysis & Recommendations
+
+NumPy arrays can move to the GPU with CuPy.
+
+## 🚀 GPU-Optimized Code
+
+```python
+import cupy as cp
+x = cp.arange(10)
+print(x.sum())
+```
+
+## 💡 Optimization Insights
+
+Keep arrays on the device."""
+
+class StubOptimizer:
+    """Code optimizer that records calls instead of analysing or running code."""
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze_code(self, code):
+        self.calls.append("analyze_code")
+        return {"libraries_detected": ["numpy"], "optimization_opportunities": [], "estimated_speedup": 5.0}
+
+    def suggest_optimizations(self, code):
+        self.calls.append("suggest_optimizations")
+        return "# rule-based suggestion"
+
+    def execute_code_safely(self, code):
+        self.calls.append("execute_code_safely")
+        return {"success": True, "output": "45", "error": ""}
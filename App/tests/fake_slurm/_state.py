@@ -0,0 +1,36 @@
+"""Shared state of the fake SLURM commands: one directory of per-job files."""
+
+import os
+import fcntl
+
+STATE_DIRECTORY = os.environ.get("FAKE_SLURM_DIR", "/tmp/fake_slurm")
+
+def path(*names):
+    os.makedirs(STATE_DIRECTORY, exist_ok=True)
+    return os.path.join(STATE_DIRECTORY, *names)
+
+def next_job_id() -> str:
+    with open(path("counter"), "a+") as counter:
+        fcntl.flock(counter, fcntl.LOCK_EX)
+        counter.seek(0)
+        job_id = int(counter.read() or 1000) + 1
+        counter.seek(0)
+        counter.truncate()
+        counter.write(str(job_id))
+    return str(job_id)
+
+def job_state(job_id: str):
+    """"RUNNING", ("FINISHED", exit code) or None for an unknown job."""
+    if os.path.exists(path(f"{job_id}.exit")):
+        with open(path(f"{job_id}.exit")) as exit_file:
+            code = exit_file.read().strip()
+        return "FINISHED", int(code) if code.isdigit() else 1
+    if os.path.exists(path(f"{job_id}.job")):
+        return "RUNNING"
+    return None
+
+def job_ids_argument(argv) -> list:
+    for flag in ("-j", "--jobs"):
+        if flag in argv:
+            return [job_id for job_id in argv[argv.index(flag) + 1].split(",") if job_id]
+    return sorted(name[:-4] for name in os.listdir(path()) if name.endswith(".job"))
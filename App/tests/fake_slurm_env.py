@@ -0,0 +1,25 @@
+"""Put the fake SLURM commands in tests/fake_slurm on PATH for the duration of one test."""
+
+import os
+import contextlib
+
+FAKE_SLURM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_slurm")
+
+@contextlib.contextmanager
+def fake_slurm(state_dir: str, **env):
+    """Run the block with the fake sbatch, squeue, sacct and scancel first on PATH, keeping job state in state_dir.
+
+    Keyword arguments set further variables (e.g. FAKE_SLURM_NO_ACCOUNTING="1"). The previous
+    environment is restored afterwards, so later tests in the same process see the real commands.
+    """
+    changes = {"FAKE_SLURM_DIR": state_dir, "PATH": FAKE_SLURM + os.pathsep + os.environ.get("PATH", ""), **env}
+    saved = {name: os.environ.get(name) for name in changes}
+    os.environ.update(changes)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test the IVF index and its use inside the NumPy vector store."""
+
+import os
+import sys
+import tempfile
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from ann_index import IVFIndex
+from numpy_vectorstore import NumpyVectorStore
+
+rng = np.random.default_rng(0)
+MATRIX = NumpyVectorStore._normalize(rng.standard_normal((2000, 32)))
+
+class LookupEmbeddings(Embeddings):
+    """Texts are row numbers of MATRIX."""
+
+    def embed_documents(self, texts):
+        return [MATRIX[int(text)].tolist() for text in texts]
+
+    def embed_query(self, text):
+        return MATRIX[int(text)].tolist()
+
+def exact_top_k(query, k):
+    return list(np.argsort(-(MATRIX @ query))[:k])
+
+def test_ivf_recall():
+    index = IVFIndex(nlist=40, nprobe=40)
+    index.train(MATRIX)
+    queries = MATRIX[:50]
+
+    # Probing every list is an exact search
+    for query, (rows, scores) in zip(queries, index.search(MATRIX, queries, k=5)):
+        assert list(rows) == exact_top_k(query, 5)
+        assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1))
+
+    # Each query's own row is always found, even with a single probe
+    for i, (rows, _) in enumerate(index.search(MATRIX, queries, k=1, nprobe=1)):
+        assert rows[0] == i
+
+def test_store_keeps_ivf_in_sync():
+    ids = [str(i) for i in range(1000)]
+    store = NumpyVectorStore.from_texts(ids, LookupEmbeddings(), ids=ids)
+    store.build_ann_index(nlist=20, nprobe=20)
+
+    store.delete(["0", "1", "2"])
+    store.add_texts(["1500", "1501"], ids=["1500", "1501"])
+    assert len(store.ann_index.assignments) == len(store) == 999
+    assert store.similarity_search("1500", k=1)[0].id == "1500"
+    assert store.similarity_search("999", k=1)[0].id == "999"
+    assert "1" not in [doc.id for doc in store.similarity_search("1", k=5)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store.persist_directory = directory
+        store.persist()
+        loaded = NumpyVectorStore(LookupEmbeddings(), persist_directory=directory)
+        assert loaded.ann_index is not None and loaded.ann_index.nlist == 20
+        assert loaded.similarity_search("1501", k=1)[0].id == "1501"
+
+if __name__ == "__main__":
+    test_ivf_recall()
+    test_store_keeps_ivf_in_sync()
+    print("✅ IVF index tests passed")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test the benchmark statistics: summaries, bootstrap intervals, adaptive stopping and the wrapped job scripts."""
+
+import io
+import os
+import sys
+import random
+import tempfile
+import contextlib
+import subprocess
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stats import percentile, summarize, bootstrap_ci, measure, speedup, emit_result, parse_result
+from benchmark import wrap_cpu_code, read_job_result, format_execution_result
+
+class FakeClock:
+    """Timer whose runs take the durations it is given."""
+
+    def __init__(self, durations):
+        self.now = 0.0
+        self.durations = iter(durations)
+        self.runs = 0
+
+    def __call__(self):
+        return self.now
+
+    def run(self):
+        self.runs += 1
+        self.now += next(self.durations)
+
+def test_summary_statistics():
+    samples = [float(value) for value in range(1, 11)]
+    summary = summarize(samples)
+    assert summary["n"] == 10 and summary["median"] == 5.5 and summary["mean"] == 5.5
+    assert abs(summary["p95"] - 9.55) < 1e-9 and summary["min"] == 1 and summary["max"] == 10
+    assert percentile([3.0], 95) == 3.0 and summarize([2.0])["stdev"] == 0.0
+
+    rng = random.Random(1)
+    few = [rng.gauss(1.0, 0.1) for _ in range(10)]
+    many = few + [rng.gauss(1.0, 0.1) for _ in range(190)]
+    low, high = bootstrap_ci(few)
+    assert low <= summarize(few)["median"] <= high
+    assert bootstrap_ci(many)[1] - bootstrap_ci(many)[0] < high - low  # more samples, narrower interval
+
+def test_measure_warms_up_and_stops_when_the_interval_is_narrow():
+    steady = FakeClock([5.0] * 3 + [1.0] * 100)  # the slow first runs are warm-up
+    result = measure(steady.run, warmup=3, min_iterations=5, max_iterations=50, timer=steady)
+    assert result["stop_reason"] == "converged" and result["summary"]["n"] == 5 and steady.runs == 8
+    assert result["summary"]["median"] == 1.0 and result["median_ci"] == [1.0, 1.0]
+
+    rng = random.Random(2)
+    noisy = FakeClock([rng.uniform(0.5, 1.5) for _ in range(200)])
+    result = measure(noisy.run, warmup=0, min_iterations=5, max_iterations=30, target_relative_ci=0.01, timer=noisy)
+    assert result["stop_reason"] == "max_iterations" and result["summary"]["n"] == 30
+    assert result["relative_ci_width"] > 0.01
+
+    slow = FakeClock([10.0] * 100)
+    syncs = []
+    result = measure(slow.run, sync=lambda: syncs.append(1), warmup=1, time_budget=35, target_relative_ci=0, timer=slow)
+    assert result["stop_reason"] == "time_budget" and result["summary"]["n"] == 4 and len(syncs) == 5
+
+def test_speedup_interval():
+    rng = random.Random(3)
+    cpu = [rng.gauss(10.0, 0.5) for _ in range(30)]
+    gpu = [rng.gauss(1.0, 0.05) for _ in range(30)]
+    result = speedup(cpu, gpu)
+    low, high = result["ci"]
+    assert low < result["speedup"] < high and low < 10 < high and 9 < low and high < 11
+
+def test_result_line_round_trip():
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        print("program output")
+        emit_result({"device": "cpu", "samples": [0.5, 0.25]})
+        print("✅ CPU benchmark completed successfully!")
+    assert parse_result(output.getvalue()) == {"device": "cpu", "samples": [0.5, 0.25]}
+    assert parse_result("TOTAL CPU EXECUTION TIME: 1.0 seconds") is None
+
+def test_wrapped_script_reports_statistics():
+    with tempfile.TemporaryDirectory() as directory:
+        script = Path(directory) / "cpu.py"
+        script.write_text(wrap_cpu_code("total = sum(range(20000))\nprint('total', total)"))
+        out, err = Path(directory) / "cpu.out", Path(directory) / "cpu.err"
+        with open(out, "w") as stdout, open(err, "w") as stderr:
+            subprocess.run([sys.executable, str(script)], cwd=directory, stdout=stdout, stderr=stderr, timeout=120)
+
+        output = out.read_text()
+        assert output.count("total 199990000") == 1  # only the first run's output is kept
+        assert "MEDIAN CPU EXECUTION TIME:" in output and "✅ CPU benchmark completed successfully!" in output
+
+        result = read_job_result(out, err, "CPU")
+        stats = result["stats"]
+        assert result["success"] and stats["device"] == "cpu" and result["time"] == stats["summary"]["median"]
+        assert stats["summary"]["n"] == len(stats["samples"]) >= 5 and stats["warmup_runs"] >= 1
+        assert stats["median_ci"][0] <= result["time"] <= stats["median_ci"][1]
+
+        formatted = format_execution_result({"cpu": result, "gpu": dict(result, stats=dict(stats, device="gpu"))})
+        assert formatted["speedup_ci"]["ci"][0] <= 1.0 <= formatted["speedup_ci"]["ci"][1]
+
+if __name__ == "__main__":
+    test_summary_statistics()
+    test_measure_warms_up_and_stops_when_the_interval_is_narrow()
+    test_speedup_interval()
+    test_result_line_round_trip()
+    test_wrapped_script_reports_statistics()
+    print("✅ Benchmark statistics tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test the structure-aware chunker and the chunk size report."""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import StructureAwareSplitter, chunk_size_report
+
+def word_count(text):
+    return len(text.split())
+
+MARKDOWN = """# CuPy Basics
+
+CuPy mirrors the NumPy API on the GPU. Arrays live in device memory.
+
+Moving data between host and device is expensive, so keep arrays on the GPU.
+
+```python
+import cupy as cp
+x = cp.arange(10)
+y = cp.sum(x * 2)
+print(y)
+```
+
+## Kernel Fusion
+
+Use cupy.fuse to combine element-wise operations into a single kernel launch.
+"""
+
+NOTEBOOK = ("'markdown' cell: '['# cuDF', 'GPU DataFrames']'\n\n"
+            "'code' cell: '['import cudf', 'df = cudf.read_parquet(path)', 'df.groupby(key).mean()']'\n"
+            " with output: 'ok'\n\n"
+            "'markdown' cell: '['Group by runs on the GPU.']'\n\n"
+            "'markdown' cell: '['## Joins', 'Merges run on the GPU too.']'\n\n")
+
+def test_code_blocks_and_headings():
+    splitter = StructureAwareSplitter(chunk_size=20, chunk_overlap=5, max_code_block_tokens=40,
+                                      length_function=word_count)
+    chunks = splitter.split_text(MARKDOWN)
+
+    # The fenced code block is never cut in half
+    code_chunks = [chunk for chunk in chunks if "```python" in chunk]
+    assert len(code_chunks) == 1 and "print(y)\n```" in code_chunks[0]
+
+    # Every heading starts a chunk
+    for heading in ("# CuPy Basics", "## Kernel Fusion"):
+        assert any(chunk.startswith(heading) for chunk in chunks), heading
+
+    assert all(word_count(chunk) <= 40 for chunk in chunks)
+
+def test_notebook_cells():
+    splitter = StructureAwareSplitter(chunk_size=12, chunk_overlap=0, length_function=word_count)
+    chunks = splitter.split_text(NOTEBOOK)
+    code_chunk = next(chunk for chunk in chunks if "'code' cell:" in chunk)
+    assert any(chunk.startswith("'markdown' cell: '['## Joins'") for chunk in chunks)
+    assert "cudf.read_parquet(path)" in code_chunk and "with output: 'ok'" in code_chunk
+    # No chunk starts in the middle of a cell, and heading cells start a chunk
+    assert all(chunk.startswith("'") for chunk in chunks)
+    assert chunks[0].startswith("'markdown' cell: '['# cuDF'")
+
+def test_overlap_only_repeats_prose():
+    text = "\n\n".join(f"Paragraph {i} has exactly six words." for i in range(6))
+    splitter = StructureAwareSplitter(chunk_size=12, chunk_overlap=6, length_function=word_count)
+    chunks = splitter.split_text(text)
+    assert len(chunks) > 1
+    # The last paragraph of each chunk is carried into the next one
+    for previous, following in zip(chunks, chunks[1:]):
+        assert following.startswith(previous.split("\n\n")[-1])
+
+def test_chunk_size_report():
+    report = chunk_size_report([10, 20, 30, 40, 200])
+    assert report["chunks"] == 5 and report["total_tokens"] == 300
+    assert report["median"] == 30 and report["max"] == 200
+    assert sum(report["histogram"].values()) == 5
+    assert chunk_size_report([])["chunks"] == 0
+
+if __name__ == "__main__":
+    test_code_blocks_and_headings()
+    test_notebook_cells()
+    test_overlap_only_repeats_prose()
+    test_chunk_size_report()
+    print("✅ Chunker tests passed")
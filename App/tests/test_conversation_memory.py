@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test the token-budgeted conversation memory, its background summaries and the per-session store."""
+
+import os
+import sys
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+from conversation_memory import ConversationMemory, SessionMemoryStore
+
+def word_count(text):
+    return len(text.split())
+
+LONG_ANSWER = "Use cupy arrays and keep data on the device. " * 20  # 180 words
+
+def test_context_stays_within_budget():
+    memory = ConversationMemory(token_budget=300, summary_tokens=60, max_turns=10, token_counter=word_count)
+    for turn in range(20):
+        memory.add(f"Question {turn} about CuPy", LONG_ANSWER)
+        context = memory.context()
+        assert word_count(context) <= 300 and memory.last_context_tokens == word_count(context)
+    assert context.startswith("Previous conversation:")
+    assert "Question 19 about CuPy" in context and "Question 18 about CuPy" in context  # summary stand-in
+    assert memory.stats()["verbatim_turns"] == 1 and memory.stats()["pending_summary_turns"] == 0
+
+    memory.add("Short follow-up", "A" * 5000 + " " + LONG_ANSWER * 5)
+    assert word_count(memory.context()) <= 300  # a single oversized turn is truncated
+
+def test_old_turns_are_summarized_off_the_request_path():
+    release = threading.Event()
+    calls = []
+
+    def summarize(summary, exchanges):
+        release.wait()
+        calls.append([exchange["user"] for exchange in exchanges])
+        return f"{summary} discussed {' and '.join(exchange['user'] for exchange in exchanges)}".strip()
+
+    memory = ConversationMemory(summarize=summarize, token_budget=500, summary_tokens=100,
+                                max_turns=2, token_counter=word_count)
+    start_time = time.perf_counter()
+    for topic in ["cupy", "cudf", "cuml"]:
+        memory.add(topic, "answer")
+    assert time.perf_counter() - start_time < 0.5  # eviction did not wait for the summarizer
+    assert "The user asked: cupy" in memory.context()
+
+    release.set()
+    memory.wait_for_summary(timeout=5)
+    assert calls == [["cupy"]] and memory.summary == "discussed cupy"
+    context = memory.context()
+    assert "Summary of earlier conversation: discussed cupy" in context and "User: cuml" in context
+
+    memory.clear()
+    assert len(memory) == 0 and memory.context() == ""
+
+def test_sessions_are_isolated_and_bounded():
+    store = SessionMemoryStore(max_sessions=3, idle_timeout=60, max_tokens=None, token_counter=word_count)
+
+    def chat(session):
+        for turn in range(5):
+            store.add(session, f"{session} question {turn}", "answer")
+            assert f"{session} question" in store.get(session).context()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(chat, ["alice", "bob", "carol"]))
+    assert len(store) == 3
+    # Touch the sessions in a fixed order, since the threads finish in any order
+    for session in ["bob", "alice", "carol"]:
+        assert all(other not in store.get(session).context() for other in {"alice", "bob", "carol"} - {session})
+
+    store.add("dave", "hello", "hi")  # least recently used session is dropped
+    assert len(store) == 3 and "bob" not in store._sessions and store.stats()["evictions"] == 1
+
+    store.idle_timeout = 0
+    store.get("erin")
+    assert list(store._sessions) == ["erin"]
+
+    capped = SessionMemoryStore(max_sessions=100, idle_timeout=60, max_tokens=25, token_counter=word_count)
+    for session in ["a", "b", "c"]:
+        capped.add(session, "question", "one two three four five six seven eight")
+    assert list(capped._sessions) == ["b", "c"] and capped.stats()["stored_tokens"] <= 25
+
+if __name__ == "__main__":
+    test_context_stays_within_budget()
+    test_old_turns_are_summarized_off_the_request_path()
+    test_sessions_are_isolated_and_bounded()
+    print("✅ Conversation memory tests passed")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Test document ingestion: hashing, the ingestion manifest, stale source pruning, the index version stamp and notebook parsing."""
+
+import io
+import os
+import sys
+import json
+import tempfile
+import contextlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+import document_loader
+from document_loader import (DocumentLoader, IngestionManifest, VectorStore, NotebookParseCache,
+                             parse_notebook, hash_text, hash_file)
+
+class WordLengthEmbeddings(Embeddings):
+    """Deterministic stand-in for the sentence-transformer model."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = text.split() or [""]
+        return [float(len(words)), sum(len(word) for word in words) / len(words)]
+
+def write_notebook(path, title, code):
+    notebook = {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": [f"# {title}\n", "Arrays on the GPU"]},
+            {"cell_type": "code", "metadata": {}, "execution_count": 1, "source": [code],
+             "outputs": [{"output_type": "stream", "name": "stdout", "text": ["ok\n"]}]},
+        ],
+        "metadata": {"language_info": {"name": "python"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(notebook, f)
+
+@contextlib.contextmanager
+def store_settings(**settings):
+    """Temporarily override document_loader's vector store settings."""
+    original = {name: getattr(document_loader, name) for name in settings}
+    for name, value in settings.items():
+        setattr(document_loader, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(document_loader, name, value)
+
+def test_hashes_and_manifest_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "notes.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("cupy.fuse example")
+        assert hash_file(path) == hash_text("cupy.fuse example") != hash_text("cupy.fuse example!")
+
+        manifest = IngestionManifest(os.path.join(directory, "store", "manifest.json"))
+        manifest.update("notes.md", hash_file(path), ["c-0", "c-1"], mtime=1.0)
+        manifest.save()
+
+        reloaded = IngestionManifest(manifest.path)
+        assert reloaded.get("notes.md") == {"hash": hash_file(path), "chunk_ids": ["c-0", "c-1"], "mtime": 1.0}
+        assert reloaded.is_current("notes.md", hash_file(path))
+        assert not reloaded.is_current("notes.md", hash_text("edited"))
+        assert not reloaded.is_current("other.md", hash_file(path)) and reloaded.get("other.md") == {}
+
+        # A corrupt manifest starts fresh instead of failing the load
+        with open(manifest.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        assert IngestionManifest(manifest.path).sources == {}
+
+def test_unchanged_sources_are_skipped_and_stale_ones_pruned():
+    with tempfile.TemporaryDirectory() as directory:
+        knowledge_dir = os.path.join(directory, "knowledge")
+        os.makedirs(knowledge_dir)
+        manifest = IngestionManifest(os.path.join(directory, "manifest.json"))
+        manifest.update("curated_gpu_guide", hash_text("older guide"), ["guide-old-0"])
+        manifest.update("removed.ipynb", hash_text("gone"), ["removed-0", "removed-1"])
+
+        # The curated guide changed and removed.ipynb no longer exists
+        loader = DocumentLoader(knowledge_dir, manifest)
+        splits = loader.load_and_split_documents()
+        assert splits and {split.metadata["ingest_source"] for split in splits} == {"curated_gpu_guide"}
+        assert loader.removed_sources == ["removed.ipynb"]
+        assert sorted(loader.get_stale_chunk_ids()) == ["guide-old-0", "removed-0", "removed-1"]
+        loader.commit_manifest()
+
+        reloaded = IngestionManifest(manifest.path)
+        assert set(reloaded.sources) == {"curated_gpu_guide"}
+        assert reloaded.get("curated_gpu_guide")["chunk_ids"] == loader.get_chunk_ids(splits)
+
+        # Nothing changed since: no documents, nothing stale
+        loader = DocumentLoader(knowledge_dir, reloaded)
+        assert loader.load_documents() == []
+        assert loader.stats.unchanged_sources == 1 and loader.get_stale_chunk_ids() == []
+
+def test_version_stamp_decides_the_fast_path():
+    with tempfile.TemporaryDirectory() as directory, \
+            store_settings(VECTORSTORE_PERSIST_DIRECTORY=os.path.join(directory, "store"), VECTORSTORE_BACKEND="numpy"):
+        loader = DocumentLoader(os.path.join(directory, "knowledge"))
+        store = VectorStore(WordLengthEmbeddings())
+        assert not store.is_current()  # nothing built yet
+        store.create_vectorstore(loader.load_and_split_documents())
+        assert store.read_version_stamp() == store.get_index_stamp()
+
+        # A fresh process finds the store current and loads it without ingesting anything
+        fresh = VectorStore(WordLengthEmbeddings())
+        assert fresh.is_current()
+        assert fresh.load_vectorstore() is not None and fresh.get_document_count() == store.get_document_count()
+
+        # Different chunking settings invalidate the store, with a single warning per check
+        output = io.StringIO()
+        with store_settings(CHUNK_SIZE=document_loader.CHUNK_SIZE * 2), contextlib.redirect_stdout(output):
+            assert not fresh.is_current()
+        assert output.getvalue().count("different settings") == 1
+
+        os.remove(os.path.join(document_loader.VECTORSTORE_PERSIST_DIRECTORY, document_loader.INDEX_VERSION_FILE))
+        assert not fresh.is_current()  # stores from before the stamp existed are rebuilt
+
+def test_parse_notebook_and_parse_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        nb_path = os.path.join(directory, "cupy.ipynb")
+        write_notebook(nb_path, "CuPy", "x = cp.arange(4)")
+        parsed, elapsed = parse_notebook(nb_path)
+        assert elapsed >= 0 and len(parsed) == 1
+        assert "x = cp.arange(4)" in parsed[0]["page_content"] and "ok" in parsed[0]["page_content"]
+        assert parsed[0]["metadata"]["source"] == nb_path
+        json.dumps(parsed)  # plain dicts, so they cross the process pool and go into the cache
+
+        cache = NotebookParseCache(os.path.join(directory, "cache"))
+        content_hash = hash_file(nb_path)
+        assert cache.get(content_hash) is None
+        cache.put(content_hash, parsed)
+        assert NotebookParseCache(cache.cache_dir).get(content_hash) == parsed
+        assert cache.get(hash_text("another notebook")) is None
+
+def test_notebooks_are_parsed_once_and_streamed_into_the_splitter():
+    with tempfile.TemporaryDirectory() as directory:
+        knowledge_dir = os.path.join(directory, "knowledge")
+        notebooks_dir = os.path.join(knowledge_dir, "python_notebooks")
+        os.makedirs(notebooks_dir)
+        write_notebook(os.path.join(notebooks_dir, "cupy.ipynb"), "CuPy", "x = cp.arange(4)")
+        write_notebook(os.path.join(notebooks_dir, "cudf.ipynb"), "cuDF", "df = cudf.DataFrame()")
+        cache_dir = os.path.join(directory, "cache")
+
+        with store_settings(NotebookParseCache=lambda: NotebookParseCache(cache_dir)):
+            # Documents are yielded as they are loaded: the curated guide comes last
+            loader = DocumentLoader(knowledge_dir)
+            documents = loader.iter_documents()
+            first = next(documents)
+            assert first.metadata["source"].endswith(".ipynb") and loader.stats.curated_content == 0
+            assert {doc.metadata["source"] for doc in [first, *documents]} == {
+                os.path.join(notebooks_dir, "cudf.ipynb"), os.path.join(notebooks_dir, "cupy.ipynb"),
+                "curated_gpu_guide"}
+            assert loader.stats.notebooks == 2 and len(loader.stats.notebook_parse_times) == 2
+
+            # The splitter consumes the stream; a second load reuses the parsed notebooks
+            streamed = DocumentLoader(knowledge_dir)
+            splits = streamed.load_and_split_documents()
+            assert streamed.stats.notebooks_cached == 2 and streamed.stats.notebook_parse_times == {}
+            collected = DocumentLoader(knowledge_dir)
+            expected = collected.split_documents(collected.load_documents())
+            assert [split.page_content for split in splits] == [split.page_content for split in expected]
+            assert streamed.stats.total_chunks == len(splits) == len(streamed.stats.chunk_token_counts)
+
+if __name__ == "__main__":
+    test_hashes_and_manifest_round_trip()
+    test_unchanged_sources_are_skipped_and_stale_ones_pruned()
+    test_version_stamp_decides_the_fast_path()
+    test_parse_notebook_and_parse_cache()
+    test_notebooks_are_parsed_once_and_streamed_into_the_splitter()
+    print("✅ Document loader tests passed")
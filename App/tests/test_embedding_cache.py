@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test the on-disk embedding cache: reuse across instances, batching, crash recovery and dimension checks."""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic 2-d vectors from text length, recording every call."""
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = 0
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return [float(len(text)), 0.0]
+
+def test_cached_embeddings_reuse_vectors_across_instances():
+    with tempfile.TemporaryDirectory() as directory:
+        model = CountingEmbeddings()
+        embeddings = CachedEmbeddings(model, "nomic-embed-text", cache=EmbeddingCache("nomic-embed-text", directory),
+                                      batch_size=2)
+        vectors = embeddings.embed_documents(["a", "bb", "a", "ccc"])
+        assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+        assert model.document_calls == [["a", "bb"], ["ccc"]]  # duplicates embedded once, in batches
+
+        # A fresh cache instance reads the vectors back from disk
+        reloaded = CachedEmbeddings(model, "nomic-embed-text", cache=EmbeddingCache("nomic-embed-text", directory))
+        assert reloaded.embed_documents(["ccc", "dddd"]) == [[3.0, 1.0], [4.0, 1.0]]
+        assert model.document_calls[-1] == ["dddd"] and reloaded.hits == 1 and reloaded.misses == 1
+
+        assert reloaded.embed_query("q") == reloaded.embed_query("q") and model.query_calls == 1
+
+def test_rows_written_before_a_crash_are_dropped():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("model", directory)
+        cache.add_many(["a"], [[1.0, 2.0]])
+        cache.flush()
+        # Crash after appending a vector but before the index was replaced
+        with open(cache.vectors_path, "ab") as vectors:
+            vectors.write(b"\x00" * 4 + bytes(4))  # one orphan row of zeros
+        with open(cache.vectors_path, "ab") as vectors:
+            vectors.write(b"\x01\x02")  # and a partly written one
+
+        recovered = EmbeddingCache("model", directory)
+        assert len(recovered) == 1 and os.path.getsize(recovered.vectors_path) == 2 * 4
+        recovered.add_many(["b"], [[3.0, 4.0]])
+        recovered.flush()
+        found = EmbeddingCache("model", directory).get_many(["a", "b"])
+        assert found["a"].tolist() == [1.0, 2.0] and found["b"].tolist() == [3.0, 4.0]
+
+def test_index_is_written_once_per_call_and_unflushed_rows_are_dropped():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("model", directory)
+        writes = []
+        flush = cache.flush
+        cache.flush = lambda: (writes.append(cache._dirty), flush())
+        embeddings = CachedEmbeddings(CountingEmbeddings(), "model", cache=cache, batch_size=2)
+        embeddings.embed_documents(["a", "bb", "ccc", "dddd", "eeeee"])
+        assert writes == [True] and len(EmbeddingCache("model", directory)) == 5  # three batches, one index write
+
+        # Rows appended after the last flush are readable now but forgotten after a crash
+        cache.add_many(["f"], [[6.0, 1.0]])
+        assert cache.get_many(["f"])["f"].tolist() == [6.0, 1.0]
+        reloaded = EmbeddingCache("model", directory)
+        assert len(reloaded) == 5 and os.path.getsize(reloaded.vectors_path) == 5 * 2 * 4
+
+def test_dimension_change_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache("model", directory)
+        cache.add_many(["a"], [[1.0, 2.0]])
+        cache.flush()
+        try:
+            EmbeddingCache("model", directory).add_many(["b"], [[1.0, 2.0, 3.0]])
+            assert False, "expected a dimension error"
+        except ValueError as e:
+            assert "from 2 to 3" in str(e)
+        assert EmbeddingCache("model", directory).get_many(["a", "b"]).keys() == {"a"}
+
+if __name__ == "__main__":
+    test_cached_embeddings_reuse_vectors_across_instances()
+    test_rows_written_before_a_crash_are_dropped()
+    test_index_is_written_once_per_call_and_unflushed_rows_are_dropped()
+    test_dimension_change_is_rejected()
+    print("✅ Embedding cache tests passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test the execution backends: local subprocess limits and timeouts, SLURM job scripts and backend selection."""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import LocalExecutor, SlurmExecutor, get_executor, slurm_time_limit
+from benchmark import run_benchmark_iter
+
+PROBE = """import os, time, resource
+print("start", time.time())
+print("cores", len(os.sched_getaffinity(0)))
+print("memory", resource.getrlimit(resource.RLIMIT_AS)[0])
+time.sleep(0.3)
+print("end", time.time())
+"""
+
+def write_script(directory, name, code):
+    path = Path(directory) / f"{name}.py"
+    path.write_text(code)
+    return path, Path(directory) / f"{name}.out", Path(directory) / f"{name}.err"
+
+def read_probe(path):
+    return {line.split()[0]: float(line.split()[1]) for line in path.read_text().splitlines()}
+
+def test_local_jobs_are_capped_pinned_and_limited():
+    with tempfile.TemporaryDirectory() as directory:
+        executor = LocalExecutor(max_concurrent=2, cpus_per_job=1, memory_limit_mb=512)
+        assert 1 <= executor.max_concurrent <= min(2, len(os.sched_getaffinity(0)))
+        scripts = {name: write_script(directory, name, PROBE) for name in ["a", "b", "c", "gpu"]}
+        jobs = {executor.submit(*paths, kind="gpu" if name == "gpu" else "cpu"): name for name, paths in scripts.items()}
+        results = list(executor.as_completed(jobs, timeout=30))
+        assert all(result["state"] == "COMPLETED" and result["done"] for result in results) and len(results) == 4
+
+        probes = {name: read_probe(paths[1]) for name, paths in scripts.items()}
+        assert all(probe["cores"] == 1 for probe in probes.values())
+        assert probes["a"]["memory"] == 512 * 1024 * 1024 and probes["gpu"]["memory"] == -1  # GPU jobs are not limited
+        # Never more jobs running at once than the cap
+        for probe in probes.values():
+            overlapping = sum(other["start"] < probe["end"] and probe["start"] < other["end"] for other in probes.values())
+            assert overlapping <= executor.max_concurrent
+
+def test_local_timeout_kills_the_whole_job():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_script(directory, "stuck", "import subprocess, time\n"
+                             "print(subprocess.Popen(['sleep', '30']).pid, flush=True)\ntime.sleep(30)")
+        executor = LocalExecutor()
+        start_time = time.time()
+        result = executor.wait(executor.submit(*paths, timeout=0.5), timeout=10)
+        assert result["state"] == "TIMEOUT" and not result["done"] and time.time() - start_time < 5
+
+        child = paths[1].read_text().split()[0]
+        time.sleep(0.2)
+        status = Path(f"/proc/{child}/status")
+        assert not status.exists() or "State:\tZ" in status.read_text()  # the job's own children are gone too
+
+def test_benchmark_runs_without_slurm():
+    with tempfile.TemporaryDirectory() as directory:
+        results = list(run_benchmark_iter("print(sum(range(100)))", "print('gpu')", directory, executor=LocalExecutor()))
+        assert results[-1]["cpu"]["success"] and results[-1]["cpu"]["time"] is not None
+        assert not list(Path(directory).glob("*.sh"))
+
+    path = os.environ["PATH"]
+    os.environ["PATH"] = os.path.dirname(sys.executable)
+    try:
+        assert isinstance(get_executor("auto"), LocalExecutor)  # no sbatch on this PATH
+    finally:
+        os.environ["PATH"] = path
+
+def test_submitted_job_is_waited_on_when_the_other_submission_fails():
+    class NoGpuExecutor(LocalExecutor):
+        def submit(self, script_path, stdout_path, stderr_path, kind="cpu", timeout=None):
+            if kind == "gpu":
+                raise RuntimeError("sbatch: error: QOSMaxSubmitJobPerUserLimit")
+            return super().submit(script_path, stdout_path, stderr_path, kind=kind, timeout=timeout)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = list(run_benchmark_iter("print(sum(range(100)))", "print('gpu')", directory, executor=NoGpuExecutor()))
+        cpu = results[-1]["cpu"]
+        assert cpu["success"] and cpu["time"] is not None and cpu["stats"]["summary"]["n"] >= 1
+        assert not results[-1]["gpu"]["success"]
+
+def test_slurm_job_scripts_load_the_environment_for_their_kind():
+    assert slurm_time_limit(600) == "0-00:10:00" and slurm_time_limit(90061) == "1-01:01:01"
+    with tempfile.TemporaryDirectory() as directory:
+        gpu = SlurmExecutor.write_job_script(Path(directory) / "gpu.sh", "python gpu.py", "gpu.out", "gpu.err",
+                                             kind="gpu", time_limit=slurm_time_limit(300)).read_text()
+        cpu = SlurmExecutor.write_job_script(Path(directory) / "cpu.sh", "python cpu.py", "cpu.out", "cpu.err").read_text()
+        assert "#SBATCH -G 1" in gpu and "#SBATCH -t 0-00:05:00" in gpu and "source activate rapids25.02" in gpu
+        assert "#SBATCH -G 1" not in cpu and "source activate scicomp24.11" in cpu
+        assert cpu.rstrip().endswith(f"cd {Path(directory).resolve()}\npython cpu.py")
+
+if __name__ == "__main__":
+    test_local_jobs_are_capped_pinned_and_limited()
+    test_local_timeout_kills_the_whole_job()
+    test_benchmark_runs_without_slurm()
+    test_submitted_job_is_waited_on_when_the_other_submission_fails()
+    test_slurm_job_scripts_load_the_environment_for_their_kind()
+    print("✅ Executor tests passed")
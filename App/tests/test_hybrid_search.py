@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test BM25 tokenization and ranking, persistence, and reciprocal rank fusion."""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from hybrid_search import tokenize, BM25Index, HybridRetriever, reciprocal_rank_fusion
+from numpy_vectorstore import NumpyVectorStore
+
+DOCS = [
+    Document(page_content="Use cupy.fuse to merge element-wise kernels into one launch.",
+             metadata={"chunk_id": "fuse"}),
+    Document(page_content="cudf.read_parquet loads Parquet files straight into GPU memory.",
+             metadata={"chunk_id": "parquet"}),
+    Document(page_content="Pandas groupby operations map directly onto cuDF dataframes.",
+             metadata={"chunk_id": "groupby"}),
+    Document(page_content="Keep arrays on the device to avoid host transfers.",
+             metadata={"chunk_id": "transfers"}),
+]
+
+class ConstantEmbeddings(Embeddings):
+    """Every text gets the same vector, so the embedding ranking carries no signal."""
+
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+def test_tokenize_keeps_api_names():
+    tokens = tokenize("How do I call cudf.read_parquet?")
+    assert "cudf.read_parquet" in tokens
+    assert {"cudf", "read_parquet", "read", "parquet"} <= set(tokens)
+    assert "how" not in tokens and "i" not in tokens
+
+def test_bm25_ranking_and_persistence():
+    index = BM25Index()
+    index.add_documents(DOCS)
+    assert index.search("cupy.fuse", k=1)[0][0].metadata["chunk_id"] == "fuse"
+    assert index.search("read parquet files", k=1)[0][0].metadata["chunk_id"] == "parquet"
+
+    index.delete(["parquet"])
+    assert all(doc.metadata["chunk_id"] != "parquet" for doc, _ in index.search("parquet", k=4))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lexical_index.json")
+        index.save(path)
+        loaded = BM25Index.load(path)
+        assert len(loaded) == 3 and loaded.postings == index.postings
+        assert loaded.search("groupby", k=1)[0][0].metadata["chunk_id"] == "groupby"
+
+def test_reciprocal_rank_fusion():
+    a, b, c = DOCS[:3]
+    fused = reciprocal_rank_fusion([[a, b, c], [c, b]])
+    # Documents found by both rankings beat the one ranked first by only one of them
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["groupby", "parquet", "fuse"]
+
+def test_hybrid_retriever_finds_api_names():
+    store = NumpyVectorStore.from_documents(DOCS, ConstantEmbeddings(),
+                                            ids=[doc.metadata["chunk_id"] for doc in DOCS])
+    index = BM25Index()
+    index.add_documents(DOCS)
+    retriever = HybridRetriever(vectorstore=store, lexical_index=index, k=2, candidates=4)
+    results = retriever.invoke("cudf.read_parquet")
+    assert len(results) == 2 and results[0].metadata["chunk_id"] == "parquet"
+
+if __name__ == "__main__":
+    test_tokenize_keeps_api_names()
+    test_bm25_ranking_and_persistence()
+    test_reciprocal_rank_fusion()
+    test_hybrid_retriever_finds_api_names()
+    print("✅ Hybrid search tests passed")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Test the SQLite LLM response cache: keys, persistence, LRU eviction and stats."""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_cache import LLMResponseCache
+
+PROMPT = [HumanMessage(content="Convert this NumPy code to CuPy")]
+
+def test_key_covers_model_settings_and_prompt():
+    key = LLMResponseCache.make_key("qwen2.5-coder:14b", "http://localhost:11434/", 0, PROMPT)
+    assert key == LLMResponseCache.make_key("qwen2.5-coder:14b", "http://localhost:11434/", 0,
+                                            [HumanMessage(content="Convert this NumPy code to CuPy")])
+    variants = [
+        ("qwen2.5-coder:7b", "http://localhost:11434/", 0, PROMPT),
+        ("qwen2.5-coder:14b", "http://gpu-node:11434/", 0, PROMPT),
+        ("qwen2.5-coder:14b", "http://localhost:11434/", 0.7, PROMPT),
+        ("qwen2.5-coder:14b", "http://localhost:11434/", 0, [SystemMessage(content=PROMPT[0].content)]),
+    ]
+    assert len({LLMResponseCache.make_key(*variant) for variant in variants} | {key}) == 5
+
+def test_persistence_eviction_and_stats():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "llm_cache.sqlite3")
+        cache = LLMResponseCache(path, max_entries=10)
+        for i in range(10):
+            cache.put(f"key{i}", "model", f"response {i}")
+            time.sleep(0.001)
+        assert cache.get("key0") == "response 0"  # key0 becomes the most recently used
+        assert cache.get("missing") is None
+
+        cache.put("key10", "model", "response 10")
+        stats = cache.stats()
+        assert stats["entries"] == 9 and stats["hits"] == 1 and stats["misses"] == 1
+        assert cache.contains("key0") and not cache.contains("key1")
+        cache.close()
+
+        reopened = LLMResponseCache(path, max_entries=10)
+        assert reopened.get("key10") == "response 10"
+        reopened.clear()
+        assert reopened.stats()["entries"] == 0
+        reopened.close()
+
+if __name__ == "__main__":
+    test_key_covers_model_settings_and_prompt()
+    test_persistence_eviction_and_stats()
+    print("✅ LLM cache tests passed")
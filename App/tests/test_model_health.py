@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the Ollama health monitor: /api/tags probes, model checks and the circuit breaker."""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_health import ModelHealthMonitor, ModelUnavailableError
+
+class TagsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"models": [{"name": "qwen2.5-coder:14b"}, {"name": "llama3:latest"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_probe_caches_installed_models():
+    server = HTTPServer(("127.0.0.1", 0), TagsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monitor = ModelHealthMonitor(f"http://127.0.0.1:{server.server_port}/")
+        assert monitor.probe()
+        assert monitor.is_available("qwen2.5-coder:14b") and monitor.is_available("llama3")
+        monitor.check("qwen2.5-coder:14b")
+        try:
+            monitor.check("mistral:7b")
+            assert False, "missing model should raise"
+        except ModelUnavailableError:
+            pass
+    finally:
+        server.shutdown()
+
+def test_circuit_opens_fails_fast_and_recovers():
+    monitor = ModelHealthMonitor(f"http://127.0.0.1:{unused_port()}/", timeout=0.5,
+                                 failure_threshold=2, reset_timeout=0.2)
+    assert not monitor.probe()
+    monitor.record_failure(ValueError("bad prompt"))  # not a connection problem
+    assert monitor.state == "closed"
+    monitor.record_failure(ConnectionError("refused"))
+    assert monitor.state == "open" and not monitor.is_available()
+
+    start_time = time.perf_counter()
+    try:
+        monitor.check()
+        assert False, "open circuit should raise"
+    except ModelUnavailableError:
+        assert time.perf_counter() - start_time < 0.05
+
+    time.sleep(0.25)
+    assert monitor.allow_request() and monitor.state == "half_open"
+    assert not monitor.allow_request()  # only one trial at a time
+    monitor.record_failure(ConnectionError("still down"))
+    assert monitor.state == "open"
+
+    time.sleep(0.25)
+    monitor.check()
+    monitor.record_success()
+    assert monitor.state == "closed" and monitor.status()["consecutive_failures"] == 0
+
+if __name__ == "__main__":
+    test_probe_caches_installed_models()
+    test_circuit_opens_fails_fast_and_recovers()
+    print("✅ Model health tests passed")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test the NumPy vector index: search, upsert, delete and memmap save/load."""
+
+import os
+import sys
+import tempfile
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from numpy_vectorstore import NumpyVectorStore
+
+VOCABULARY = ["cupy", "cudf", "numpy", "pandas", "kernel", "dataframe", "array", "gpu"]
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Deterministic stand-in for the sentence-transformer model."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(word)) for word in VOCABULARY]
+
+TEXTS = {
+    "a": "cupy array on the gpu",
+    "b": "cudf dataframe on the gpu",
+    "c": "numpy array",
+    "d": "pandas dataframe",
+    "e": "custom kernel",
+}
+
+def build_store(persist_directory=None):
+    return NumpyVectorStore.from_texts(list(TEXTS.values()), BagOfWordsEmbeddings(),
+                                       metadatas=[{"source": key} for key in TEXTS],
+                                       ids=list(TEXTS), persist_directory=persist_directory)
+
+def test_search_and_batch_search():
+    store = build_store()
+    assert len(store) == 5
+    hits = store.similarity_search_with_score("cudf dataframe", k=2)
+    assert [doc.id for doc, _ in hits] == ["b", "d"]
+    assert hits[0][1] >= hits[1][1]
+
+    batched = store.batch_similarity_search(["cupy array", "custom kernel"], k=1)
+    assert [hits[0][0].id for hits in batched] == ["a", "e"]
+
+    filtered = store.similarity_search("dataframe", k=5, filter={"source": "d"})
+    assert [doc.id for doc in filtered] == ["d"]
+
+    retriever = store.as_retriever(search_kwargs={"k": 1})
+    assert retriever.invoke("pandas")[0].page_content == TEXTS["d"]
+
+def test_upsert_and_delete():
+    store = build_store()
+    store.add_texts(["cupy kernel"], ids=["a"])
+    assert len(store) == 5
+    assert store.get_by_ids(["a"])[0].page_content == "cupy kernel"
+
+    store.delete(["b", "missing"])
+    assert len(store) == 4
+    assert "b" not in [doc.id for doc in store.similarity_search("cudf dataframe gpu", k=4)]
+    # Swap-delete keeps every remaining id pointing at its own row
+    for doc_id in store.ids:
+        assert store.get_by_ids([doc_id])[0].id == doc_id
+
+def test_persist_and_memmap_load():
+    with tempfile.TemporaryDirectory() as directory:
+        store = build_store(directory)
+        store.persist()
+
+        loaded = NumpyVectorStore(BagOfWordsEmbeddings(), persist_directory=directory)
+        assert len(loaded) == 5 and isinstance(loaded._matrix, np.memmap)
+        assert loaded.similarity_search("numpy array", k=1)[0].id == "c"
+
+        # The first write moves the memmapped vectors into memory
+        loaded.add_texts(["gpu kernel"], ids=["f"])
+        loaded.delete(["a"])
+        loaded.persist()
+        reloaded = NumpyVectorStore(BagOfWordsEmbeddings(), persist_directory=directory)
+        assert sorted(reloaded.ids) == ["b", "c", "d", "e", "f"]
+
+if __name__ == "__main__":
+    test_search_and_batch_search()
+    test_upsert_and_delete()
+    test_persist_and_memmap_load()
+    print("✅ NumPy vector store tests passed")
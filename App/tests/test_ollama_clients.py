@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Test the Ollama client registry: deduplication, shared pools and load balancing over fake servers."""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+from model_health import ModelHealthMonitor, ModelUnavailableError
+import ollama_clients
+from ollama_clients import OllamaClientRegistry, discover_default_endpoint, normalize_endpoint
+from config import OLLAMA_BASE_URL
+
+MODEL = "qwen2.5-coder:14b"
+PROMPT = [HumanMessage(content="Convert this NumPy code to CuPy")]
+
+def fake_ollama(name: str) -> ThreadingHTTPServer:
+    """Minimal Ollama server: /api/tags and a one-line /api/chat stream naming the server."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, payload, content_type):
+            body = (json.dumps(payload) + "\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._send({"models": [{"name": MODEL}]}, "application/json")
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append((self.path, request))
+            self._send({"model": request["model"], "created_at": "2024-01-01T00:00:00Z",
+                        "message": {"role": "assistant", "content": name},
+                        "done": True, "done_reason": "stop"}, "application/x-ndjson")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests_seen = requests_seen
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_port}/"
+
+def test_models_and_pools_are_shared():
+    registry = OllamaClientRegistry(["http://gpu-a:11434", "http://gpu-a:11434/"], health_checks=False)
+    assert registry.endpoints == ["http://gpu-a:11434/"]
+    assert registry.chat_model(MODEL) is registry.chat_model(MODEL)
+    first = registry.get_llm(MODEL, "http://gpu-a:11434")
+    assert first is registry.get_llm(MODEL, "http://gpu-a:11434/")
+    # Every model on a server shares the registry's connection pool
+    transport = first.sync_client_kwargs["transport"]
+    assert registry.get_llm("llama3", "http://gpu-a:11434/").sync_client_kwargs["transport"] is transport
+
+def test_endpoint_discovery_is_bounded():
+    original_get = ollama_clients.requests.get
+
+    def hanging_get(url, timeout):
+        time.sleep(1)
+        raise ollama_clients.requests.ConnectionError(url)
+
+    ollama_clients.requests.get = hanging_get
+    try:
+        start_time = time.perf_counter()
+        assert discover_default_endpoint(timeout=0.2) == normalize_endpoint(OLLAMA_BASE_URL)
+        assert time.perf_counter() - start_time < 2
+    finally:
+        ollama_clients.requests.get = original_get
+
+def test_requests_are_balanced_and_skip_unhealthy_servers():
+    servers = [fake_ollama("a"), fake_ollama("b")]
+    try:
+        registry = OllamaClientRegistry([url(server) for server in servers], health_checks=False)
+        model = registry.chat_model(MODEL)
+        assert sorted(model.invoke(PROMPT).content for _ in range(4)) == ["a", "a", "b", "b"]
+
+        async def run():
+            return [await model.ainvoke(PROMPT) for _ in range(2)]
+        assert sorted(response.content for response in asyncio.run(run())) == ["a", "b"]
+        asyncio.run(run())  # a new event loop gets its own async connection pool
+
+        monitors = {endpoint: ModelHealthMonitor(endpoint, failure_threshold=1) for endpoint in registry.endpoints}
+        registry.health_monitors = monitors
+        monitors[url(servers[0])].record_failure(ConnectionError("down"))
+        assert {model.invoke(PROMPT).content for _ in range(3)} == {"b"}
+
+        monitors[url(servers[1])].record_failure(ConnectionError("down"))
+        try:
+            model.invoke(PROMPT)
+            assert False, "all servers down should raise"
+        except ModelUnavailableError:
+            pass
+    finally:
+        for server in servers:
+            server.shutdown()
+
+def test_warm_up_loads_models_with_keep_alive():
+    server = fake_ollama("a")
+    try:
+        registry = OllamaClientRegistry([url(server), "http://127.0.0.1:1/"], health_checks=False, keep_alive="1h")
+        status = registry.warm_up([MODEL, MODEL])
+        assert status["state"] == "ready" and registry.ready.is_set()
+        assert f"{MODEL}@{url(server)}" in status["load_seconds"] and len(status["errors"]) == 1
+        path, request = server.requests_seen[0]
+        assert path == "/api/generate" and request["model"] == MODEL and request["keep_alive"] == "1h"
+
+        registry.get_llm(MODEL, url(server)).invoke(PROMPT)
+        assert server.requests_seen[-1][1]["keep_alive"] == "1h"
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_models_and_pools_are_shared()
+    test_endpoint_discovery_is_bounded()
+    test_requests_are_balanced_and_skip_unhealthy_servers()
+    test_warm_up_loads_models_with_keep_alive()
+    print("✅ Ollama client registry tests passed")
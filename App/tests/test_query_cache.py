@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Test the retrieval query cache: normalization, LRU/TTL, semantic tier and invalidation."""
+
+import os
+import sys
+import time
+import asyncio
+from typing import List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.docstore.document import Document
+from langchain_core.retrievers import BaseRetriever
+from query_cache import QueryCache, CachedRetriever
+
+class CountingRetriever(BaseRetriever):
+    calls: int = 0
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> List[Document]:
+        self.calls += 1
+        return [Document(page_content=f"result for {query}")]
+
+def fake_embed(text):
+    # Near-duplicate questions about groupby land close together
+    if "groupby" in text.lower():
+        return [1.0, 0.1 if "convert" in text else 0.0]
+    return [0.0, 1.0]
+
+def test_exact_tier_lru_and_ttl():
+    cache = QueryCache(max_entries=2, ttl=0.2)
+    cache.put("How do I convert pandas groupby to cuDF?", [Document(page_content="a")])
+    assert cache.get("  how do I convert   PANDAS groupby to cudf ")[0].page_content == "a"
+
+    cache.put("second", [Document(page_content="b")])
+    cache.put("third", [Document(page_content="c")])
+    assert cache.get("how do i convert pandas groupby to cudf") is None  # evicted
+    time.sleep(0.25)
+    assert cache.get("third") is None  # expired
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_semantic_tier():
+    cache = QueryCache(semantic_threshold=0.95, embed_query=fake_embed)
+    cache.put("pandas groupby to cudf", [Document(page_content="groupby answer")])
+    assert cache.get("convert a pandas groupby to cudf")[0].page_content == "groupby answer"
+    assert cache.get("cupy fuse") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+def test_cached_retriever_and_invalidation():
+    retriever = CountingRetriever()
+    cache = QueryCache()
+    cached = CachedRetriever(retriever=retriever, cache=cache)
+    cached.invoke("cupy.fuse")
+    cached.invoke("CuPy.fuse?")
+    assert retriever.calls == 1
+
+    cache.invalidate()
+    cached.invoke("cupy.fuse")
+    assert retriever.calls == 2 and cache.stats()["invalidations"] == 1
+
+    # Results computed before an invalidation are not stored
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("stale", [Document(page_content="old")], generation)
+    assert cache.get("stale") is None
+
+def test_cached_retriever_async():
+    retriever = CountingRetriever()
+    cached = CachedRetriever(retriever=retriever, cache=QueryCache())
+
+    async def run():
+        first = await cached.ainvoke("cupy.fuse")
+        second = await cached.ainvoke("CuPy.fuse")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert retriever.calls == 1 and first[0].page_content == second[0].page_content
+
+if __name__ == "__main__":
+    test_exact_tier_lru_and_ttl()
+    test_semantic_tier()
+    test_cached_retriever_and_invalidation()
+    test_cached_retriever_async()
+    print("✅ Query cache tests passed")
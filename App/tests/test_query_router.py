@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test the query router against a labeled set built from the original classification patterns."""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_router import QueryRouter, GPU_PATTERNS, GPU_KEYWORDS, CODE_REQUEST_PATTERNS
+
+ROUTES = [
+    ("```python\nx = 1\n```", "code_analysis"),
+    ("What does this code do? import numpy as np", "code_analysis"),
+    ("Explain this code: df = pd.read_csv('a.csv')", "code_analysis"),
+    ("Please analyze my code: for i in range(10): total += i", "code_analysis"),
+    ("Optimize this code for me def f(x): return x * 2", "code_analysis"),
+    ("Can you make my code faster? np.dot(a, b)", "code_analysis"),
+    ("Convert this code to the GPU: import pandas as pd", "code_analysis"),
+    ("What does this code do?", "general_chat"),
+    ("Can you optimize my code", "general_chat"),
+    ("Tell me about GPU acceleration", "gpu_question"),
+    ("How does CuPy compare with NumPy?", "gpu_question"),
+    ("What is cuDF?", "gpu_question"),
+    ("Does cuml support random forests", "gpu_question"),
+    ("What is RAPIDS", "gpu_question"),
+    ("Which NVIDIA cards are supported?", "gpu_question"),
+    ("How can I optimize my workflow on the gpu", "gpu_question"),
+    ("How is GPU performance measured?", "gpu_question"),
+    ("Can you help with data analysis on a gpu", "gpu_question"),
+    ("Which GPU operations are fastest?", "gpu_question"),
+    ("Is pandas good for large datasets?", "gpu_question"),
+    ("When should I use numpy", "gpu_question"),
+    ("Hello!", "general_chat"),
+    ("What is machine learning?", "general_chat"),
+    ("What's the weather like?", "general_chat"),
+    ("Thanks a lot", "general_chat"),
+]
+
+CHAT_INTENTS = [
+    ("Hello there", "greeting"),
+    ("hey", "greeting"),
+    ("Who are you?", "identity"),
+    ("What can you do?", "capabilities"),
+    ("What is this?", "explain_code"),
+    ("Thank you!", "thanks"),
+    ("Bye for now", "goodbye"),
+    ("How are you today?", "how_are_you"),
+    ("What is an LLM?", "define_llm"),
+    ("what is AI", "define_ai"),
+    ("What is machine learning?", "define_ml"),
+    ("What is Python?", "define_python"),
+    ("Which sorting algorithm is fastest?", "open"),  # "hi" inside a word is not a greeting
+    ("Hi, what can you do?", "greeting"),  # overlapping intents keep the original priority
+]
+
+def test_routes_match_labeled_set():
+    router = QueryRouter()
+    wrong = [(question, expected, router.route(question)) for question, expected in ROUTES
+             if router.route(question)[0] != expected]
+    assert not wrong, wrong
+    assert router.route("```x```")[1] == 1.0 and router.route("What's the weather like?")[1] == 0.5
+
+def test_prefilter_keywords_cover_every_pattern():
+    # The router only runs a pattern group when its keyword is present
+    assert all(any(keyword in pattern for keyword in GPU_KEYWORDS) for pattern in GPU_PATTERNS)
+    assert all("code" in pattern for pattern in CODE_REQUEST_PATTERNS)
+
+def test_chat_intents_and_followups():
+    router = QueryRouter()
+    for question, expected in CHAT_INTENTS:
+        assert router.chat_intent(question)[0] == expected, question
+    assert router.chat_intent("Tell me more about that", has_context=True)[0] == "followup"
+    assert router.chat_intent("Tell me more about that")[0] == "open"
+
+def test_embedding_fallback_uses_exemplars():
+    vocabulary = ["gpu", "graphics", "dataframe", "kernel", "joke", "book", "france", "file"]
+
+    def embed(text):
+        words = text.lower().replace("?", "").split()
+        return [float(any(word.startswith(term) for word in words)) for term in vocabulary] + [0.1]
+
+    router = QueryRouter(embed_query=embed, embedding_threshold=0.2)
+    assert router.route("Can the graphics card sort my dataframe faster?")[0] == "gpu_question"
+    assert router.route("Recommend a book about France")[0] == "general_chat"
+    assert router.route("Tell me about GPU acceleration") == ("gpu_question", 0.9)  # rules come first
+
+if __name__ == "__main__":
+    test_routes_match_labeled_set()
+    test_prefilter_keywords_cover_every_pattern()
+    test_chat_intents_and_followups()
+    test_embedding_fallback_uses_exemplars()
+    print("✅ Query router tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Test per-request LLM usage accounting: concurrent sessions each see their own prompt token counts."""
+
+import os
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeChatModel, FakeRAGAgent
+
+PROMPTS = {"alice": "Explain this short loop", "bob": " ".join(["Explain this much longer loop body"] * 20)}
+
+def expected_prompt_tokens(agent, prompt):
+    messages, _ = agent._code_analysis_request(prompt)
+    return sum(len(message.content.split()) for message in messages)
+
+def test_streamed_requests_in_other_threads_keep_their_own_counts():
+    agent = FakeRAGAgent(FakeChatModel(reply="ok done now", delay=0.02))
+    streams = {session: agent.query_code_analysis_stream(prompt, session_id=session)
+               for session, prompt in PROMPTS.items()}
+    # Interleave the two streams, each step on whichever pool thread is free, as Gradio does
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        finished = set()
+        while len(finished) < len(streams):
+            for session, stream in streams.items():
+                if session not in finished and executor.submit(next, stream, None).result() is None:
+                    finished.add(session)
+
+    for session, prompt in PROMPTS.items():
+        usage = agent.get_request_usage(session)
+        assert usage["prompt_tokens"] == expected_prompt_tokens(agent, prompt)
+        assert usage["calls"] == 1 and usage["output_tokens"] == 3 and usage["ttft"] is not None
+        assert agent.get_conversation_stats(session)["last_request"] == usage
+    assert agent.get_token_usage()["calls"] == 2
+
+def test_concurrent_async_requests_keep_their_own_counts():
+    agent = FakeRAGAgent(FakeChatModel(delay=0.02))
+
+    async def run_both():
+        await asyncio.gather(*(agent.aquery_code_analysis(prompt, session_id=session)
+                               for session, prompt in PROMPTS.items()))
+    asyncio.run(run_both())
+
+    for session, prompt in PROMPTS.items():
+        usage = agent.get_request_usage(session)
+        assert usage["prompt_tokens"] == usage["input_tokens"] == expected_prompt_tokens(agent, prompt)
+    assert agent.get_request_usage("carol") is None
+
+if __name__ == "__main__":
+    test_streamed_requests_in_other_threads_keep_their_own_counts()
+    test_concurrent_async_requests_keep_their_own_counts()
+    print("✅ Request usage tests passed")
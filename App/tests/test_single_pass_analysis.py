@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test single-pass code analysis: one structured generation yields the answer and the optimized code."""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeChatModel, FakeRAGAgent, StubOptimizer, STRUCTURED_REPLY
+from gpu_mentor import GPUMentor
+
+CODE = "import numpy as np\nx = np.arange(10)\nprint(x.sum())"
+
+def test_prompt_carries_the_question_code_and_conversation():
+    agent = FakeRAGAgent()
+    mentor = GPUMentor(agent, StubOptimizer())
+    prompt = mentor._single_pass_prompt("Why is this slow?", CODE, False, "alice")
+    assert "**User Question:** Why is this slow?" in prompt and CODE in prompt
+    assert "## 🚀 GPU-Optimized Code" in prompt and "Previous conversation" not in prompt
+
+    agent.add_to_conversation_memory("What is CuPy?", "A NumPy-compatible GPU array library.", "alice")
+    with_context = mentor._single_pass_prompt("Why is this slow?", CODE, True, "alice")
+    assert with_context.endswith(prompt) and "NumPy-compatible GPU array library" in with_context
+
+def test_structured_response_is_parsed_into_the_optimized_code():
+    agent = FakeRAGAgent(FakeChatModel(reply=STRUCTURED_REPLY))
+    optimizer = StubOptimizer()
+    mentor = GPUMentor(agent, optimizer)
+    response = mentor.process_user_input("Speed this up", CODE, use_conversation_context=True, session_id="alice")
+
+    assert response["text_response"] == STRUCTURED_REPLY
+    assert response["optimized_code"] == "import cupy as cp\nx = cp.arange(10)\nprint(x.sum())"
+    assert response["optimized_code"] == mentor._parse_llm_response(STRUCTURED_REPLY)[1]
+    assert len(agent.fake_model.prompts) == 1 and "suggest_optimizations" not in optimizer.calls
+    assert "Speed this up" in agent.get_conversation_context("alice")
+
+def test_unstructured_response_falls_back_to_the_optimizer():
+    agent = FakeRAGAgent(FakeChatModel(reply="Try moving the arrays to the GPU."))
+    optimizer = StubOptimizer()
+    response = GPUMentor(agent, optimizer).process_user_input("Speed this up", CODE)
+    assert response["text_response"] == "Try moving the arrays to the GPU."
+    assert response["optimized_code"] == "# rule-based suggestion" and "suggest_optimizations" in optimizer.calls
+
+if __name__ == "__main__":
+    test_prompt_carries_the_question_code_and_conversation()
+    test_structured_response_is_parsed_into_the_optimized_code()
+    test_unstructured_response_falls_back_to_the_optimizer()
+    print("✅ Single-pass analysis tests passed")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Test the SLURM job monitor (output markers, batched scheduler queries with backoff) against fake SLURM commands."""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slurm_monitor import SlurmJobMonitor
+from executors import SlurmExecutor, submit_slurm_job
+from benchmark import run_benchmark_iter
+from fake_slurm_env import fake_slurm
+
+def submit_sleep(directory, name, seconds, exit_code=0, before=""):
+    script = os.path.join(directory, f"{name}.sh")
+    with open(script, "w") as handle:
+        handle.write(f"#!/bin/bash\n#SBATCH -o {directory}/{name}.out\n#SBATCH -e {directory}/{name}.err\n"
+                     f"{before}\nsleep {seconds}\nexit {exit_code}\n")
+    return submit_slurm_job(script)
+
+def read_log(directory, command):
+    path = os.path.join(directory, f"{command}.log")
+    if not os.path.exists(path):
+        return []
+    with open(path) as log:
+        return log.read().splitlines()
+
+def test_jobs_are_reported_in_completion_order_with_shared_polls():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(directory):
+        monitor = SlurmJobMonitor(poll_interval=0.1, backoff=1)
+        start_time = time.time()
+        slow = submit_sleep(directory, "slow", 1.5)
+        fast = submit_sleep(directory, "fast", 1.0, exit_code=3)
+
+        results = list(monitor.as_completed([slow, fast], timeout=10))
+        elapsed = time.time() - start_time
+        assert [result["job_id"] for result in results] == [fast, slow]
+        assert results[0]["state"] == "FAILED" and results[0]["exit_code"] == 3
+        assert results[1]["state"] == "COMPLETED" and results[1]["done"]
+        assert elapsed < 1.5 + 1.0  # waited for the slower job, less than running both in turn
+
+        calls = read_log(directory, "sacct")
+        assert len(calls) == monitor.polls and calls[0] == f"{slow},{fast}"  # one call covers both jobs
+        assert monitor.polls < elapsed / 0.1 + 3 and not read_log(directory, "squeue")
+
+def test_output_marker_finishes_job_without_scheduler_queries():
+    for use_inotify in (True, False):
+        with tempfile.TemporaryDirectory() as directory, fake_slurm(directory):
+            # Without inotify the 0.2s size check is what notices the marker
+            monitor = SlurmJobMonitor(poll_interval=30, output_check_interval=30 if use_inotify else 0.2,
+                                      use_inotify=use_inotify)
+            assert monitor._watcher.uses_inotify == use_inotify
+            passed = submit_sleep(directory, "passed", 2, before="sleep 0.2; echo '✅ CPU benchmark completed successfully!'")
+            failed = submit_sleep(directory, "failed", 2, before="sleep 0.2; echo '❌ Error: boom'")
+            start_time = time.time()
+            results = {result["job_id"]: result for result in monitor.as_completed(
+                [passed, failed], timeout=10,
+                output_paths={passed: f"{directory}/passed.out", failed: f"{directory}/failed.out"})}
+            assert time.time() - start_time < 1.5 and monitor.polls == 0  # finished while the jobs still sleep
+            assert results[passed]["state"] == "COMPLETED" and results[passed]["source"] == "output"
+            assert results[failed]["state"] == "FAILED" and results[failed]["done"]
+
+def test_scheduler_queries_back_off_while_jobs_run():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(directory):
+        monitor = SlurmJobMonitor(poll_interval=0.1, max_interval=0.8, backoff=2)
+        result = monitor.wait(submit_sleep(directory, "quiet", 2), timeout=10)
+        # Gaps of 0.1, 0.2, 0.4, 0.8, 0.8s instead of twenty 0.1s polls
+        assert result["source"] == "scheduler" and result["state"] == "COMPLETED"
+        assert monitor.polls <= 6 and result["seconds"] < 2 + 0.8 + 0.5
+
+def test_squeue_is_used_when_accounting_is_disabled():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(directory, FAKE_SLURM_NO_ACCOUNTING="1"):
+        result = SlurmJobMonitor(poll_interval=0.1, backoff=1).wait(submit_sleep(directory, "plain", 0.3), timeout=10)
+        assert result["done"] and result["state"] == "COMPLETED" and read_log(directory, "squeue")
+    assert "FAKE_SLURM_NO_ACCOUNTING" not in os.environ and "fake_slurm" not in os.environ["PATH"]  # restored
+
+def test_timeout_resolves_without_waiting_for_the_job():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(directory):
+        job_id = submit_sleep(directory, "stuck", 3)
+        result = SlurmJobMonitor(poll_interval=0.1).wait(job_id, timeout=0.3)
+        assert not result["done"] and result["state"] == "RUNNING" and result["seconds"] < 1
+
+def test_benchmark_yields_first_finished_side():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(directory):
+        cpu_code = "import time\ntime.sleep(0.5)\nprint(sum(range(1000)))"
+        gpu_code = "print('gpu')"
+        executor = SlurmExecutor(monitor=SlurmJobMonitor(poll_interval=0.1))
+        results = list(run_benchmark_iter(cpu_code, gpu_code, directory, executor=executor))
+        assert len(results) == 2
+        assert results[0]["cpu"] is None and results[0]["gpu"] is not None  # the quicker job is shown first
+        assert results[1]["cpu"]["success"] and results[1]["cpu"]["time"] >= 0.5
+
+if __name__ == "__main__":
+    test_jobs_are_reported_in_completion_order_with_shared_polls()
+    test_output_marker_finishes_job_without_scheduler_queries()
+    test_scheduler_queries_back_off_while_jobs_run()
+    test_squeue_is_used_when_accounting_is_disabled()
+    test_timeout_resolves_without_waiting_for_the_job()
+    test_benchmark_yields_first_finished_side()
+    print("✅ SLURM monitor tests passed")
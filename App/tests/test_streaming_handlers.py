@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Test the streaming chat and code analysis handlers against a stand-in LLM."""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeChatModel, FakeRAGAgent, StubOptimizer, STRUCTURED_REPLY
+from gpu_mentor import GPUMentor
+
+CODE = "import numpy as np\nx = np.arange(10)\nprint(x.sum())"
+
+class Session:
+    session_hash = "alice"
+
+def test_query_stream_yields_chunks_and_remembers_the_exchange():
+    agent = FakeRAGAgent(FakeChatModel(reply="Use cupy.arange to keep it on the GPU"))
+    chunks = list(agent.query_stream(f"How can I speed up this code?\n```python\n{CODE}\n```", session_id="alice"))
+    assert len(chunks) > 1 and "".join(chunks) == "Use cupy.arange to keep it on the GPU"
+    assert agent.get_conversation_stats("alice")["last_request"]["calls"] == 1
+    assert "cupy.arange" in agent.get_conversation_context("alice")
+
+def test_chat_interface_stream_grows_the_last_message():
+    agent = FakeRAGAgent(FakeChatModel(reply=STRUCTURED_REPLY))
+    optimizer = StubOptimizer()
+    mentor = GPUMentor(agent, optimizer)
+    history = []
+    updates = [update[2][-1]["content"] for update in mentor.chat_interface_stream("Speed this up", CODE, history, Session())]
+
+    assert len(history) == 2 and history[0]["role"] == "user" and CODE in history[0]["content"]
+    assert updates[0] == "**🤖 AI Response:**\n"
+    streamed = updates[1:-1]
+    assert len(streamed) > 1 and all(len(a) < len(b) for a, b in zip(streamed, streamed[1:]))
+    assert "cp.arange(10)" in updates[-1]
+    # The single-pass reply already carries the optimized code, so no second generation is needed
+    assert optimizer.calls == ["analyze_code", "execute_code_safely"] and len(agent.fake_model.prompts) == 1
+    assert "cp.arange(10)" in agent.get_conversation_context("alice")
+
+def test_analyze_code_only_stream_ends_with_the_parsed_response():
+    agent = FakeRAGAgent(FakeChatModel(reply=STRUCTURED_REPLY, delay=0.001))
+    mentor = GPUMentor(agent, StubOptimizer())
+    updates = list(mentor.analyze_code_only_stream(CODE))
+    analysis, optimized_code = updates[-1]
+    assert optimized_code == "import cupy as cp\nx = cp.arange(10)\nprint(x.sum())"
+    assert analysis.startswith("## 🔍 AI Analysis") and "Keep arrays on the device." in analysis
+
+    assert list(mentor.analyze_code_only_stream("  ")) == [("No code provided for analysis.", "")]
+
+if __name__ == "__main__":
+    test_query_stream_yields_chunks_and_remembers_the_exchange()
+    test_chat_interface_stream_grows_the_last_message()
+    test_analyze_code_only_stream_ends_with_the_parsed_response()
+    print("✅ Streaming handler tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Test warm workers: queue handling by a local worker process and a worker job started through fake SLURM."""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIRECTORY)
+
+from warm_worker import WarmWorkerPool
+from benchmark import run_benchmark_iter
+from executors import LocalExecutor
+from config import BENCHMARK_CPUS
+from fake_slurm_env import fake_slurm
+
+PROBE = """import os, time
+print("start", time.time())
+print("cores", len(os.sched_getaffinity(0)))
+time.sleep(0.3)
+print("end", time.time())
+"""
+
+def wait_until_ready(pool, timeout=30):
+    deadline = time.time() + timeout
+    while not pool.is_ready():
+        assert time.time() < deadline, "warm worker did not start"
+        time.sleep(0.1)
+
+def write_script(directory, name, code):
+    path = Path(directory) / f"{name}.py"
+    path.write_text(code)
+    return path, Path(directory) / f"{name}.out", Path(directory) / f"{name}.err"
+
+def test_worker_runs_queued_tasks_in_fresh_processes():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = os.path.join(directory, "queue")
+        worker = subprocess.Popen([sys.executable, "warm_worker.py", "serve", "--queue", queue, "--idle-timeout", "60"],
+                                  cwd=APP_DIRECTORY, stdout=subprocess.DEVNULL)
+        try:
+            pool = WarmWorkerPool(queue_dir=queue, poll_interval=0.05)
+            wait_until_ready(pool)
+            passed = write_script(directory, "passed", "import os\nprint('pid', os.getpid())\nprint(open('data.txt').read())")
+            failed = write_script(directory, "failed", "raise ValueError('boom')")
+            stuck = write_script(directory, "stuck", "import time\ntime.sleep(30)")
+            (Path(directory) / "data.txt").write_text("read from the script's directory")
+
+            start_time = time.time()
+            tasks = {pool.submit(*passed): "passed", pool.submit(*failed): "failed", pool.submit(*stuck, timeout=1): "stuck"}
+            results = {tasks[result["job_id"]]: result for result in pool.as_completed(tasks, timeout=20)}
+            assert results["passed"]["state"] == "COMPLETED" and results["passed"]["seconds"] < 5
+            assert results["failed"]["state"] == "FAILED" and results["stuck"]["state"] == "TIMEOUT"
+            assert time.time() - start_time < 10
+
+            output = passed[1].read_text()
+            assert "read from the script's directory" in output and f"pid {worker.pid}" not in output
+            assert "ValueError: boom" in failed[2].read_text()
+            assert not os.listdir(os.path.join(queue, "tasks")) and not os.listdir(os.path.join(queue, "running"))
+
+            pool.stop()
+            assert worker.wait(timeout=10) == 0 and not pool.is_ready()
+        finally:
+            worker.kill()
+
+def test_tasks_run_one_at_a_time_on_pinned_cores_and_survive_a_dead_worker():
+    with tempfile.TemporaryDirectory() as directory:
+        queue = os.path.join(directory, "queue")
+        pool = WarmWorkerPool(queue_dir=queue, poll_interval=0.05)
+        # Two tasks claimed by a worker that died without a heartbeat; one was already re-queued once
+        probes = [write_script(directory, name, PROBE) for name in ("first", "second", "requeued", "lost")]
+        orphans = {}
+        for name, paths in zip(("requeued", "lost"), probes[2:]):
+            task_id = pool.submit(*paths)
+            task_path = pool.queue["tasks"] / f"{task_id}.json"
+            task = json.loads(task_path.read_text())
+            task.update(worker="gone-1234", attempts=0 if name == "requeued" else 1)
+            (pool.queue["running"] / task_path.name).write_text(json.dumps(task))
+            task_path.unlink()
+            orphans[task_id] = name
+
+        worker = subprocess.Popen([sys.executable, "warm_worker.py", "serve", "--queue", queue, "--idle-timeout", "60"],
+                                  cwd=APP_DIRECTORY, stdout=subprocess.DEVNULL)
+        try:
+            wait_until_ready(pool)
+            results = {orphans[result["job_id"]]: result for result in pool.as_completed(orphans, timeout=20)}
+            assert results["requeued"]["state"] == "COMPLETED" and results["lost"]["state"] == "NODE_FAIL"
+            assert not os.listdir(os.path.join(queue, "running"))
+
+            tasks = [pool.submit(*paths) for paths in probes[:2]]
+            assert all(result["state"] == "COMPLETED" for result in pool.as_completed(tasks, timeout=20))
+            first, second = ({line.split()[0]: float(line.split()[1]) for line in paths[1].read_text().splitlines()}
+                             for paths in probes[:2])
+            assert first["end"] <= second["start"]  # the CPU and GPU halves of a benchmark do not overlap
+            assert first["cores"] == min(BENCHMARK_CPUS, len(os.sched_getaffinity(0)))
+            pool.stop()
+            assert worker.wait(timeout=10) == 0
+        finally:
+            worker.kill()
+
+def test_benchmarks_use_the_worker_job_instead_of_new_submissions():
+    with tempfile.TemporaryDirectory() as directory, fake_slurm(os.path.join(directory, "slurm")):
+        pool = WarmWorkerPool(queue_dir=os.path.join(directory, "queue"), idle_timeout=60, poll_interval=0.05)
+        try:
+            assert len(pool.start()) == 1 and pool.start() == []  # one worker job is kept, not one per call
+            script = (pool.queue["root"] / "warm_worker.sh").read_text()
+            assert f"#SBATCH -c {BENCHMARK_CPUS * pool.slots}" in script and f"--slots {pool.slots}" in script
+            wait_until_ready(pool)
+
+            for _ in range(2):
+                results = list(run_benchmark_iter("print(sum(range(10)))", "print('gpu')", directory, pool=pool))
+                assert results[-1]["cpu"]["success"] and results[-1]["cpu"]["time"] is not None
+            jobs = [name for name in os.listdir(os.environ["FAKE_SLURM_DIR"]) if name.endswith(".job")]
+            assert len(jobs) == 1  # both benchmarks ran on the worker job
+        finally:
+            pool.stop()
+            for job in pool._jobs.values():
+                assert job.result(timeout=20)["done"]  # the worker job exits once asked to stop
+
+def test_benchmark_runs_when_the_worker_job_cannot_be_submitted():
+    class UnsubmittablePool(WarmWorkerPool):
+        def start(self):
+            raise RuntimeError("sbatch failed: QOSMaxSubmitJobPerUserLimit")
+
+    with tempfile.TemporaryDirectory() as directory:
+        pool = UnsubmittablePool(queue_dir=os.path.join(directory, "queue"))
+        results = list(run_benchmark_iter("print(sum(range(10)))", "print('gpu')", directory,
+                                          executor=LocalExecutor(), pool=pool))
+        assert results[-1]["cpu"]["success"] and results[-1]["cpu"]["time"] is not None  # no cupy here for the GPU side
+
+if __name__ == "__main__":
+    test_worker_runs_queued_tasks_in_fresh_processes()
+    test_tasks_run_one_at_a_time_on_pinned_cores_and_survive_a_dead_worker()
+    test_benchmarks_use_the_worker_job_instead_of_new_submissions()
+    test_benchmark_runs_when_the_worker_job_cannot_be_submitted()
+    print("✅ Warm worker tests passed")
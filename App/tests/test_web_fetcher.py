@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Test concurrent web fetching and ETag revalidation against a local HTTP server."""
+
+import os
+import sys
+import tempfile
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_fetcher import WebFetcher
+
+PAGE = b"<html lang='en'><head><title>CuPy</title></head><body>cupy.fuse example</body></html>"
+ETAG = '"v1"'
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the same page on every path, honouring If-None-Match; paths in `failing` answer with that status."""
+    requests_seen = []
+    failing = {}
+
+    def do_GET(self):
+        StandInHandler.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path in StandInHandler.failing:
+            self.send_response(StandInHandler.failing[self.path])
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_web_fetcher():
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/page{i}" for i in range(20)]
+
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = WebFetcher(cache_dir=cache_dir, max_workers=8, per_host_limit=4, timeout=5)
+
+            # First pass downloads every page and caches it with its ETag
+            first = fetcher.fetch_all(urls)
+            assert [r["url"] for r in first] == urls
+            assert all(r["status"] == 200 and r["body"] == PAGE for r in first)
+
+            # Second pass revalidates: every page is a 304 served from the cache
+            second = fetcher.fetch_all(urls)
+            assert all(r["status"] == 304 and r["from_cache"] and r["body"] == PAGE for r in second)
+            assert sum(1 for _, etag in StandInHandler.requests_seen if etag == ETAG) == len(urls)
+
+            # Errors are reported, not raised
+            missing = fetcher.fetch(f"{base_url}/missing")
+            assert missing["status"] == 404 and missing["error"] and not missing["body"]
+            fetcher.close()
+    finally:
+        server.shutdown()
+
+    print("✅ Web fetcher test passed")
+
+def test_stale_copy_is_served_for_outages_but_not_for_removed_pages():
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = WebFetcher(cache_dir=cache_dir, max_workers=2, per_host_limit=2, timeout=5)
+            fetcher.session.mount("http://", requests.adapters.HTTPAdapter())  # no retry backoff on 5xx
+            for path in ("/outage", "/removed"):
+                assert fetcher.fetch(base_url + path)["status"] == 200
+
+            StandInHandler.failing = {"/outage": 503, "/removed": 410}
+            outage = fetcher.fetch(f"{base_url}/outage")
+            assert outage["status"] == 503 and outage["error"] and outage["from_cache"] and outage["body"] == PAGE
+
+            removed = fetcher.fetch(f"{base_url}/removed")
+            assert removed["status"] == 410 and removed["error"] and not removed["from_cache"] and not removed["body"]
+            assert not any(os.path.exists(path) for path in fetcher._cache_paths(f"{base_url}/removed"))
+
+            # Nothing reachable at all: the stale copy is still served
+            unreachable = WebFetcher(cache_dir=cache_dir, timeout=1)
+            unreachable.session.mount("http://", requests.adapters.HTTPAdapter())
+            server.shutdown()
+            server.server_close()
+            down = unreachable.fetch(f"{base_url}/outage")
+            assert down["status"] is None and down["error"] and down["body"] == PAGE
+            fetcher.close()
+            unreachable.close()
+    finally:
+        StandInHandler.failing = {}
+        server.shutdown()
+
+    print("✅ Stale cache test passed")
+
+if __name__ == "__main__":
+    test_web_fetcher()
+    test_stale_copy_is_served_for_outages_but_not_for_removed_pages()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Warm benchmark workers
+
+A warm worker is a long-running SLURM job that holds a GPU allocation with the CUDA
+module and the RAPIDS environment already loaded. It pulls benchmark tasks from a queue
+directory on the shared filesystem and runs each one in a fresh process forked from a
+server that has already imported numpy, pandas and cupy. A benchmark then starts within
+a queue scan instead of waiting for an allocation, loading modules and importing
+libraries every time.
+
+Queue directory layout (WARM_WORKER_QUEUE_DIR):
+    tasks/<id>.json      waiting tasks, written by WarmWorkerPool.submit
+    running/<id>.json    tasks claimed by a worker (an atomic rename, so each runs once); the
+                         app re-queues a task once if its worker's heartbeat goes stale
+    results/<id>.json    exit code and timings, written when a task finishes
+    workers/<name>.json  heartbeat of each live worker
+    stop                 asks every worker to exit
+
+Usage (the worker job started by WarmWorkerPool.start runs this):
+    python warm_worker.py serve --queue DIR [--idle-timeout SECONDS]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import runpy
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List
+from slurm_monitor import get_job_monitor
+from executors import JobExecutor, SlurmExecutor, submit_slurm_job
+from config import (WARM_WORKER_QUEUE_DIR, WARM_WORKER_COUNT, WARM_WORKER_SLOTS, WARM_WORKER_TIME_LIMIT,
+                    WARM_WORKER_IDLE_TIMEOUT, WARM_WORKER_POLL_INTERVAL, WARM_WORKER_HEARTBEAT_TIMEOUT,
+                    WARM_WORKER_PRELOAD, BENCHMARK_CPUS, SLURM_JOB_TIMEOUT)
+
+def queue_directories(queue_dir: str) -> Dict[str, Path]:
+    """Paths of the queue's parts, creating the directories if needed."""
+    root = Path(queue_dir).resolve()
+    paths = {name: root / name for name in ("tasks", "running", "results", "workers")}
+    for path in paths.values():
+        path.mkdir(parents=True, exist_ok=True)
+    paths["root"] = root
+    paths["stop"] = root / "stop"
+    return paths
+
+def write_json(path: Path, data: Dict[str, Any]):
+    """Write through a temporary file and rename, so readers never see a partial file."""
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(data))
+    os.replace(temporary, path)
+
+def _run_task(script: str, stdout_path: str, stderr_path: str, workdir: str, cpus: int = None):
+    """Body of a task process: run the script as __main__ with its output sent to the task's files.
+
+    With cpus the process is pinned to that many of the worker's cores, matching the core
+    count a benchmark gets as its own SLURM job.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, sorted(os.sched_getaffinity(0))[:cpus])
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    sys.argv = [script]
+    with open(stdout_path, "w") as out, open(stderr_path, "w") as err:
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+    runpy.run_path(script, run_name="__main__")
+
+class WarmWorker:
+    """Runs queued tasks on the node it was started on until idle for idle_timeout seconds."""
+
+    def __init__(self, queue_dir: str, slots: int = WARM_WORKER_SLOTS,
+                 idle_timeout: float = WARM_WORKER_IDLE_TIMEOUT,
+                 poll_interval: float = WARM_WORKER_POLL_INTERVAL, preload: List[str] = None):
+        self.queue = queue_directories(queue_dir)
+        self.slots = slots
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.tasks_done = 0
+        self._started = time.time()
+        self._running = {}  # task id -> (process, task, start time)
+        # Task processes fork from a server that imported the heavy modules once. CUDA itself
+        # is initialized per task: a CUDA context cannot be inherited across fork.
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(WARM_WORKER_PRELOAD if preload is None else preload)
+
+    def serve(self):
+        print(f"🔥 Warm worker {self.name} serving {self.queue['root']}")
+        self._warm_up()
+        # Heartbeat before the first claim, so the app never sees a claimed task without a live worker
+        self._heartbeat()
+        last_active = last_heartbeat = time.time()
+        try:
+            while not self.queue["stop"].exists():
+                self._reap()
+                while len(self._running) < self.slots and self._start(self._claim()):
+                    pass
+                now = time.time()
+                if self._running:
+                    last_active = now
+                elif now - last_active > self.idle_timeout:
+                    print(f"🧹 Warm worker idle for {self.idle_timeout:.0f}s, releasing the allocation")
+                    break
+                if now - last_heartbeat > WARM_WORKER_HEARTBEAT_TIMEOUT / 3:
+                    self._heartbeat()
+                    last_heartbeat = now
+                time.sleep(self.poll_interval)
+        finally:
+            for task_id in list(self._running):
+                self._finish(task_id, killed="shutdown")
+            (self.queue["workers"] / f"{self.name}.json").unlink(missing_ok=True)
+            # The completion marker lets the app's job monitor see the exit without asking SLURM
+            print(f"✅ Warm worker {self.name} completed successfully after {self.tasks_done} tasks")
+
+    def _warm_up(self):
+        """Start the fork server now so the first task does not pay for the imports."""
+        start_time = time.time()
+        process = self._context.Process(target=int)
+        process.start()
+        process.join()
+        print(f"⚡ Fork server ready in {time.time() - start_time:.1f}s")
+
+    def _claim(self):
+        for name in sorted(os.listdir(self.queue["tasks"])):
+            if not name.endswith(".json"):
+                continue
+            claimed = self.queue["running"] / name
+            try:
+                os.rename(self.queue["tasks"] / name, claimed)
+            except FileNotFoundError:
+                continue  # Another worker took it
+            task = json.loads(claimed.read_text())
+            task["worker"] = self.name  # Lets the app notice if this worker dies mid-task
+            write_json(claimed, task)
+            return task
+        return None
+
+    def _start(self, task) -> bool:
+        if task is None:
+            return False
+        process = self._context.Process(target=_run_task, args=(task["script"], task["stdout"], task["stderr"],
+                                                                task["workdir"], task.get("cpus")))
+        process.start()
+        self._running[task["task_id"]] = (process, task, time.time())
+        return True
+
+    def _reap(self):
+        now = time.time()
+        for task_id, (process, task, started) in list(self._running.items()):
+            if not process.is_alive():
+                self._finish(task_id)
+            elif now - started > task["timeout"]:
+                self._finish(task_id, killed="timeout")
+
+    def _finish(self, task_id: str, killed: str = None):
+        """Record a task's result; killed is "timeout" or "shutdown" when the worker stopped it."""
+        process, task, started = self._running.pop(task_id)
+        if killed:
+            process.kill()
+        process.join()
+        write_json(self.queue["results"] / f"{task_id}.json", {
+            "task_id": task_id, "exit_code": process.exitcode, "killed": killed,
+            "seconds": time.time() - started, "queued_seconds": started - task["submitted"], "worker": self.name,
+        })
+        (self.queue["running"] / f"{task_id}.json").unlink(missing_ok=True)
+        self.tasks_done += 1
+
+    def _heartbeat(self):
+        write_json(self.queue["workers"] / f"{self.name}.json", {
+            "name": self.name, "host": socket.gethostname(), "pid": os.getpid(),
+            "job_id": os.environ.get("SLURM_JOB_ID"), "started": self._started, "updated": time.time(),
+            "tasks_done": self.tasks_done, "running": len(self._running),
+        })
+
+class WarmWorkerPool(JobExecutor):
+    """Keeps warm worker jobs queued or running and sends tasks to them through the queue directory."""
+
+    name = "warm_worker"
+
+    def __init__(self, queue_dir: str = WARM_WORKER_QUEUE_DIR, workers: int = WARM_WORKER_COUNT,
+                 slots: int = WARM_WORKER_SLOTS, time_limit: str = WARM_WORKER_TIME_LIMIT, idle_timeout: float = WARM_WORKER_IDLE_TIMEOUT,
+                 poll_interval: float = WARM_WORKER_POLL_INTERVAL,
+                 heartbeat_timeout: float = WARM_WORKER_HEARTBEAT_TIMEOUT):
+        self.queue = queue_directories(queue_dir)
+        self.workers = workers
+        self.slots = slots
+        self.time_limit = time_limit
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._jobs = {}  # worker job id -> Future that resolves when the job leaves the queue
+        self._lock = threading.Lock()
+
+    def start(self) -> List[str]:
+        """Submit worker jobs until `workers` are queued or running; returns the new job ids."""
+        self.queue["stop"].unlink(missing_ok=True)
+        submitted = []
+        with self._lock:
+            self._jobs = {job_id: future for job_id, future in self._jobs.items() if not future.done()}
+            while len(self._jobs) < self.workers:
+                job_id = submit_slurm_job(str(self._write_job_script()))
+                output_path = self.queue["root"] / f"worker_{job_id}.out"
+                self._jobs[job_id] = get_job_monitor().watch(job_id, timeout=None, output_path=output_path)
+                submitted.append(job_id)
+        for job_id in submitted:
+            print(f"🔥 Submitted warm worker job {job_id}")
+        return submitted
+
+    def _write_job_script(self) -> Path:
+        root = self.queue["root"]
+        command = (f"python warm_worker.py serve --queue {root} --idle-timeout {self.idle_timeout} "
+                   f"--slots {self.slots}")
+        # Enough cores for every slot's task to be pinned to its own BENCHMARK_CPUS
+        return SlurmExecutor.write_job_script(root / "warm_worker.sh", command, root / "worker_%j.out",
+                                              root / "worker_%j.err", kind="gpu", time_limit=self.time_limit,
+                                              cpus=BENCHMARK_CPUS * self.slots,
+                                              workdir=Path(__file__).resolve().parent)
+
+    def _read_heartbeat(self, path: Path) -> Dict[str, Any]:
+        """A worker's heartbeat if it is recent enough to count as alive, else None."""
+        try:
+            heartbeat = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        return heartbeat if time.time() - heartbeat["updated"] <= self.heartbeat_timeout else None
+
+    def live_workers(self) -> List[Dict[str, Any]]:
+        """Heartbeats of workers that are still serving."""
+        with self._lock:
+            ended = {job_id for job_id, future in self._jobs.items() if future.done()}
+        workers = []
+        for path in self.queue["workers"].glob("*.json"):
+            heartbeat = self._read_heartbeat(path)
+            if heartbeat and heartbeat.get("job_id") not in ended:
+                workers.append(heartbeat)
+        return workers
+
+    def is_ready(self) -> bool:
+        return bool(self.live_workers())
+
+    def submit(self, script_path, stdout_path, stderr_path, kind: str = "cpu",
+               timeout: float = SLURM_JOB_TIMEOUT) -> str:
+        """Queue a Python script; its output goes to the given files like a SLURM job's -o/-e.
+
+        Every worker holds a GPU, so CPU and GPU tasks share the same queue. Each task is
+        pinned to BENCHMARK_CPUS cores, like a benchmark submitted as its own SLURM job.
+        """
+        task_id = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}"
+        write_json(self.queue["tasks"] / f"{task_id}.json", {
+            "task_id": task_id, "script": str(Path(script_path).resolve()),
+            "stdout": str(Path(stdout_path).resolve()), "stderr": str(Path(stderr_path).resolve()),
+            "workdir": str(Path(script_path).resolve().parent), "timeout": timeout, "submitted": time.time(),
+            "kind": kind, "cpus": BENCHMARK_CPUS, "attempts": 0,
+        })
+        return task_id
+
+    def _recover(self, task_id: str) -> Dict[str, Any]:
+        """Re-queue a task whose worker died while running it, or fail it if that already happened once.
+
+        Returns the result of a failed task, None if the task is fine or was re-queued.
+        """
+        path = self.queue["running"] / f"{task_id}.json"
+        try:
+            task = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None  # Waiting, finished, or being rewritten by the worker that claimed it
+        worker = task.get("worker")
+        if worker is None:
+            # Claimed an instant ago; only stale if no worker is serving at all
+            if self.live_workers():
+                return None
+        elif self._read_heartbeat(self.queue["workers"] / f"{worker}.json"):
+            return None
+
+        if task.get("attempts", 0) < 1:
+            print(f"⚠️ Warm worker {worker} stopped while running task {task_id}, re-queuing it")
+            task.update(attempts=task.get("attempts", 0) + 1, worker=None)
+            write_json(path, task)
+            os.rename(path, self.queue["tasks"] / path.name)
+            return None
+        print(f"⚠️ Warm worker {worker} stopped while running task {task_id} again, giving up on it")
+        path.unlink(missing_ok=True)
+        return {"job_id": task_id, "state": "NODE_FAIL", "exit_code": None, "done": True,
+                "seconds": time.time() - task["submitted"], "source": "warm_worker"}
+
+    def as_completed(self, task_ids: Iterable[str], timeout: float = SLURM_JOB_TIMEOUT) -> Iterator[Dict[str, Any]]:
+        """Yield each task's result as it finishes, in the result format of SlurmJobMonitor."""
+        waiting = set(task_ids)
+        deadline = time.time() + timeout
+        while waiting:
+            for task_id in sorted(waiting):
+                path = self.queue["results"] / f"{task_id}.json"
+                if not path.exists():
+                    continue
+                result = json.loads(path.read_text())
+                path.unlink(missing_ok=True)
+                waiting.discard(task_id)
+                state = {"timeout": "TIMEOUT", "shutdown": "CANCELLED"}.get(result["killed"])
+                state = state or ("COMPLETED" if result["exit_code"] == 0 else "FAILED")
+                yield {"job_id": task_id, "state": state, "exit_code": result["exit_code"], "done": not result["killed"],
+                       "seconds": result["seconds"], "source": "warm_worker"}
+            for task_id in sorted(waiting):
+                failed = self._recover(task_id)
+                if failed:
+                    waiting.discard(task_id)
+                    yield failed
+            if waiting and time.time() >= deadline:
+                for task_id in sorted(waiting):
+                    print(f"⚠️ Stopped waiting for warm worker task {task_id} after {timeout:.0f}s")
+                    (self.queue["tasks"] / f"{task_id}.json").unlink(missing_ok=True)  # Not claimed yet
+                    yield {"job_id": task_id, "state": "UNKNOWN", "exit_code": None, "done": False,
+                           "seconds": timeout, "source": "timeout"}
+                return
+            if waiting:
+                time.sleep(self.poll_interval)
+
+    def stop(self):
+        """Ask the workers to exit and cancel worker jobs that have not started yet."""
+        self.queue["stop"].touch()
+        with self._lock:
+            job_ids = [job_id for job_id, future in self._jobs.items() if not future.done()]
+        if job_ids:
+            try:
+                subprocess.run(["scancel", "--state=PENDING", *job_ids], capture_output=True, timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+def get_warm_pool() -> WarmWorkerPool:
+    """The process-wide pool, so every benchmark shares the same worker jobs."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = WarmWorkerPool()
+        return _shared_pool
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm benchmark worker")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    serve = subcommands.add_parser("serve", help="Run queued tasks on this node")
+    serve.add_argument("--queue", default=WARM_WORKER_QUEUE_DIR, help="Queue directory shared with the app")
+    serve.add_argument("--idle-timeout", type=float, default=WARM_WORKER_IDLE_TIMEOUT,
+                       help="Seconds without tasks before exiting")
+    serve.add_argument("--slots", type=int, default=WARM_WORKER_SLOTS, help="Tasks run at once")
+    args = parser.parse_args()
+
+    # SLURM sends SIGTERM at the time limit; unwind so running tasks are recorded
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    WarmWorker(args.queue, slots=args.slots, idle_timeout=args.idle_timeout).serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import List, Dict, Any
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (WEB_FETCH_MAX_WORKERS, WEB_FETCH_PER_HOST_LIMIT, WEB_FETCH_TIMEOUT,
+                    WEB_CACHE_DIRECTORY)
+
+class WebFetcher:
+    """Fetch knowledge URLs concurrently with a pooled session and an on-disk HTTP cache.
+
+    Responses are cached with their ETag / Last-Modified validators; later fetches send
+    conditional requests so unchanged pages cost a 304 and are served from the cache.
+    """
+
+    def __init__(self, cache_dir: str = WEB_CACHE_DIRECTORY, max_workers: int = WEB_FETCH_MAX_WORKERS,
+                 per_host_limit: int = WEB_FETCH_PER_HOST_LIMIT, timeout: float = WEB_FETCH_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+
+        # One session shared by all worker threads so connections are kept alive and reused
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "GPU-Mentor-Knowledge-Loader/1.0"
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Limit the number of concurrent requests sent to a single host."""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def _cache_paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return (os.path.join(self.cache_dir, f"{key}.json"),
+                os.path.join(self.cache_dir, f"{key}.body"))
+
+    def _read_cache(self, url: str):
+        """Return (metadata, body) for a cached URL, or (None, None)."""
+        if not self.cache_dir:
+            return None, None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            return meta, body
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_cache(self, url: str, meta: Dict[str, Any], body: bytes):
+        if not self.cache_dir:
+            return
+        meta_path, body_path = self._cache_paths(url)
+        # Write the body first so a metadata file always points at a complete body
+        for path, data, mode in ((body_path, body, 'wb'), (meta_path, json.dumps(meta), 'w')):
+            tmp_path = f"{path}.tmp.{threading.get_ident()}"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _remove_cache(self, url: str):
+        if not self.cache_dir:
+            return
+        for path in self._cache_paths(url):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def is_gone(status) -> bool:
+        """True for client errors that mean the page itself is gone or refused, not a passing outage."""
+        return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+    def fetch(self, url: str) -> Dict[str, Any]:
+        """Fetch one URL, revalidating against the cache when possible."""
+        result = {
+            "url": url,
+            "status": None,
+            "body": b"",
+            "encoding": None,
+            "from_cache": False,
+            "elapsed": 0.0,
+            "error": ""
+        }
+        cached_meta, cached_body = self._read_cache(url)
+        headers = {}
+        if cached_meta:
+            if cached_meta.get("etag"):
+                headers["If-None-Match"] = cached_meta["etag"]
+            if cached_meta.get("last_modified"):
+                headers["If-Modified-Since"] = cached_meta["last_modified"]
+
+        start_time = time.perf_counter()
+        try:
+            with self._host_semaphore(url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            result["status"] = response.status_code
+
+            if response.status_code == 304 and cached_meta:
+                result["body"] = cached_body
+                result["encoding"] = cached_meta.get("encoding")
+                result["from_cache"] = True
+            else:
+                response.raise_for_status()
+                result["body"] = response.content
+                result["encoding"] = response.encoding or response.apparent_encoding
+                self._write_cache(url, {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "encoding": result["encoding"],
+                    "fetched_at": time.time()
+                }, response.content)
+        except Exception as e:
+            result["error"] = str(e)
+            if self.is_gone(result["status"]):
+                # A 404 / 410 is not an outage: forget the page instead of serving it forever
+                self._remove_cache(url)
+            elif cached_meta:
+                # Serve a stale copy for connection errors, timeouts and 5xx responses
+                result["body"] = cached_body
+                result["encoding"] = cached_meta.get("encoding")
+                result["from_cache"] = True
+        result["elapsed"] = time.perf_counter() - start_time
+        return result
+
+    def fetch_all(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Fetch all URLs concurrently; results are returned in input order."""
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(self.fetch, urls))
+
+    def close(self):
+        self.session.close()